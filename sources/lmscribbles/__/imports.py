@@ -24,6 +24,11 @@
 
 
 import collections.abc as   cabc
+import contextlib as        ctxl
+import dataclasses as       dcls
+import                      enum
+import                      os
+import                      sys
 import                      types
 
 from pathlib import         Path
@@ -25,7 +25,9 @@ from . import imports as __
 
 
 ComparisonResult: __.typx.TypeAlias = bool | __.types.NotImplementedType
+Location: __.typx.TypeAlias = str | __.Path  # Path-like
 NominativeArguments: __.typx.TypeAlias = __.cabc.Mapping[ str, __.typx.Any ]
+PathPair: __.typx.TypeAlias = tuple[ __.Path, __.Path ]
 PositionalArguments: __.typx.TypeAlias = __.cabc.Sequence[ __.typx.Any ]
 
 
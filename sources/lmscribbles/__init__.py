@@ -21,16 +21,26 @@
 ''' Management of accumulated language model scribbles. '''
 
 
+from importlib import import_module as _import_module
+from types import ModuleType as _Module
+
 from . import __
 # --- BEGIN: Injected by Copier ---
 from . import exceptions
 # --- END: Injected by Copier ---
-from . import commands
 
 
 __version__ = '1.0a0'
 
 
+def __getattr__( name: str ) -> _Module:
+    # Commands are imported on first access, rather than with the package.
+    if name == 'commands':
+        return _import_module( f".{name}", __name__ )
+    message = f"module {__name__!r} has no attribute {name!r}"
+    raise AttributeError( message )
+
+
 def main( ):
     ''' Entrypoint. '''
     from .cli import execute
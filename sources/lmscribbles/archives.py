@@ -0,0 +1,101 @@
+# vim: set filetype=python fileencoding=utf-8:
+# -*- coding: utf-8 -*-
+
+#============================================================================#
+#                                                                            #
+#  Licensed under the Apache License, Version 2.0 (the "License");           #
+#  you may not use this file except in compliance with the License.          #
+#  You may obtain a copy of the License at                                   #
+#                                                                            #
+#      http://www.apache.org/licenses/LICENSE-2.0                            #
+#                                                                            #
+#  Unless required by applicable law or agreed to in writing, software       #
+#  distributed under the License is distributed on an "AS IS" BASIS,         #
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.  #
+#  See the License for the specific language governing permissions and       #
+#  limitations under the License.                                            #
+#                                                                            #
+#============================================================================#
+
+
+
+''' Listing of archive entries, as recorded by project manifests. '''
+
+
+from . import __
+from . import manifests as _manifests
+from . import retention as _retention
+
+
+class ArchiveRecord( __.immut.DataclassObject ):
+    ''' Recorded state of file in project directory of archive. '''
+
+    project: str
+    path: str
+    content_hash: str
+    size: int
+    mtime_ns: int
+
+    def render_as_dictionary( self ) -> dict[ str, __.typx.Any ]:
+        ''' Renders record as dictionary for serialization. '''
+        return {
+            'project': self.project,
+            'path': self.path,
+            'content_hash': self.content_hash,
+            'size': self.size,
+            'mtime_ns': self.mtime_ns,
+        }
+
+
+class ArchiveListing( __.immut.Object ):
+    ''' Entries of archive, by project, as recorded by project manifests.
+
+        Manifests are accessed through a retainer, which reloads them only
+        if their files have changed. Hence, repeated listings by a
+        long-lived process cost one stat per project rather than a walk of
+        the archive and a parse of each manifest.
+    '''
+
+    base: __.Path
+
+    def __init__(
+        self, base: __.Path, retainer: _retention.Retainer
+    ) -> None:
+        self.base = base
+        self._retainer = retainer
+
+    def access_manifest( self, project: str ) -> _manifests.Manifest:
+        ''' Returns manifest of project directory. '''
+        return self._retainer.access_manifest( self.base / project )
+
+    def locate( self, project: str, path: str ) -> ArchiveRecord | None:
+        ''' Finds record of file in project directory, if any. '''
+        if project not in self.survey_projects( ): return None
+        for record in self.survey( project ):
+            if record.path == path: return record
+        return None
+
+    def survey(
+        self, project: str | None = None
+    ) -> tuple[ ArchiveRecord, ... ]:
+        ''' Returns records of project, else of all projects, by name. '''
+        projects = self.survey_projects( )
+        if project is not None:
+            projects = tuple( name for name in projects if name == project )
+        return tuple(
+            ArchiveRecord(
+                project = name,
+                path = path,
+                content_hash = entry.content_hash,
+                size = entry.size,
+                mtime_ns = entry.mtime_ns )
+            for name in projects
+            for path, entry in self.access_manifest( name ).survey_entries( ) )
+
+    def survey_projects( self ) -> tuple[ str, ... ]:
+        ''' Returns names of project directories, in name order. '''
+        try: entries = tuple( __.os.scandir( self.base ) )
+        except FileNotFoundError: return ( )
+        return tuple( sorted(
+            entry.name for entry in entries
+            if entry.is_dir( ) and not entry.name.startswith( '.' ) ) )
@@ -0,0 +1,452 @@
+# vim: set filetype=python fileencoding=utf-8:
+# -*- coding: utf-8 -*-
+
+#============================================================================#
+#                                                                            #
+#  Licensed under the Apache License, Version 2.0 (the "License");           #
+#  you may not use this file except in compliance with the License.          #
+#  You may obtain a copy of the License at                                   #
+#                                                                            #
+#      http://www.apache.org/licenses/LICENSE-2.0                            #
+#                                                                            #
+#  Unless required by applicable law or agreed to in writing, software       #
+#  distributed under the License is distributed on an "AS IS" BASIS,         #
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.  #
+#  See the License for the specific language governing permissions and       #
+#  limitations under the License.                                            #
+#                                                                            #
+#============================================================================#
+
+
+
+''' Benchmarks of ingestion on synthetic corpora and of startup. '''
+
+
+from json import dumps as _json_dumps
+from json import loads as _json_loads
+from time import perf_counter as _perf_counter
+from time import process_time as _process_time
+
+from . import __
+from . import commands as _commands
+from . import corpora as _corpora
+from . import ingestion as _ingestion
+from . import instruments as _instruments
+from . import scanning as _scanning
+
+
+# Corpus size and trial name
+_RunKey: __.typx.TypeAlias = tuple[ int, str ]
+
+
+RESULTS_FILE_DEFAULT = '.auxiliary/data/benchmarks.jsonl'
+STARTUP_INVOCATIONS_DEFAULT = ( '--help', 'search --help', 'ingest --help' )
+STARTUP_REPETITIONS_DEFAULT = 5
+
+
+class Trials( __.enum.Enum ):
+    ''' Trials of ingestion run against each corpus, in order. '''
+
+    First = 'first'
+    Reingest = 'reingest'
+
+
+class BenchmarkRun( __.immut.DataclassObject ):
+    ''' Measurements of one trial of ingestion against corpus. '''
+
+    corpus: _corpora.CorpusSummary
+    trial: Trials
+    wall_time: float
+    cpu_time: float
+    outcomes: __.immut.Dictionary[ str, int ]
+    metrics: _instruments.IngestMetrics | None = None
+    previous_wall_time: float | None = None
+
+    @property
+    def files_per_second( self ) -> float:
+        ''' Files ingested per second of wall time. '''
+        if not self.wall_time: return 0.0
+        return self.corpus.files / self.wall_time
+
+    def render_as_dictionary( self ) -> dict[ str, __.typx.Any ]:
+        ''' Renders run as dictionary for serialization. '''
+        return {
+            'corpus': self.corpus.render_as_dictionary( ),
+            'trial': self.trial.value,
+            'wall_time': round( self.wall_time, 6 ),
+            'cpu_time': round( self.cpu_time, 6 ),
+            'files_per_second': round( self.files_per_second, 3 ),
+            'outcomes': dict( self.outcomes ),
+            'metrics': (
+                None if self.metrics is None
+                else self.metrics.render_as_dictionary( ) ),
+        }
+
+
+class BenchmarkResult( __.immut.DataclassObject ):
+    ''' Results of benchmark runs, as stored for comparison over time. '''
+
+    runs: __.cabc.Sequence[ BenchmarkRun ]
+    results_file: __.Path | None = None
+
+    def render_as_json( self ) -> str:
+        ''' Renders result as JSON string. '''
+        data: dict[ str, __.typx.Any ] = {
+            'runs': [ run.render_as_dictionary( ) for run in self.runs ],
+            'results_file': (
+                None if self.results_file is None
+                else str( self.results_file ) ),
+        }
+        return _json_dumps( data, indent = 2 )
+
+    def render_as_text( self ) -> str:
+        ''' Renders result as human-readable text. '''
+        lines: list[ str ] = [ ]
+        for run in self.runs:
+            line = (
+                f"{run.corpus.files:>7} files, {run.trial.value:<8} "
+                f"{run.wall_time:9.3f}s wall, {run.cpu_time:9.3f}s CPU, "
+                f"{run.files_per_second:9.1f} files/s" )
+            if run.previous_wall_time:
+                change = run.wall_time / run.previous_wall_time - 1
+                line += (
+                    f" (previous {run.previous_wall_time:.3f}s, "
+                    f"{change:+.0%})" )
+            lines.append( line )
+            if run.metrics is None: continue
+            lines.extend(
+                f"    {name:<8} {phase.wall_time:9.3f}s wall, "
+                f"{phase.cpu_time:9.3f}s CPU, {phase.files:>7} files, "
+                f"{phase.files_per_second:9.1f} files/s"
+                for name, phase in run.metrics.phases.items( ) )
+        if self.results_file is not None:
+            lines.append( f"Results appended to {self.results_file}" )
+        if not lines: lines.append( "No benchmarks run." )
+        return '\n'.join( lines )
+
+
+class StartupRun( __.immut.DataclassObject ):
+    ''' Measurements of repeated invocations of command-line interface. '''
+
+    invocation: str
+    wall_times: __.cabc.Sequence[ float ]
+    previous_median: float | None = None
+
+    @property
+    def median( self ) -> float:
+        ''' Median wall time of invocations. '''
+        from statistics import median
+        return median( self.wall_times ) if self.wall_times else 0.0
+
+    @property
+    def minimum( self ) -> float:
+        ''' Minimum wall time of invocations. '''
+        return min( self.wall_times, default = 0.0 )
+
+    def render_as_dictionary( self ) -> dict[ str, __.typx.Any ]:
+        ''' Renders run as dictionary for serialization. '''
+        return {
+            'invocation': self.invocation,
+            'wall_times': [ round( time, 6 ) for time in self.wall_times ],
+            'median': round( self.median, 6 ),
+            'minimum': round( self.minimum, 6 ),
+        }
+
+
+class StartupResult( __.immut.DataclassObject ):
+    ''' Results of startup benchmark runs. '''
+
+    runs: __.cabc.Sequence[ StartupRun ]
+    results_file: __.Path | None = None
+
+    def render_as_json( self ) -> str:
+        ''' Renders result as JSON string. '''
+        data: dict[ str, __.typx.Any ] = {
+            'runs': [ run.render_as_dictionary( ) for run in self.runs ],
+            'results_file': (
+                None if self.results_file is None
+                else str( self.results_file ) ),
+        }
+        return _json_dumps( data, indent = 2 )
+
+    def render_as_text( self ) -> str:
+        ''' Renders result as human-readable text. '''
+        lines: list[ str ] = [ ]
+        for run in self.runs:
+            line = (
+                f"{run.invocation:<24} {run.median:7.3f}s median, "
+                f"{run.minimum:7.3f}s minimum" )
+            if run.previous_median:
+                change = run.median / run.previous_median - 1
+                line += (
+                    f" (previous {run.previous_median:.3f}s, "
+                    f"{change:+.0%})" )
+            lines.append( line )
+        if self.results_file is not None:
+            lines.append( f"Results appended to {self.results_file}" )
+        if not lines: lines.append( "No benchmarks run." )
+        return '\n'.join( lines )
+
+
+class BenchmarkCommand( __.immut.DataclassObject ):
+    ''' Benchmarks ingestion against synthetic corpora.
+
+        For each corpus size, generates corpus modeled on real scribbles
+        and ingests it into a fresh archive, then ingests it again. Each
+        trial is measured end-to-end and by phase. Results are appended to
+        a file of JSON lines, along with details of the environment, and
+        are compared against the last stored result for same corpus size
+        and trial.
+    '''
+
+    sizes: __.typx.Annotated[
+        __.cabc.Sequence[ int ],
+        __.tyro.conf.arg( prefix_name = False ),
+        __.ddoc.Doc( ''' Numbers of files in corpora. ''' ),
+    ] = ( 1_000, )
+    seed: __.typx.Annotated[
+        int,
+        __.tyro.conf.arg( prefix_name = False ),
+        __.ddoc.Doc( ''' Seed for generation of corpora. ''' ),
+    ] = 0
+    workspace: __.typx.Annotated[
+        __.typx.Optional[ __.Location ],
+        __.tyro.conf.arg( prefix_name = False ),
+        __.ddoc.Doc(
+            ''' Directory for corpora, archives, and caches. If unset, a
+                temporary directory is used and removed afterwards. ''' ),
+    ] = None
+    results_file: __.typx.Annotated[
+        __.typx.Optional[ __.Location ],
+        __.tyro.conf.arg( prefix_name = False ),
+        __.ddoc.Doc(
+            ''' File of JSON lines to which results are appended. If
+                unset, results are not stored. ''' ),
+    ] = RESULTS_FILE_DEFAULT
+    check_secrets: __.typx.Annotated[
+        bool,
+        __.tyro.conf.arg( prefix_name = False ),
+        __.ddoc.Doc( ''' Enable secret detection during ingestion. ''' ),
+    ] = True
+    workers: __.typx.Annotated[
+        int,
+        __.tyro.conf.arg( prefix_name = False ),
+        __.ddoc.Doc( ''' Maximum number of files processed concurrently. ''' ),
+    ] = _ingestion.WORKERS_DEFAULT
+    scan_backend: __.typx.Annotated[
+        _scanning.ScanBackends,
+        __.tyro.conf.arg( prefix_name = False ),
+        __.ddoc.Doc( ''' Execution backend for secret detection. ''' ),
+    ] = _scanning.ScanBackends.Processes
+    scan_workers: __.typx.Annotated[
+        int,
+        __.tyro.conf.arg( prefix_name = False ),
+        __.ddoc.Doc( ''' Number of workers for secret detection. ''' ),
+    ] = _scanning.SCAN_WORKERS_DEFAULT
+
+    async def __call__( self ) -> BenchmarkResult:
+        ''' Executes benchmark command. '''
+        from asyncio import to_thread
+        with __.ctxl.ExitStack( ) as exits:
+            if self.workspace is None:
+                from tempfile import TemporaryDirectory
+                workspace = __.Path( exits.enter_context(
+                    TemporaryDirectory( prefix = 'lmscribbles-bench-' ) ) )
+            else: workspace = __.Path( self.workspace )
+            runs: list[ BenchmarkRun ] = [ ]
+            for size in self.sizes:
+                runs.extend( await self._benchmark_corpus( workspace, size ) )
+        if self.results_file is None: return BenchmarkResult( runs = runs )
+        results_file = __.Path( self.results_file )
+        previous = await to_thread( _load_wall_times, results_file )
+        await to_thread( self._store_runs, results_file, runs )
+        return BenchmarkResult(
+            runs = tuple(
+                __.dcls.replace(
+                    run, previous_wall_time = previous.get(
+                        ( run.corpus.files, run.trial.value ) ) )
+                for run in runs ),
+            results_file = results_file )
+
+    async def _benchmark_corpus(
+        self, workspace: __.Path, size: int
+    ) -> tuple[ BenchmarkRun, ... ]:
+        ''' Generates corpus and measures trials of ingestion against it. '''
+        from asyncio import to_thread
+        from shutil import rmtree
+        directory = workspace / f"corpus-{size}-{self.seed}"
+        for name in ( 'ingests', 'caches' ):
+            await to_thread( rmtree, directory / name, True )
+        corpus = await to_thread(
+            _corpora.generate_corpus, directory / 'scribbles', size,
+            self.seed )
+        command = _commands.IngestCommand(
+            project_name = 'benchmark',
+            source_paths = ( directory / 'scribbles', ),
+            target_base = directory / 'ingests',
+            cache_directory = directory / 'caches',
+            check_secrets = self.check_secrets,
+            workers = self.workers,
+            scan_backend = self.scan_backend,
+            scan_workers = self.scan_workers,
+            timings = True )
+        runs: list[ BenchmarkRun ] = [ ]
+        for trial in Trials:
+            started, cpu_started = _perf_counter( ), _process_time( )
+            result = await command( )
+            runs.append( BenchmarkRun(
+                corpus = corpus,
+                trial = trial,
+                wall_time = _perf_counter( ) - started,
+                cpu_time = _process_time( ) - cpu_started,
+                outcomes = __.immut.Dictionary(
+                    copied = len( result.copied ),
+                    renamed = len( result.renamed ),
+                    skipped = len( result.skipped ),
+                    failed = len( result.failed ),
+                    warnings = len( result.warnings ) ),
+                metrics = result.metrics ) )
+        return tuple( runs )
+
+    def _store_runs(
+        self, results_file: __.Path, runs: __.cabc.Sequence[ BenchmarkRun ]
+    ) -> None:
+        ''' Appends runs, with details of environment, to results file. '''
+        environment: dict[ str, __.typx.Any ] = {
+            **_describe_environment( ),
+            'seed': self.seed,
+            'options': {
+                'check_secrets': self.check_secrets,
+                'workers': self.workers,
+                'scan_backend': self.scan_backend.value,
+                'scan_workers': self.scan_workers,
+            },
+        }
+        _append_records( results_file, environment, runs )
+
+
+class StartupBenchmarkCommand( __.immut.DataclassObject ):
+    ''' Benchmarks startup time of command-line interface.
+
+        Each invocation runs in fresh interpreter, repeatedly, and is
+        measured end-to-end, including imports. Results are appended to a
+        file of JSON lines, along with details of the environment, and are
+        compared against the last stored result for same invocation.
+    '''
+
+    invocations: __.typx.Annotated[
+        __.cabc.Sequence[ str ],
+        __.tyro.conf.arg( prefix_name = False ),
+        __.ddoc.Doc(
+            ''' Arguments to command-line interface, one string per
+                invocation. ''' ),
+    ] = STARTUP_INVOCATIONS_DEFAULT
+    repetitions: __.typx.Annotated[
+        int,
+        __.tyro.conf.arg( prefix_name = False ),
+        __.ddoc.Doc( ''' Number of times to run each invocation. ''' ),
+    ] = STARTUP_REPETITIONS_DEFAULT
+    results_file: __.typx.Annotated[
+        __.typx.Optional[ __.Location ],
+        __.tyro.conf.arg( prefix_name = False ),
+        __.ddoc.Doc(
+            ''' File of JSON lines to which results are appended. If
+                unset, results are not stored. ''' ),
+    ] = RESULTS_FILE_DEFAULT
+
+    async def __call__( self ) -> StartupResult:
+        ''' Executes startup benchmark command. '''
+        from asyncio import to_thread
+        runs: list[ StartupRun ] = [ ]
+        for invocation in self.invocations:
+            wall_times = await to_thread(
+                _measure_invocation, invocation, max( 1, self.repetitions ) )
+            runs.append( StartupRun(
+                invocation = invocation, wall_times = wall_times ) )
+        if self.results_file is None: return StartupResult( runs = runs )
+        results_file = __.Path( self.results_file )
+        previous = await to_thread( _load_startup_medians, results_file )
+        environment: dict[ str, __.typx.Any ] = {
+            **_describe_environment( ),
+            'repetitions': self.repetitions }
+        await to_thread( _append_records, results_file, environment, runs )
+        return StartupResult(
+            runs = tuple(
+                __.dcls.replace(
+                    run, previous_median = previous.get( run.invocation ) )
+                for run in runs ),
+            results_file = results_file )
+
+
+def _append_records(
+    results_file: __.Path,
+    environment: __.cabc.Mapping[ str, __.typx.Any ],
+    runs: __.cabc.Sequence[ BenchmarkRun | StartupRun ],
+) -> None:
+    ''' Appends runs, with details of environment, to results file. '''
+    results_file.parent.mkdir( parents = True, exist_ok = True )
+    with results_file.open( 'a' ) as file:
+        file.writelines(
+            _json_dumps( { **environment, **run.render_as_dictionary( ) } )
+            + '\n' for run in runs )
+
+
+def _describe_environment( ) -> dict[ str, __.typx.Any ]:
+    ''' Describes environment in which benchmarks are run. '''
+    from datetime import datetime, timezone
+    from platform import platform, python_version
+    from . import __version__
+    return {
+        'recorded_at': datetime.now( timezone.utc ).isoformat( ),
+        'version': __version__,
+        'python': python_version( ),
+        'platform': platform( ),
+        'cpu_count': __.os.cpu_count( ),
+    }
+
+
+def _load_startup_medians( results_file: __.Path ) -> dict[ str, float ]:
+    ''' Loads latest median wall times of stored runs by invocation.
+
+        Malformed lines and records of other benchmarks are ignored.
+    '''
+    medians: dict[ str, float ] = { }
+    try: text = results_file.read_text( )
+    except FileNotFoundError: return medians
+    for line in text.splitlines( ):
+        try: record = _json_loads( line )
+        except ValueError: continue
+        try: medians[ record[ 'invocation' ] ] = float( record[ 'median' ] )
+        except ( KeyError, TypeError, ValueError ): continue
+    return medians
+
+
+def _measure_invocation( invocation: str, repetitions: int ) -> list[ float ]:
+    ''' Measures wall times of invocation in fresh interpreters. '''
+    from shlex import split
+    from subprocess import DEVNULL, run
+    command = ( __.sys.executable, '-m', 'lmscribbles', *split( invocation ) )
+    times: list[ float ] = [ ]
+    for _ in range( repetitions ):
+        started = _perf_counter( )
+        run( command, stdout = DEVNULL, stderr = DEVNULL, check = False )  # noqa: S603
+        times.append( _perf_counter( ) - started )
+    return times
+
+
+def _load_wall_times( results_file: __.Path ) -> dict[ _RunKey, float ]:
+    ''' Loads latest wall times of stored runs by corpus size and trial.
+
+        Malformed lines are ignored.
+    '''
+    times: dict[ _RunKey, float ] = { }
+    try: text = results_file.read_text( )
+    except FileNotFoundError: return times
+    for line in text.splitlines( ):
+        try: record = _json_loads( line )
+        except ValueError: continue
+        try:
+            key = ( int( record[ 'corpus' ][ 'files' ] ), record[ 'trial' ] )
+            times[ key ] = float( record[ 'wall_time' ] )
+        except ( KeyError, TypeError, ValueError ): continue
+    return times
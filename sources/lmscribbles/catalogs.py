@@ -0,0 +1,846 @@
+# vim: set filetype=python fileencoding=utf-8:
+# -*- coding: utf-8 -*-
+
+#============================================================================#
+#                                                                            #
+#  Licensed under the Apache License, Version 2.0 (the "License");           #
+#  you may not use this file except in compliance with the License.          #
+#  You may obtain a copy of the License at                                   #
+#                                                                            #
+#      http://www.apache.org/licenses/LICENSE-2.0                            #
+#                                                                            #
+#  Unless required by applicable law or agreed to in writing, software       #
+#  distributed under the License is distributed on an "AS IS" BASIS,         #
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.  #
+#  See the License for the specific language governing permissions and       #
+#  limitations under the License.                                            #
+#                                                                            #
+#============================================================================#
+
+
+''' Catalog of archived scribbles, with their labels and statuses. '''
+
+
+import sqlite3 as _sqlite3
+
+from asyncio import gather as _gather
+from asyncio import get_running_loop as _get_running_loop
+from concurrent.futures import Executor as _Executor
+from datetime import datetime as _datetime
+from datetime import timezone as _timezone
+from threading import Lock as _Lock
+
+from . import __
+from . import labelqueries as _labelqueries
+from . import locations as _locations
+from . import trigrams as _trigrams
+
+
+SNIPPET_MARKERS = ( '«', '»' )
+SNIPPET_TOKENS = 16
+TEXT_SIZE_MAXIMUM = 1 << 20
+TEXTS_BATCH_SIZE = 64
+
+# Version of schema; indexes of contents are dropped and rebuilt on change
+_SCHEMA_VERSION = 2
+_SQLITE_VARIABLES_MAXIMUM = 500
+
+_INDEXES = (
+    ( 'scribbles_project', 'scribbles ( project, path )' ),
+    ( 'scribbles_hash', 'scribbles ( content_hash )' ),
+    ( 'scribbles_status', 'scribbles ( status )' ),
+    ( 'scribbles_ingested', 'scribbles ( ingested_at )' ),
+    ( 'labels_label', 'labels ( label, id )' ),
+)
+_COLUMNS = (
+    'id', 'project', 'path', 'original_path', 'archived_path',
+    'content_hash', 'ingested_at', 'size_bytes', 'status', 'notes',
+    'refinement_id' )
+_COLUMNS_QUALIFIED = ', '.join( f"scribbles.{column}" for column in _COLUMNS )
+
+
+class ScribbleStatuses( __.enum.Enum ):
+    ''' Stages of curation of scribble. '''
+
+    Raw = 'raw'
+    Classified = 'classified'
+    Refined = 'refined'
+
+
+class ScribbleMetadata( __.immut.DataclassObject ):
+    ''' Catalog record of archived scribble.
+
+        Identifier is project name and path, relative to project
+        directory, joined by slash.
+    '''
+
+    id: str
+    project: str
+    path: str
+    original_path: str
+    archived_path: str
+    content_hash: str
+    ingested_at: _datetime
+    size_bytes: int
+    labels: __.cabc.Set[ str ] = frozenset( )
+    status: ScribbleStatuses = ScribbleStatuses.Raw
+    notes: str = ''
+    refinement_id: str | None = None
+
+    def render_as_dictionary( self ) -> dict[ str, __.typx.Any ]:
+        ''' Renders record as dictionary for serialization. '''
+        return {
+            'id': self.id,
+            'project': self.project,
+            'path': self.path,
+            'original_path': self.original_path,
+            'archived_path': self.archived_path,
+            'content_hash': self.content_hash,
+            'ingested_at': _format_time( self.ingested_at ),
+            'size_bytes': self.size_bytes,
+            'labels': sorted( self.labels ),
+            'status': self.status.value,
+            'notes': self.notes,
+            'refinement_id': self.refinement_id,
+        }
+
+
+class CatalogQuery( __.immut.DataclassObject ):
+    ''' Criteria for selection of catalog records.
+
+        Records must satisfy all criteria which are supplied. Records are
+        ordered by recency of ingestion, then by identifier. Text is a
+        full-text query over contents of records, as produced by
+        :py:func:`produce_text_query`. Label expression is a boolean
+        query over labels, as parsed by
+        :py:func:`labelqueries.parse_label_query`.
+    '''
+
+    project: str | None = None
+    content_hash: str | None = None
+    status: ScribbleStatuses | None = None
+    labels: __.cabc.Sequence[ str ] = ( )
+    label_expression: _labelqueries.LabelExpression | None = None
+    path_pattern: str | None = None
+    ingested_since: _datetime | None = None
+    text: str | None = None
+    limit: int | None = None
+    offset: int = 0
+
+
+class CatalogStamp( __.immut.DataclassObject ):
+    ''' Size, modification time, and content hash of archived file, as
+        recorded by last rebuild of catalog.
+    '''
+
+    size: int
+    mtime_ns: int
+    content_hash: str
+
+
+class CatalogText( __.immut.DataclassObject ):
+    ''' Text of archived file for full-text index, with its trigrams.
+
+        Text is empty for files which are large, binary, or unreadable.
+        Trigrams are of whole text, even for large files.
+    '''
+
+    body: str = ''
+    trigrams: frozenset[ str ] = frozenset( )
+
+
+class TextMatch( __.immut.DataclassObject ):
+    ''' Record whose contents match full-text query, with relevance. '''
+
+    record: ScribbleMetadata
+    rank: float
+    snippet: str
+
+
+class Catalog( __.immut.Object ):
+    ''' Persistent catalog of archived scribbles, in SQLite.
+
+        Runs in WAL mode, so that readers do not block the writer, with
+        indexes on project, content hash, status, and time of ingestion.
+        Labels are kept in a table of their own, indexed by label, so that
+        records with a label are one indexed lookup. Records from a run of
+        ingestion are upserted in a single transaction. Contents are in a
+        full-text index, by content hash, so that identical files are
+        indexed once. Safe for use from multiple threads.
+    '''
+
+    file_path: __.Path
+
+    def __init__( self, file_path: __.Path ) -> None:
+        self.file_path = file_path
+        self._connection = _connect_catalog( file_path )
+        self._lock = _Lock( )
+
+    def __enter__( self ) -> __.typx.Self:
+        return self
+
+    def __exit__( self, *exc_info: __.typx.Any ) -> None:
+        with self._lock: self._connection.close( )
+
+    def classify(
+        self,
+        identifiers: __.cabc.Collection[ str ],
+        *,
+        labels_added: __.cabc.Collection[ str ] = ( ),
+        labels_removed: __.cabc.Collection[ str ] = ( ),
+        status: ScribbleStatuses | None = None,
+        notes: str | None = None,
+    ) -> int:
+        ''' Applies labels, status, and notes to records, in one transaction.
+
+            Returns number of records which exist among identifiers.
+        '''
+        identifiers_ = tuple( identifiers )
+        with self._lock, self._connection as connection:
+            present = _select_present( connection, identifiers_ )
+            connection.executemany(
+                "INSERT OR IGNORE INTO labels ( id, label ) VALUES ( ?, ? )",
+                ( ( identifier, label )
+                  for identifier in present for label in labels_added ) )
+            connection.executemany(
+                "DELETE FROM labels WHERE id = ? AND label = ?",
+                ( ( identifier, label )
+                  for identifier in present for label in labels_removed ) )
+            if status is not None:
+                connection.executemany(
+                    "UPDATE scribbles SET status = ? WHERE id = ?",
+                    ( ( status.value, identifier )
+                      for identifier in present ) )
+            if notes is not None:
+                connection.executemany(
+                    "UPDATE scribbles SET notes = ? WHERE id = ?",
+                    ( ( notes, identifier ) for identifier in present ) )
+        return len( present )
+
+    def count( self, query: CatalogQuery | None = None ) -> int:
+        ''' Counts records which satisfy query, regardless of paging. '''
+        query = query or CatalogQuery( )
+        clauses, parameters = _produce_conditions( query )
+        with self._lock, self._connection as connection:
+            _select_labelled( connection, query )
+            total, = connection.execute(
+                f"SELECT COUNT( * ) FROM scribbles {clauses}",  # noqa: S608
+                parameters ).fetchone( )
+        return total
+
+    def index_texts(
+        self, texts: __.cabc.Mapping[ str, CatalogText ]
+    ) -> None:
+        ''' Adds texts to full-text index, and their trigrams to trigram
+            index, by content hash, in one transaction. Texts which are
+            already indexed are ignored.
+        '''
+        with self._lock, self._connection as connection:
+            for content_hash, text in texts.items( ):
+                cursor = connection.execute(
+                    "INSERT OR IGNORE INTO documents ( content_hash ) "
+                    "VALUES ( ? )", ( content_hash, ) )
+                if not cursor.rowcount: continue
+                document = cursor.lastrowid
+                connection.execute(
+                    "INSERT INTO texts ( rowid, body ) VALUES ( ?, ? )",
+                    ( document, text.body ) )
+                connection.executemany(
+                    "INSERT INTO trigrams ( trigram, document ) "
+                    "VALUES ( ?, ? )",
+                    ( ( trigram, document ) for trigram in text.trigrams ) )
+
+    def query(
+        self, query: CatalogQuery | None = None
+    ) -> tuple[ ScribbleMetadata, ... ]:
+        ''' Selects records which satisfy query, with their labels. '''
+        query = query or CatalogQuery( )
+        clauses, parameters = _produce_conditions( query )
+        paging, parameters_ = _produce_paging( query )
+        with self._lock, self._connection as connection:
+            _select_labelled( connection, query )
+            rows = connection.execute(
+                f"SELECT {_COLUMNS_QUALIFIED} FROM scribbles "  # noqa: S608
+                f"{clauses} ORDER BY ingested_at DESC, id {paging}",
+                ( *parameters, *parameters_ ) ).fetchall( )
+            labels = _select_labels(
+                connection, [ row[ 0 ] for row in rows ] )
+        return tuple(
+            _produce_record( row, labels.get( row[ 0 ], frozenset( ) ) )
+            for row in rows )
+
+    def replace(
+        self,
+        records: __.cabc.Sequence[ ScribbleMetadata ],
+        stamps: __.cabc.Mapping[ str, CatalogStamp ],
+    ) -> None:
+        ''' Replaces all records and stamps, in one transaction.
+
+            Indexes are dropped before the bulk load and created after it,
+            which is faster than maintaining them row by row. Original
+            paths, labels, notes, and statuses of existing records are
+            carried over, as per :py:meth:`upsert`, since they cannot be
+            reconstructed from archive.
+        '''
+        with self._lock, self._connection as connection:
+            connection.execute(
+                "CREATE TEMP TABLE origins AS "
+                "SELECT id, original_path, status, notes FROM scribbles" )
+            connection.execute(
+                "CREATE TEMP TABLE origins_labels AS "
+                "SELECT id, label FROM labels" )
+            _drop_indexes( connection )
+            connection.execute( "DELETE FROM labels" )
+            connection.execute( "DELETE FROM stamps" )
+            connection.execute( "DELETE FROM scribbles" )
+            connection.executemany(
+                f"INSERT INTO scribbles ( {', '.join( _COLUMNS )} ) "  # noqa: S608
+                f"VALUES ( {', '.join( '?' * len( _COLUMNS ) )} )",
+                ( _produce_row( record ) for record in records ) )
+            _insert_labels( connection, records )
+            _insert_stamps( connection, stamps )
+            _restore_origins( connection )
+            connection.execute( "DROP TABLE origins" )
+            connection.execute( "DROP TABLE origins_labels" )
+            _create_indexes( connection )
+            _prune_texts( connection )
+
+    def search( self, query: CatalogQuery ) -> tuple[ TextMatch, ... ]:
+        ''' Selects records whose contents match text of query.
+
+            Records are ordered by BM25 relevance, most relevant first,
+            and carry snippets of their contents, with matches marked.
+        '''
+        if query.text is None: return ( )
+        clauses, parameters = _produce_conditions( query, texts = False )
+        paging, parameters_ = _produce_paging( query )
+        opener, closer = SNIPPET_MARKERS
+        with self._lock, self._connection as connection:
+            _select_labelled( connection, query )
+            rows = connection.execute(
+                f"SELECT {_COLUMNS_QUALIFIED}, bm25( texts ), "  # noqa: S608
+                "snippet( texts, 0, ?, ?, '…', ? ) "
+                "FROM texts JOIN documents "
+                "ON document = texts.rowid AND texts MATCH ? "
+                "JOIN scribbles "
+                "ON scribbles.content_hash = documents.content_hash "
+                f"{clauses} "
+                f"ORDER BY bm25( texts ), scribbles.id {paging}",
+                ( opener, closer, SNIPPET_TOKENS, query.text,
+                  *parameters, *parameters_ ) ).fetchall( )
+            labels = _select_labels(
+                connection, [ row[ 0 ] for row in rows ] )
+        return tuple(
+            TextMatch(
+                record = _produce_record(
+                    row, labels.get( row[ 0 ], frozenset( ) ) ),
+                rank = row[ -2 ],
+                snippet = row[ -1 ] )
+            for row in rows )
+
+    def select_candidates(
+        self, query: CatalogQuery, trigram_query: _trigrams.TrigramQuery
+    ) -> tuple[ ScribbleMetadata, ... ]:
+        ''' Selects records which satisfy query and whose contents might
+            satisfy trigram query, in order of identifier.
+
+            Posting lists of trigrams of query are intersected and united
+            as query directs. Paging of query is ignored, since candidates
+            must be confirmed by reading their contents.
+        '''
+        clauses, parameters = _produce_conditions( query )
+        with self._lock, self._connection as connection:
+            _select_labelled( connection, query )
+            postings = {
+                trigram: frozenset(
+                    document for document, in connection.execute(
+                        "SELECT document FROM trigrams WHERE trigram = ?",
+                        ( trigram, ) ) )
+                for trigram in trigram_query.survey_trigrams( ) }
+            documents = trigram_query.evaluate( postings )
+            join = ''
+            if documents is not None:
+                connection.execute(
+                    "CREATE TEMP TABLE IF NOT EXISTS candidates ( "
+                    "document INTEGER PRIMARY KEY )" )
+                connection.execute( "DELETE FROM candidates" )
+                connection.executemany(
+                    "INSERT INTO candidates ( document ) VALUES ( ? )",
+                    ( ( document, ) for document in documents ) )
+                join = (
+                    "JOIN documents "
+                    "ON documents.content_hash = scribbles.content_hash "
+                    "JOIN candidates USING ( document )" )
+            rows = connection.execute(
+                f"SELECT {_COLUMNS_QUALIFIED} FROM scribbles "  # noqa: S608
+                f"{join} {clauses} ORDER BY scribbles.id",
+                parameters ).fetchall( )
+            labels = _select_labels(
+                connection, [ row[ 0 ] for row in rows ] )
+        return tuple(
+            _produce_record( row, labels.get( row[ 0 ], frozenset( ) ) )
+            for row in rows )
+
+    def survey_stamps( self ) -> dict[ str, CatalogStamp ]:
+        ''' Returns stamps of archived files, by record identifier. '''
+        with self._lock:
+            rows = self._connection.execute(
+                "SELECT id, size, mtime_ns, content_hash FROM stamps"
+            ).fetchall( )
+        return {
+            identifier: CatalogStamp(
+                size = size, mtime_ns = mtime_ns, content_hash = hash_ )
+            for identifier, size, mtime_ns, hash_ in rows }
+
+    def survey_unindexed( self ) -> dict[ str, __.Path ]:
+        ''' Returns location of one archived file for each content hash
+            which is not yet in full-text index.
+        '''
+        with self._lock:
+            rows = self._connection.execute(
+                "SELECT content_hash, MIN( archived_path ) FROM scribbles "
+                "WHERE content_hash NOT IN "
+                "( SELECT content_hash FROM documents ) "
+                "GROUP BY content_hash" ).fetchall( )
+        return { content_hash: __.Path( path ) for content_hash, path in rows }
+
+    def update(
+        self,
+        records: __.cabc.Sequence[ ScribbleMetadata ],
+        stamps: __.cabc.Mapping[ str, CatalogStamp ],
+        discards: __.cabc.Collection[ str ] = ( ),
+    ) -> None:
+        ''' Upserts records and stamps, and discards records, in one
+            transaction.
+
+            Upserts as :py:meth:`upsert` does.
+        '''
+        with self._lock, self._connection as connection:
+            connection.executemany(
+                "DELETE FROM scribbles WHERE id = ?",
+                ( ( identifier, ) for identifier in discards ) )
+            connection.executemany(
+                "DELETE FROM stamps WHERE id = ?",
+                ( ( identifier, ) for identifier in discards ) )
+            _upsert_records( connection, records )
+            _insert_stamps( connection, stamps )
+            if discards: _prune_texts( connection )
+
+    def upsert( self, records: __.cabc.Sequence[ ScribbleMetadata ] ) -> None:
+        ''' Inserts or updates records, in one transaction.
+
+            Existing records keep their labels, notes, and status, unless
+            their status is raw; labels of records are added to existing
+            labels. Locations, content hashes, sizes, and times of
+            ingestion are updated. Existing original paths are kept, if
+            records lack them.
+        '''
+        if not records: return
+        with self._lock, self._connection as connection:
+            _upsert_records( connection, records )
+
+
+async def index_pending_texts(
+    catalog: Catalog, executor: _Executor | None = None
+) -> int:
+    ''' Reads contents which are not yet indexed into full-text index.
+
+        Contents are read in parallel, on executor if one is supplied, and
+        are indexed in batches of TEXTS_BATCH_SIZE, which bounds texts held
+        in memory. Returns number of contents indexed.
+    '''
+    loop = _get_running_loop( )
+    pending = tuple( ( await loop.run_in_executor(
+        executor, catalog.survey_unindexed ) ).items( ) )
+    for i in range( 0, len( pending ), TEXTS_BATCH_SIZE ):
+        batch = pending[ i : i + TEXTS_BATCH_SIZE ]
+        texts = await _gather( *(
+            loop.run_in_executor( executor, read_catalog_text, location )
+            for _, location in batch ) )
+        await loop.run_in_executor(
+            executor, catalog.index_texts,
+            dict( zip( ( hash_ for hash_, _ in batch ), texts ) ) )
+    return len( pending )
+
+
+def produce_catalog_location(
+    cache_directory: __.Path, target_base: __.Path
+) -> __.Path:
+    ''' Produces location of catalog for archive, within cache directory. '''
+    return _locations.produce_archive_location(
+        cache_directory / 'catalogs', target_base, '.sqlite3' )
+
+
+def produce_identifier( project: str, path: str ) -> str:
+    ''' Produces identifier of record from project and relative path. '''
+    return f"{project}/{path}"
+
+
+def produce_text_query( text: str ) -> str:
+    ''' Produces full-text query from words and quoted phrases.
+
+        Every word or phrase must match. Words are matched as tokens,
+        after stemming; words which end with asterisk match as prefixes.
+        Other punctuation is not syntax, so that text needs no escapes.
+    '''
+    from shlex import split
+    try: terms = split( text )
+    except ValueError: terms = text.split( )
+    expressions: list[ str ] = [ ]
+    for term in terms:
+        prefix = term.endswith( '*' )
+        term_ = term.rstrip( '*' ).replace( '"', '""' )
+        if not term_.strip( ): continue
+        expressions.append( f'"{term_}"*' if prefix else f'"{term_}"' )
+    return ' '.join( expressions ) or '""'
+
+
+def read_catalog_text( file_path: __.Path ) -> CatalogText:
+    ''' Reads text of file for full-text index, with its trigrams.
+
+        Trigrams of files which are too large for full-text index are
+        extracted from whole text, in chunks, so that regular expressions
+        can still select them. Binary or unreadable files have neither.
+    '''
+    try:
+        with file_path.open( 'rb' ) as file:
+            content = file.read( TEXT_SIZE_MAXIMUM + 1 )
+            if b'\0' in content[ : 8192 ]: return CatalogText( )
+            if len( content ) <= TEXT_SIZE_MAXIMUM:
+                body = content.decode( 'utf-8', errors = 'replace' )
+                return CatalogText(
+                    body = body,
+                    trigrams = _trigrams.extract_trigrams( body ) )
+            trigrams = _extract_streamed_trigrams( file, content )
+    except OSError: return CatalogText( )
+    return CatalogText( trigrams = trigrams )
+
+
+def read_text(
+    file_path: __.Path, size_maximum: int | None = TEXT_SIZE_MAXIMUM
+) -> str:
+    ''' Reads text of file, as for full-text index.
+
+        Files which are larger than maximum size, if there is one, binary,
+        or unreadable have empty text.
+    '''
+    size = -1 if size_maximum is None else size_maximum + 1
+    try:
+        with file_path.open( 'rb' ) as file: content = file.read( size )
+    except OSError: return ''
+    if b'\0' in content[ : 8192 ] or (
+        size_maximum is not None and len( content ) > size_maximum
+    ): return ''
+    return content.decode( 'utf-8', errors = 'replace' )
+
+
+def _connect_catalog( file_path: __.Path ) -> _sqlite3.Connection:
+    ''' Connects to catalog database, creating it if necessary. '''
+    file_path.parent.mkdir( parents = True, exist_ok = True )
+    connection = _sqlite3.connect( file_path, check_same_thread = False )
+    with connection:
+        connection.execute( "PRAGMA journal_mode = WAL" )
+        connection.execute( "PRAGMA synchronous = NORMAL" )
+        connection.execute( "PRAGMA foreign_keys = ON" )
+        version, = connection.execute( "PRAGMA user_version" ).fetchone( )
+        if version < _SCHEMA_VERSION:
+            for table in ( 'trigrams', 'texts', 'documents' ):
+                connection.execute( f"DROP TABLE IF EXISTS {table}" )
+        connection.execute(
+            "CREATE TABLE IF NOT EXISTS scribbles ( "
+            "id TEXT PRIMARY KEY, "
+            "project TEXT NOT NULL, "
+            "path TEXT NOT NULL, "
+            "original_path TEXT NOT NULL, "
+            "archived_path TEXT NOT NULL, "
+            "content_hash TEXT NOT NULL, "
+            "ingested_at TEXT NOT NULL, "
+            "size_bytes INTEGER NOT NULL, "
+            "status TEXT NOT NULL, "
+            "notes TEXT NOT NULL DEFAULT '', "
+            "refinement_id TEXT )" )
+        connection.execute(
+            "CREATE TABLE IF NOT EXISTS labels ( "
+            "id TEXT NOT NULL REFERENCES scribbles ON DELETE CASCADE, "
+            "label TEXT NOT NULL, "
+            "PRIMARY KEY ( id, label ) ) WITHOUT ROWID" )
+        connection.execute(
+            "CREATE TABLE IF NOT EXISTS stamps ( "
+            "id TEXT PRIMARY KEY, "
+            "size INTEGER NOT NULL, "
+            "mtime_ns INTEGER NOT NULL, "
+            "content_hash TEXT NOT NULL ) WITHOUT ROWID" )
+        connection.execute(
+            "CREATE TABLE IF NOT EXISTS documents ( "
+            "document INTEGER PRIMARY KEY, "
+            "content_hash TEXT NOT NULL UNIQUE )" )
+        connection.execute(
+            "CREATE VIRTUAL TABLE IF NOT EXISTS texts USING fts5 ( "
+            "body, tokenize = 'porter unicode61 remove_diacritics 2' )" )
+        connection.execute(
+            "CREATE TABLE IF NOT EXISTS trigrams ( "
+            "trigram TEXT NOT NULL, "
+            "document INTEGER NOT NULL, "
+            "PRIMARY KEY ( trigram, document ) ) WITHOUT ROWID" )
+        _create_indexes( connection )
+        connection.execute( f"PRAGMA user_version = {_SCHEMA_VERSION}" )
+    return connection
+
+
+def _create_indexes( connection: _sqlite3.Connection ) -> None:
+    for name, columns in _INDEXES:
+        connection.execute(
+            f"CREATE INDEX IF NOT EXISTS {name} ON {columns}" )
+
+
+def _drop_indexes( connection: _sqlite3.Connection ) -> None:
+    for name, _ in _INDEXES:
+        connection.execute( f"DROP INDEX IF EXISTS {name}" )
+
+
+def _extract_streamed_trigrams(
+    file: __.typx.BinaryIO, content: bytes
+) -> frozenset[ str ]:
+    ''' Extracts trigrams of content and of rest of file, by chunk.
+
+        Ends of chunks are carried into next chunks, so that trigrams
+        across their boundaries are extracted.
+    '''
+    from codecs import getincrementaldecoder
+    decoder = getincrementaldecoder( 'utf-8' )( errors = 'replace' )
+    trigrams: set[ str ] = set( )
+    carry = ''
+    while content:
+        text = carry + decoder.decode( content )
+        trigrams.update( _trigrams.extract_trigrams( text ) )
+        carry = text[ -2 : ]
+        content = file.read( TEXT_SIZE_MAXIMUM )
+    text = carry + decoder.decode( b'', final = True )
+    trigrams.update( _trigrams.extract_trigrams( text ) )
+    return frozenset( trigrams )
+
+
+def _format_time( time: _datetime ) -> str:
+    ''' Formats time in UTC, with fixed precision, for lexical ordering. '''
+    return time.astimezone( _timezone.utc ).isoformat(
+        timespec = 'microseconds' )
+
+
+def _insert_labels(
+    connection: _sqlite3.Connection,
+    records: __.cabc.Iterable[ ScribbleMetadata ],
+) -> None:
+    connection.executemany(
+        "INSERT OR IGNORE INTO labels ( id, label ) VALUES ( ?, ? )",
+        ( ( record.id, label )
+          for record in records for label in record.labels ) )
+
+
+def _insert_stamps(
+    connection: _sqlite3.Connection,
+    stamps: __.cabc.Mapping[ str, CatalogStamp ],
+) -> None:
+    connection.executemany(
+        "INSERT OR REPLACE INTO stamps ( id, size, mtime_ns, content_hash ) "
+        "VALUES ( ?, ?, ?, ? )",
+        ( ( identifier, stamp.size, stamp.mtime_ns, stamp.content_hash )
+          for identifier, stamp in stamps.items( ) ) )
+
+
+def _produce_conditions(
+    query: CatalogQuery, texts: bool = True
+) -> tuple[ str, tuple[ __.typx.Any, ... ] ]:
+    ''' Produces WHERE clause and its parameters for query.
+
+        Condition on text is omitted, unless texts is true.
+    '''
+    conditions: list[ str ] = [ ]
+    parameters: list[ __.typx.Any ] = [ ]
+    for column, value in (
+        ( 'project', query.project ),
+        ( 'content_hash', query.content_hash ),
+        ( 'status', query.status and query.status.value ),
+    ):
+        if value is None: continue
+        conditions.append( f"scribbles.{column} = ?" )
+        parameters.append( value )
+    if query.path_pattern is not None:
+        conditions.append( "scribbles.path GLOB ?" )
+        parameters.append( query.path_pattern )
+    if query.ingested_since is not None:
+        conditions.append( "scribbles.ingested_at >= ?" )
+        parameters.append( _format_time( query.ingested_since ) )
+    for label in query.labels:
+        conditions.append(
+            "scribbles.id IN ( SELECT id FROM labels WHERE label = ? )" )
+        parameters.append( label )
+    if query.label_expression is not None:
+        conditions.append( "scribbles.id IN ( SELECT id FROM labelled )" )
+    if texts and query.text is not None:
+        conditions.append(
+            "scribbles.content_hash IN ( SELECT content_hash FROM documents "
+            "WHERE document IN ( SELECT rowid FROM texts "
+            "WHERE texts MATCH ? ) )" )
+        parameters.append( query.text )
+    if not conditions: return '', ( )
+    return f"WHERE {' AND '.join( conditions )}", tuple( parameters )
+
+
+def _produce_paging(
+    query: CatalogQuery
+) -> tuple[ str, tuple[ int, ... ] ]:
+    ''' Produces LIMIT and OFFSET clauses and parameters for query. '''
+    if query.limit is not None:
+        return "LIMIT ? OFFSET ?", ( query.limit, query.offset )
+    if query.offset: return "LIMIT -1 OFFSET ?", ( query.offset, )
+    return '', ( )
+
+
+def _produce_record(
+    row: tuple[ __.typx.Any, ... ], labels: __.cabc.Set[ str ]
+) -> ScribbleMetadata:
+    return ScribbleMetadata(
+        id = row[ 0 ],
+        project = row[ 1 ],
+        path = row[ 2 ],
+        original_path = row[ 3 ],
+        archived_path = row[ 4 ],
+        content_hash = row[ 5 ],
+        ingested_at = _datetime.fromisoformat( row[ 6 ] ),
+        size_bytes = row[ 7 ],
+        labels = labels,
+        status = ScribbleStatuses( row[ 8 ] ),
+        notes = row[ 9 ],
+        refinement_id = row[ 10 ] )
+
+
+def _produce_row( record: ScribbleMetadata ) -> tuple[ __.typx.Any, ... ]:
+    return (
+        record.id, record.project, record.path, record.original_path,
+        record.archived_path, record.content_hash,
+        _format_time( record.ingested_at ), record.size_bytes,
+        record.status.value, record.notes, record.refinement_id )
+
+
+def _upsert_records(
+    connection: _sqlite3.Connection,
+    records: __.cabc.Sequence[ ScribbleMetadata ],
+) -> None:
+    connection.executemany(
+        f"INSERT INTO scribbles ( {', '.join( _COLUMNS )} ) "  # noqa: S608
+        f"VALUES ( {', '.join( '?' * len( _COLUMNS ) )} ) "
+        "ON CONFLICT ( id ) DO UPDATE SET "
+        "original_path = COALESCE( "
+        "NULLIF( excluded.original_path, '' ), original_path ), "
+        "archived_path = excluded.archived_path, "
+        "content_hash = excluded.content_hash, "
+        "ingested_at = excluded.ingested_at, "
+        "size_bytes = excluded.size_bytes, "
+        f"status = CASE WHEN status = '{ScribbleStatuses.Raw.value}' "
+        "THEN excluded.status ELSE status END",
+        ( _produce_row( record ) for record in records ) )
+    _insert_labels( connection, records )
+
+
+def _prune_texts( connection: _sqlite3.Connection ) -> None:
+    ''' Removes texts whose content hashes no record has. '''
+    orphans = (
+        "SELECT document FROM documents WHERE content_hash NOT IN "
+        "( SELECT content_hash FROM scribbles )" )
+    connection.execute(
+        f"DELETE FROM texts WHERE rowid IN ( {orphans} )" )  # noqa: S608
+    connection.execute(
+        f"DELETE FROM trigrams WHERE document IN ( {orphans} )" )  # noqa: S608
+    connection.execute(
+        f"DELETE FROM documents WHERE document IN ( {orphans} )" )  # noqa: S608
+
+
+def _restore_origins( connection: _sqlite3.Connection ) -> None:
+    ''' Carries over what replaced records had, from origins tables. '''
+    match = "FROM origins WHERE origins.id = scribbles.id"
+    connection.execute(
+        f"UPDATE scribbles SET original_path = ( "  # noqa: S608
+        f"SELECT original_path {match} ) "
+        "WHERE original_path = '' AND id IN ( "
+        "SELECT id FROM origins WHERE original_path != '' )" )
+    connection.execute(
+        f"UPDATE scribbles SET notes = ( SELECT notes {match} ) "  # noqa: S608
+        "WHERE notes = '' AND id IN ( "
+        "SELECT id FROM origins WHERE notes != '' )" )
+    connection.execute(
+        f"UPDATE scribbles SET status = ( SELECT status {match} ) "  # noqa: S608
+        "WHERE id IN ( SELECT id FROM origins "
+        f"WHERE status != '{ScribbleStatuses.Raw.value}' )" )
+    connection.execute(
+        "INSERT OR IGNORE INTO labels ( id, label ) "
+        "SELECT id, label FROM origins_labels "
+        "WHERE id IN ( SELECT id FROM scribbles )" )
+
+
+def _select_labels(
+    connection: _sqlite3.Connection, identifiers: __.cabc.Sequence[ str ]
+) -> dict[ str, frozenset[ str ] ]:
+    ''' Selects labels of records, by identifier. '''
+    labels: dict[ str, set[ str ] ] = { }
+    for i in range( 0, len( identifiers ), _SQLITE_VARIABLES_MAXIMUM ):
+        chunk = identifiers[ i : i + _SQLITE_VARIABLES_MAXIMUM ]
+        marks = ', '.join( '?' * len( chunk ) )
+        for identifier, label in connection.execute(
+            f"SELECT id, label FROM labels WHERE id IN ( {marks} )",  # noqa: S608
+            chunk
+        ): labels.setdefault( identifier, set( ) ).add( label )
+    return {
+        identifier: frozenset( labels_ )
+        for identifier, labels_ in labels.items( ) }
+
+
+def _select_labelled(
+    connection: _sqlite3.Connection, query: CatalogQuery
+) -> None:
+    ''' Selects identifiers which satisfy label expression of query into
+        temporary table, for conditions of query to reference.
+
+        Expression is evaluated over posting sets of its labels. Patterns
+        with wildcards select postings of all labels which match them.
+    '''
+    expression = query.label_expression
+    if expression is None: return
+
+    def resolve( term: _labelqueries.LabelTerm ) -> frozenset[ str ]:
+        if term.wildcard:
+            pattern = term.pattern.replace( '[', '[[]' )
+            cursor = connection.execute(
+                "SELECT DISTINCT id FROM labels WHERE label GLOB ?",
+                ( pattern, ) )
+        else:
+            cursor = connection.execute(
+                "SELECT id FROM labels WHERE label = ?", ( term.pattern, ) )
+        return frozenset( identifier for identifier, in cursor )
+
+    def survey_universe( ) -> frozenset[ str ]:
+        return frozenset(
+            identifier for identifier, in connection.execute(
+                "SELECT id FROM scribbles" ) )
+
+    identifiers = _labelqueries.evaluate_label_expression(
+        expression, resolve, survey_universe )
+    connection.execute(
+        "CREATE TEMP TABLE IF NOT EXISTS labelled ( id TEXT PRIMARY KEY )" )
+    connection.execute( "DELETE FROM labelled" )
+    connection.executemany(
+        "INSERT INTO labelled ( id ) VALUES ( ? )",
+        ( ( identifier, ) for identifier in identifiers ) )
+
+
+def _select_present(
+    connection: _sqlite3.Connection, identifiers: __.cabc.Sequence[ str ]
+) -> tuple[ str, ... ]:
+    ''' Selects identifiers which have records. '''
+    present: list[ str ] = [ ]
+    for i in range( 0, len( identifiers ), _SQLITE_VARIABLES_MAXIMUM ):
+        chunk = identifiers[ i : i + _SQLITE_VARIABLES_MAXIMUM ]
+        marks = ', '.join( '?' * len( chunk ) )
+        present.extend( identifier for identifier, in connection.execute(
+            f"SELECT id FROM scribbles WHERE id IN ( {marks} )",  # noqa: S608
+            chunk ) )
+    return tuple( present )
@@ -17,46 +17,263 @@
 #                                                                            #
 #============================================================================#
 
+''' Command-line interface.
 
-''' Command-line interface. '''
+    If a daemon serves on the socket, then commands which it accepts are
+    forwarded to it, by a thin client, rather than executed in process.
+    Else, they are executed in process, as usual.
+'''
 
 
+from importlib import import_module as _import_module
+from json import dumps as _json_dumps
+from json import loads as _json_loads
+
 from . import __
-from . import commands as _commands
+
+
+# Writes line of output
+Printer = __.cabc.Callable[ [ str ], None ]
+
+
+class DisplayFormats( __.enum.Enum ):
+    ''' Formats for display of command results. '''
+
+    Json = 'json'
+    Ndjson = 'ndjson'
+    Text = 'text'
+
+
+DAEMON_SOCKET_DEFAULT = '.auxiliary/caches/lmscribbles/daemon.socket'
+
+
+def _produce_constructor_factory(
+    module_name: str, class_name: str
+) -> __.cabc.Callable[ [ ], type ]:
+    ''' Produces factory which imports class of command on demand.
+
+        Modules of commands are thus imported by the parser, rather than
+        with this module, which some of them import in turn.
+    '''
+    def produce( ) -> type:
+        module = _import_module( f".{module_name}", __package__ )
+        return getattr( module, class_name )
+
+    return produce
+
+
+class CatalogCommands( __.immut.DataclassObject ):
+    ''' Maintains catalog of archived scribbles. '''
+
+    command: __.typx.Union[
+        __.typx.Annotated[
+            __.typx.Any,
+            __.tyro.conf.subcommand(
+                'rebuild', prefix_name = False,
+                constructor_factory = _produce_constructor_factory(
+                    'rebuilds', 'CatalogRebuildCommand' ) ),
+        ],
+        # Parser requires union of at least two types.
+        __.typx.Annotated[ None, __.tyro.conf.Suppress ],
+    ]
+
+    async def __call__( self ) -> __.typx.Any:
+        ''' Executes the selected command. '''
+        command = __.typx.cast( __.typx.Any, self.command )
+        return await command( )
 
 
 class Cli( __.immut.DataclassObject ):
     ''' Command-line interface for scribbles management. '''
+
+    display_format: __.typx.Annotated[
+        DisplayFormats,
+        __.tyro.conf.arg( prefix_name = False ),
+        __.ddoc.Doc( ''' Format for display of results. ''' ),
+    ] = DisplayFormats.Text
+    daemon_socket: __.typx.Annotated[
+        str,
+        __.tyro.conf.arg( prefix_name = False ),
+        __.ddoc.Doc(
+            ''' Socket of daemon to which commands are forwarded. ''' ),
+    ] = DAEMON_SOCKET_DEFAULT
+    no_daemon: __.typx.Annotated[
+        bool,
+        __.tyro.conf.arg( prefix_name = False ),
+        __.tyro.conf.FlagCreatePairsOff,
+        __.ddoc.Doc(
+            ''' Execute commands in process, even if daemon serves. ''' ),
+    ] = False
     command: __.typx.Union[
         __.typx.Annotated[
-            _commands.IngestCommand,
+            __.typx.Any,
             __.tyro.conf.subcommand(
-                'ingest', prefix_name = False, default = True ),
+                'ingest', prefix_name = False,
+                constructor_factory = _produce_constructor_factory(
+                    'commands', 'IngestCommand' ) ),
         ],
         __.typx.Annotated[
-            _commands.ClassifyCommand,
-            __.tyro.conf.subcommand( 'classify', prefix_name = False ),
+            __.typx.Any,
+            __.tyro.conf.subcommand(
+                'ingest-batch', prefix_name = False,
+                constructor_factory = _produce_constructor_factory(
+                    'commands', 'IngestBatchCommand' ) ),
         ],
         __.typx.Annotated[
-            _commands.SearchCommand,
-            __.tyro.conf.subcommand( 'search', prefix_name = False ),
+            __.typx.Any,
+            __.tyro.conf.subcommand(
+                'discover', prefix_name = False,
+                constructor_factory = _produce_constructor_factory(
+                    'commands', 'DiscoverCommand' ) ),
+        ],
+        __.typx.Annotated[
+            __.typx.Any,
+            __.tyro.conf.subcommand(
+                'classify', prefix_name = False,
+                constructor_factory = _produce_constructor_factory(
+                    'queries', 'ClassifyCommand' ) ),
+        ],
+        __.typx.Annotated[
+            __.typx.Any,
+            __.tyro.conf.subcommand(
+                'search', prefix_name = False,
+                constructor_factory = _produce_constructor_factory(
+                    'queries', 'SearchCommand' ) ),
+        ],
+        __.typx.Annotated[
+            CatalogCommands,
+            __.tyro.conf.subcommand( 'catalog', prefix_name = False ),
+        ],
+        __.typx.Annotated[
+            __.typx.Any,
+            __.tyro.conf.subcommand(
+                'serve', prefix_name = False,
+                constructor_factory = _produce_constructor_factory(
+                    'daemon', 'ServeCommand' ) ),
+        ],
+        __.typx.Annotated[
+            __.typx.Any,
+            __.tyro.conf.subcommand(
+                'serve-mcp', prefix_name = False,
+                constructor_factory = _produce_constructor_factory(
+                    'mcpserver', 'McpServeCommand' ) ),
+        ],
+        __.typx.Annotated[
+            __.typx.Any,
+            __.tyro.conf.subcommand(
+                'benchmark', prefix_name = False,
+                constructor_factory = _produce_constructor_factory(
+                    'benchmarks', 'BenchmarkCommand' ) ),
+        ],
+        __.typx.Annotated[
+            __.typx.Any,
+            __.tyro.conf.subcommand(
+                'benchmark-startup', prefix_name = False,
+                constructor_factory = _produce_constructor_factory(
+                    'benchmarks', 'StartupBenchmarkCommand' ) ),
         ],
     ]
+
     async def __call__( self ) -> None:
         ''' Executes the selected command. '''
-        result = await self.command( )
-        print( result.render_as_text( ) )
+        await execute_command( self.command, self.display_format )
+
+    def forward( self, arguments: __.cabc.Sequence[ str ] ) -> int | None:
+        ''' Forwards arguments to daemon and relays its output.
+
+            Returns exit status of forwarded command. Returns None, without
+            output, if command is not forwardable, if no daemon serves on
+            socket, or if daemon declines the arguments, so that the
+            command can be executed in process instead.
+        '''
+        if self.no_daemon or not is_forwardable( self.command ): return None
+        import socket
+        from os import getcwd
+        from sys import stderr
+        connection = socket.socket( socket.AF_UNIX, socket.SOCK_STREAM )
+        with connection:
+            try: connection.connect( self.daemon_socket )
+            except OSError: return None
+            request: dict[ str, __.typx.Any ] = {
+                'directory': getcwd( ), 'arguments': list( arguments ) }
+            connection.sendall( _json_dumps( request ).encode( ) + b'\n' )
+            with connection.makefile( 'r', encoding = 'utf-8' ) as replies:
+                for line in replies:
+                    reply = _json_loads( line )
+                    if 'stdout' in reply: _print_flushed( reply[ 'stdout' ] )
+                    elif 'stderr' in reply:
+                        print( reply[ 'stderr' ], file = stderr, flush = True )
+                    elif 'declined' in reply: return None
+                    elif 'status' in reply: return int( reply[ 'status' ] )
+        return 1  # Daemon closed connection before reporting status.
 
 
 def execute( ) -> None:
     ''' Entrypoint for CLI execution. '''
     from asyncio import run
-    config = (
-        __.tyro.conf.EnumChoicesFromValues,
-        __.tyro.conf.HelptextFromCommentsOff,
-    )
-    try: run( __.tyro.cli( Cli, config = config )( ) ) # pyright: ignore
+    from sys import argv
+    arguments = argv[ 1 : ]
+    status = None
+    try:
+        cli = parse_cli( arguments )
+        status = cli.forward( arguments )
+        if status is None: run( cli( ) )
     except SystemExit: raise
     except BaseException:
         # TODO: Log exception.
         raise SystemExit( 1 ) from None
+    if status: raise SystemExit( status )
+
+
+async def execute_command(
+    command: __.typx.Any,
+    display_format: DisplayFormats,
+    printer: Printer | None = None,
+) -> None:
+    ''' Executes command and displays its result.
+
+        With NDJSON display, commands which can stream, such as ingestion
+        commands, emit one JSON line per event, as it happens, followed by
+        a line with the summary. Other commands display their results as
+        JSON.
+    '''
+    printer_ = printer or _print_flushed
+    streamable = hasattr( command, 'stream' )
+    if DisplayFormats.Ndjson is display_format and streamable:
+
+        def emit( event: dict[ str, __.typx.Any ] ) -> None:
+            printer_( _json_dumps( event ) )
+
+        summary = await command.stream( emit )
+        printer_( summary.render_as_json( ) )
+        return
+    result = await command( )
+    match display_format:
+        case DisplayFormats.Text: printer_( result.render_as_text( ) )
+        case _: printer_( result.render_as_json( ) )
+
+
+def is_forwardable( command: __.typx.Any ) -> bool:
+    ''' Is command one which daemon executes? '''
+    from . import commands as _commands
+    from . import queries as _queries
+    return isinstance( command, (
+        _commands.IngestCommand,
+        _commands.IngestBatchCommand,
+        _queries.ClassifyCommand,
+        _queries.SearchCommand,
+    ) )
+
+
+def parse_cli( arguments: __.cabc.Sequence[ str ] ) -> Cli:
+    ''' Parses arguments into command-line interface. '''
+    config = (
+        __.tyro.conf.EnumChoicesFromValues,
+        __.tyro.conf.HelptextFromCommentsOff,
+    )
+    return __.tyro.cli(
+        Cli, prog = 'lmscribbles', args = arguments, config = config )
+
+
+def _print_flushed( text: str ) -> None:
+    print( text, flush = True )
@@ -21,120 +21,31 @@
 ''' Commands for CLI interface. '''
 
 
-from hashlib import sha256 as _sha256
+from datetime import datetime as _datetime
+from datetime import timezone as _timezone
 from json import dumps as _json_dumps
-from shutil import copy2 as _copy_file
+from time import thread_time as _thread_time
 
 from . import __
+from . import catalogs as _catalogs
+from . import discovery as _discovery
+from . import events as _events
 from . import exceptions as _exceptions
+from . import indexes as _indexes
+from . import ingestion as _ingestion
+from . import instruments as _instruments
+from . import inventories as _inventories
+from . import journals as _journals
+from . import locations as _locations
+from . import manifests as _manifests
+from . import objects as _objects
+from . import plans as _plans
+from . import retention as _retention
+from . import scanning as _scanning
 
 
-# Type Aliases
-Location: __.typx.TypeAlias = str | __.Path  # Path-like
-PathPair: __.typx.TypeAlias = tuple[ __.Path, __.Path ]
-# Base path and file path tuple for preserving directory structure
-SourceFileTuple: __.typx.TypeAlias = tuple[ __.Path, __.Path ]
-
-
-def _discover_source_files(
-    source_paths: __.cabc.Sequence[ Location ],
-) -> __.cabc.Iterator[ SourceFileTuple ]:
-    ''' Discovers all source files with their base paths.
-
-        Returns tuples of (base_path, file_path) where base_path is used
-        to calculate relative paths for preserving directory structure.
-        Excludes .gitignore files from discovery.
-    '''
-    for location in source_paths:
-        path = __.Path( location )
-        if path.is_file( ):
-            if path.name != '.gitignore':
-                yield ( path.parent, path )
-        elif path.is_dir( ):
-            for item in path.rglob( '*' ):
-                if item.is_file( ) and item.name != '.gitignore':
-                    yield ( path, item )
-        else:
-            raise _exceptions.FileIngestionFailure( str( path ) )
-
-
-def _compute_hash( file_path: __.Path ) -> str:
-    ''' Computes SHA-256 hash of file contents. '''
-    hasher = _sha256( )
-    try:
-        with file_path.open( 'rb' ) as file:
-            while chunk := file.read( 8192 ):
-                hasher.update( chunk )
-    except OSError as exception:
-        raise _exceptions.DuplicateDetectionFailure(
-            str( file_path ) ) from exception
-    return hasher.hexdigest( )
-
-
-async def _check_secrets(
-    file_path: __.Path,
-    warnings: list[ str ],
-) -> None:
-    ''' Checks file for secrets and adds warnings. '''
-    try:
-        from detect_secrets import SecretsCollection
-        from detect_secrets.settings import default_settings
-        secrets = SecretsCollection( )
-        with default_settings( ):
-            secrets.scan_file( str( file_path ) )
-        if secrets.data:
-            secret_count = sum(
-                len( file_secrets )
-                for file_secrets in secrets.data.values( )
-            )
-            msg = f"Secrets in {file_path}: {secret_count} found"
-            warnings.append( msg )
-    except Exception as exception:
-        raise _exceptions.SecretDetectionFailure(
-            str( file_path ) ) from exception
-
-
-async def _process_file(  # noqa: PLR0913
-    base_path: __.Path,
-    source: __.Path,
-    target_dir: __.Path,
-    warnings: list[ str ],
-    check_secrets: bool,
-    dry_run: bool,
-) -> __.Path | PathPair | None:
-    ''' Processes single file for ingestion.
-
-        Preserves directory structure relative to base_path.
-
-        Returns:
-            - Path: Successfully copied to this destination
-            - PathPair: Renamed due to duplicate
-            - None: Skipped (duplicate content)
-    '''
-    if check_secrets:
-        await _check_secrets( source, warnings )
-    try:
-        relative_path = source.relative_to( base_path )
-    except ValueError as exception:
-        raise _exceptions.FileIngestionFailure( str( source ) ) from exception
-    target_path = target_dir / relative_path
-    if not dry_run:
-        target_path.parent.mkdir( parents = True, exist_ok = True )
-    if target_path.exists( ):
-        source_hash = _compute_hash( source )
-        target_hash = _compute_hash( target_path )
-        if source_hash == target_hash:
-            return None
-        stem = target_path.stem
-        suffix = target_path.suffix
-        hash_suffix = source_hash[ :6 ]
-        renamed_path = target_path.parent / f"{stem}-{hash_suffix}{suffix}"
-        if not dry_run:
-            _copy_file( source, renamed_path )
-        return ( target_path, renamed_path )
-    if not dry_run:
-        _copy_file( source, target_path )
-    return target_path
+CACHE_DIRECTORY_DEFAULT = _locations.CACHE_DIRECTORY_DEFAULT
+PROJECT_WORKERS_DEFAULT = 4
 
 
 class IngestResult( __.immut.DataclassObject ):
@@ -142,13 +53,24 @@ class IngestResult( __.immut.DataclassObject ):
 
     copied: __.immut.Dictionary[ __.Path, __.Path ]
     skipped: __.immut.Dictionary[ __.Path, str ]
-    renamed: __.immut.Dictionary[ __.Path, PathPair ]
+    renamed: __.immut.Dictionary[ __.Path, __.PathPair ]
     failed: __.immut.Dictionary[ __.Path, str ]
     warnings: __.cabc.Sequence[ str ]
+    new: __.cabc.Sequence[ __.Path ] = ( )
+    changed: __.cabc.Sequence[ __.Path ] = ( )
+    copy_strategies: __.cabc.Mapping[ str, int ] = __.dcls.field(
+        default_factory = __.immut.Dictionary[ str, int ] )
+    duplicates: __.cabc.Mapping[ __.Path, __.cabc.Sequence[ str ] ] = (
+        __.dcls.field(
+            default_factory = (
+                __.immut.Dictionary[ __.Path, __.cabc.Sequence[ str ] ] ) ) )
+    stages: __.cabc.Mapping[ str, int ] = __.dcls.field(
+        default_factory = __.immut.Dictionary[ str, int ] )
+    metrics: _instruments.IngestMetrics | None = None
 
-    def render_as_json( self ) -> str:
-        ''' Renders result as JSON string. '''
-        data: dict[ str, __.typx.Any ] = {
+    def render_as_dictionary( self ) -> dict[ str, __.typx.Any ]:
+        ''' Renders result as dictionary for serialization. '''
+        return {
             'copied': { str( k ): str( v ) for k, v in self.copied.items( ) },
             'skipped': { str( k ): v for k, v in self.skipped.items( ) },
             'renamed': {
@@ -160,8 +82,18 @@ class IngestResult( __.immut.DataclassObject ):
             },
             'failed': { str( k ): v for k, v in self.failed.items( ) },
             'warnings': list( self.warnings ),
+            'new': [ str( path ) for path in self.new ],
+            'changed': [ str( path ) for path in self.changed ],
+            'copy_strategies': dict( self.copy_strategies ),
+            'duplicates': {
+                str( k ): list( v ) for k, v in self.duplicates.items( ) },
+            'stages': dict( self.stages ),
+            **_render_metrics( self.metrics ),
         }
-        return _json_dumps( data, indent = 2 )
+
+    def render_as_json( self ) -> str:
+        ''' Renders result as JSON string. '''
+        return _json_dumps( self.render_as_dictionary( ), indent = 2 )
 
     def render_as_text( self ) -> str:
         ''' Renders result as human-readable text. '''
@@ -186,30 +118,153 @@ class IngestResult( __.immut.DataclassObject ):
         if self.warnings:
             lines.append( f"\nWarnings ({len( self.warnings )}):" )
             lines.extend( f"  {warning}" for warning in self.warnings )
+        lines.extend( self._render_summary_lines( ) )
         if not any( [ self.copied, self.skipped, self.renamed, self.failed ] ):
             lines.append( "No files processed." )
         return '\n'.join( lines )
 
+    def _render_summary_lines( self ) -> list[ str ]:
+        lines: list[ str ] = [ ]
+        if self.new or self.changed:
+            lines.append(
+                f"\nSources: {len( self.new )} new, "
+                f"{len( self.changed )} changed since last ingest." )
+        if self.copy_strategies:
+            strategies = ', '.join(
+                f"{strategy} {count}"
+                for strategy, count in self.copy_strategies.items( ) )
+            lines.append( f"\nCopy strategies: {strategies}" )
+        if self.stages:
+            stages = ', '.join(
+                f"{stage} {count}" for stage, count in self.stages.items( ) )
+            lines.append( f"\nStages: {stages}" )
+        if self.duplicates:
+            count = len( self.duplicates )
+            lines.append( f"\nDuplicated in other projects ({count}):" )
+            lines.extend(
+                f"  {src}: {', '.join( entries )}"
+                for src, entries in self.duplicates.items( ) )
+        if self.metrics is not None:
+            lines.append( '' )
+            lines.extend( self.metrics.render_as_lines( ) )
+        return lines
 
-class IngestCommand( __.immut.DataclassObject ):
-    ''' Ingests scribbles from source directory into organized archive.
 
-        Performs project-based file copying with duplicate detection and
-        secret screening.
-    '''
+class IngestSummary( __.immut.DataclassObject ):
+    ''' Counts of ingestion outcomes, which follow streamed events. '''
+
+    copied: int = 0
+    skipped: int = 0
+    renamed: int = 0
+    failed: int = 0
+    warnings: int = 0
+    new: int = 0
+    changed: int = 0
+    duplicated: int = 0
+    copy_strategies: __.cabc.Mapping[ str, int ] = __.dcls.field(
+        default_factory = __.immut.Dictionary[ str, int ] )
+    stages: __.cabc.Mapping[ str, int ] = __.dcls.field(
+        default_factory = __.immut.Dictionary[ str, int ] )
+    metrics: _instruments.IngestMetrics | None = None
+
+    @classmethod
+    def from_streamer(
+        cls,
+        streamer: _events.OutcomesStreamer,
+        instruments: _instruments.Instruments | None = None,
+    ) -> __.typx.Self:
+        ''' Produces summary from tallies of outcomes streamer. '''
+        dispositions = streamer.dispositions
+        novelties = streamer.novelties
+        return cls(
+            copied = dispositions[ _ingestion.Dispositions.Copied.value ],
+            skipped = dispositions[ _ingestion.Dispositions.Skipped.value ],
+            renamed = dispositions[ _ingestion.Dispositions.Renamed.value ],
+            failed = dispositions[ _ingestion.Dispositions.Failed.value ],
+            warnings = streamer.warnings,
+            new = novelties.get( _journals.Novelties.New.value, 0 ),
+            changed = novelties.get( _journals.Novelties.Changed.value, 0 ),
+            duplicated = streamer.duplicated,
+            copy_strategies = __.immut.Dictionary(
+                sorted( streamer.copy_strategies.items( ) ) ),
+            stages = __.immut.Dictionary(
+                ( stage.value, streamer.stages[ stage.value ] )
+                for stage in _ingestion.Stages
+                if stage.value in streamer.stages ),
+            metrics = _summarize_instruments( instruments ) )
+
+    def render_as_dictionary( self ) -> dict[ str, __.typx.Any ]:
+        ''' Renders result as dictionary for serialization. '''
+        return {
+            'copied': self.copied,
+            'skipped': self.skipped,
+            'renamed': self.renamed,
+            'failed': self.failed,
+            'warnings': self.warnings,
+            'new': self.new,
+            'changed': self.changed,
+            'duplicated': self.duplicated,
+            'copy_strategies': dict( self.copy_strategies ),
+            'stages': dict( self.stages ),
+            **_render_metrics( self.metrics ),
+        }
+
+    def render_as_json( self ) -> str:
+        ''' Renders result as summary event on one line of JSON. '''
+        return _json_dumps(
+            { 'event': 'summary', **self.render_as_dictionary( ) } )
+
+    def render_as_text( self ) -> str:
+        ''' Renders result as human-readable text. '''
+        lines = [
+            f"Copied {self.copied}, skipped {self.skipped}, "
+            f"renamed {self.renamed}, failed {self.failed} file(s); "
+            f"{self.warnings} warning(s)." ]
+        if self.new or self.changed:
+            lines.append(
+                f"Sources: {self.new} new, {self.changed} changed "
+                "since last ingest." )
+        if self.duplicated:
+            lines.append(
+                f"Duplicated in other projects: {self.duplicated}" )
+        if self.metrics is not None:
+            lines.extend( self.metrics.render_as_lines( ) )
+        return '\n'.join( lines )
+
+
+class IngestBatchSummary( __.immut.DataclassObject ):
+    ''' Counts of batch ingestion outcomes, by project. '''
+
+    summaries: __.immut.Dictionary[ str, IngestSummary ]
+    failures: __.immut.Dictionary[ str, str ]
+
+    def render_as_json( self ) -> str:
+        ''' Renders result as summary event on one line of JSON. '''
+        data: dict[ str, __.typx.Any ] = {
+            'event': 'summary',
+            'projects': {
+                project: summary.render_as_dictionary( )
+                for project, summary in self.summaries.items( ) },
+            'failures': dict( self.failures ),
+        }
+        return _json_dumps( data )
+
+    def render_as_text( self ) -> str:
+        ''' Renders result as human-readable text. '''
+        lines = [
+            f"{project}: {summary.render_as_text( )}"
+            for project, summary in self.summaries.items( ) ]
+        lines.extend(
+            f"{project}: {error}"
+            for project, error in self.failures.items( ) )
+        return '\n'.join( lines )
+
+
+class _IngestCommandBase( __.immut.DataclassObject ):
+    ''' Options common to ingestion commands. '''
 
-    project_name: __.typx.Annotated[
-        str,
-        __.tyro.conf.arg( prefix_name = False ),
-        __.ddoc.Doc( ''' Target project name for ingestion. ''' ),
-    ]
-    source_paths: __.typx.Annotated[
-        __.cabc.Sequence[ Location ],
-        __.tyro.conf.arg( prefix_name = False ),
-        __.ddoc.Doc( ''' Source file(s) or directory to ingest. ''' ),
-    ]
     target_base: __.typx.Annotated[
-        Location,
+        __.Location,
         __.tyro.conf.arg( prefix_name = False ),
         __.ddoc.Doc( ''' Base directory for ingestion. ''' ),
     ] = "ingests"
@@ -223,82 +278,791 @@ class IngestCommand( __.immut.DataclassObject ):
         __.tyro.conf.arg( prefix_name = False ),
         __.ddoc.Doc( ''' Preview operations without making changes. ''' ),
     ] = False
+    include: __.typx.Annotated[
+        __.cabc.Sequence[ str ],
+        __.tyro.conf.arg( prefix_name = False ),
+        __.ddoc.Doc( ''' Glob patterns of files to ingest (else all). ''' ),
+    ] = ( )
+    exclude: __.typx.Annotated[
+        __.cabc.Sequence[ str ],
+        __.tyro.conf.arg( prefix_name = False ),
+        __.ddoc.Doc(
+            ''' Glob patterns of files and directories to exclude, in
+                addition to default exclusions. ''' ),
+    ] = ( )
+    default_excludes: __.typx.Annotated[
+        bool,
+        __.tyro.conf.arg( prefix_name = False ),
+        __.ddoc.Doc(
+            ''' Exclude '.gitignore' files, '__pycache__/', '.venv/',
+                and 'node_modules/'. ''' ),
+    ] = True
+    honor_gitignore: __.typx.Annotated[
+        bool,
+        __.tyro.conf.arg( prefix_name = False ),
+        __.ddoc.Doc( ''' Exclude files ignored by '.gitignore' files. ''' ),
+    ] = False
+
+    workers: __.typx.Annotated[
+        int,
+        __.tyro.conf.arg( prefix_name = False ),
+        __.ddoc.Doc( ''' Maximum number of files processed concurrently. ''' ),
+    ] = _ingestion.WORKERS_DEFAULT
+    scan_backend: __.typx.Annotated[
+        _scanning.ScanBackends,
+        __.tyro.conf.arg( prefix_name = False ),
+        __.ddoc.Doc( ''' Execution backend for secret detection. ''' ),
+    ] = _scanning.ScanBackends.Processes
+    scan_workers: __.typx.Annotated[
+        int,
+        __.tyro.conf.arg( prefix_name = False ),
+        __.ddoc.Doc( ''' Number of workers for secret detection. ''' ),
+    ] = _scanning.SCAN_WORKERS_DEFAULT
+    scan_batch_size: __.typx.Annotated[
+        int,
+        __.tyro.conf.arg( prefix_name = False ),
+        __.ddoc.Doc( ''' Number of files sent to scan worker at once. ''' ),
+    ] = _scanning.SCAN_BATCH_SIZE_DEFAULT
+    scan_cache: __.typx.Annotated[
+        bool,
+        __.tyro.conf.arg( prefix_name = False ),
+        __.ddoc.Doc( ''' Reuse secret scans of previously seen content. ''' ),
+    ] = True
+    cache_directory: __.typx.Annotated[
+        __.Location,
+        __.tyro.conf.arg( prefix_name = False ),
+        __.ddoc.Doc( ''' Directory for persistent caches. ''' ),
+    ] = CACHE_DIRECTORY_DEFAULT
+    journal: __.typx.Annotated[
+        bool,
+        __.tyro.conf.arg( prefix_name = False ),
+        __.ddoc.Doc( ''' Skip source files unchanged since last ingest. ''' ),
+    ] = True
+    object_store: __.typx.Annotated[
+        __.typx.Optional[ __.Location ],
+        __.tyro.conf.arg( prefix_name = False ),
+        __.ddoc.Doc(
+            ''' Directory of content-addressed objects. If set, archive
+                entries are links to objects rather than copies. ''' ),
+    ] = None
+    object_hardlinks: __.typx.Annotated[
+        bool,
+        __.tyro.conf.arg( prefix_name = False ),
+        __.ddoc.Doc(
+            ''' Link entries to objects by hardlink, where possible.
+                Else, by reflink or copy. ''' ),
+    ] = True
+    content_index: __.typx.Annotated[
+        bool,
+        __.tyro.conf.arg( prefix_name = False ),
+        __.ddoc.Doc(
+            ''' Index content of archive entries to report duplicates
+                across projects. ''' ),
+    ] = True
+    catalog: __.typx.Annotated[
+        bool,
+        __.tyro.conf.arg( prefix_name = False ),
+        __.ddoc.Doc(
+            ''' Record archived scribbles in catalog, for classification
+                and search. ''' ),
+    ] = True
+    skip_duplicates: __.typx.Annotated[
+        bool,
+        __.tyro.conf.arg( prefix_name = False ),
+        __.ddoc.Doc(
+            ''' Skip files whose content exists in other projects. ''' ),
+    ] = False
+    timings: __.typx.Annotated[
+        bool,
+        __.tyro.conf.arg( prefix_name = False ),
+        __.ddoc.Doc(
+            ''' Report time and throughput of each phase, slowest files of
+                each phase, and cache hit rates. ''' ),
+    ] = False
+    timings_slowest: __.typx.Annotated[
+        int,
+        __.tyro.conf.arg( prefix_name = False ),
+        __.ddoc.Doc( ''' Number of slowest files reported per phase. ''' ),
+    ] = _instruments.SLOWEST_COUNT_DEFAULT
+
+    def _discover(
+        self,
+        source_paths: __.cabc.Sequence[ __.Location ],
+        instruments: _instruments.Instruments | None = None,
+    ) -> tuple[ _discovery.SourceFileTuple, ... ]:
+        criteria = _discovery.DiscoveryFilter(
+            includes = tuple( self.include ),
+            excludes = tuple( self.exclude ),
+            default_excludes = self.default_excludes,
+            honor_ignores = self.honor_gitignore )
+        if instruments is None:
+            return tuple(
+                _discovery.discover_source_files( source_paths, criteria ) )
+        with instruments.measure_phase( _instruments.Phases.Discover ):
+            cpu_started = _thread_time( )
+            source_files = tuple(
+                _discovery.discover_source_files( source_paths, criteria ) )
+            instruments.record_work(
+                _instruments.Phases.Discover, len( source_files ),
+                _thread_time( ) - cpu_started )
+        return source_files
+
+    @__.ctxl.asynccontextmanager
+    async def _provide_scanner(
+        self
+    ) -> __.cabc.AsyncIterator[ _scanning.SecretsScanner ]:
+        async with __.ctxl.AsyncExitStack( ) as exits:
+            cache = None
+            if self.scan_cache:
+                cache = exits.enter_context( _scanning.ScanCache(
+                    __.Path( self.cache_directory )
+                    / 'secrets-scans.sqlite3' ) )
+            yield await exits.enter_async_context(
+                _scanning.SecretsScanner(
+                    backend = self.scan_backend,
+                    workers = self.scan_workers,
+                    batch_size = self.scan_batch_size,
+                    cache = cache ) )
+
+    async def _enter_provisions(
+        self, exits: __.ctxl.AsyncExitStack, scan: bool
+    ) -> '_Provisions':
+        ''' Enters resources shared by ingestions of projects.
+
+            If a retainer is current, then resources are taken from it,
+            and are entered into it on first use, rather than into the
+            exit stack of this command.
+        '''
+        from asyncio import to_thread
+        retainer = _retention.access_retainer( )
+        scanner = None
+        if self.check_secrets and scan:
+            if retainer is None:
+                scanner = await exits.enter_async_context(
+                    self._provide_scanner( ) )
+            else:
+                scanner = await retainer.retain_async(
+                    self._produce_scanner_key( ), self._provide_scanner )
+        index = None
+        if self.content_index:
+            index_location = _indexes.produce_index_location(
+                __.Path( self.cache_directory ), __.Path( self.target_base ) )
+            if retainer is None:
+                index = exits.enter_context(
+                    _indexes.ContentIndex( index_location ) )
+            else:
+                index = retainer.retain(
+                    ( 'content-index', index_location.resolve( ) ),
+                    lambda: _indexes.ContentIndex( index_location ) )
+            await to_thread( index.survey, __.Path( self.target_base ) )
+        catalog = None
+        if self.catalog:
+            catalog_location = _catalogs.produce_catalog_location(
+                __.Path( self.cache_directory ), __.Path( self.target_base ) )
+            if retainer is None:
+                catalog = exits.enter_context(
+                    _catalogs.Catalog( catalog_location ) )
+            else:
+                catalog = retainer.retain(
+                    ( 'catalog', catalog_location.resolve( ) ),
+                    lambda: _catalogs.Catalog( catalog_location ) )
+        return _Provisions(
+            catalog = catalog, index = index, scanner = scanner )
+
+    def _produce_scanner_key( self ) -> __.cabc.Hashable:
+        cache_location = None
+        if self.scan_cache:
+            cache_location = (
+                __.Path( self.cache_directory ) / 'secrets-scans.sqlite3'
+            ).resolve( )
+        return (
+            'secrets-scanner', self.scan_backend, self.scan_workers,
+            self.scan_batch_size, cache_location )
+
+    def _produce_instruments( self ) -> _instruments.Instruments | None:
+        if not self.timings: return None
+        return _instruments.Instruments( self.timings_slowest )
+
+    def _produce_object_store( self ) -> _objects.ObjectStore | None:
+        if self.object_store is None: return None
+        return _objects.ObjectStore(
+            __.Path( self.object_store ), hardlinks = self.object_hardlinks )
+
+    @__.ctxl.asynccontextmanager
+    async def _access_project(
+        self,
+        target_dir: __.Path,
+        provisions: '_Provisions',
+        *,
+        dry_run: bool,
+        observers: '_Observers | None' = None,
+    ) -> __.cabc.AsyncIterator[ _ingestion.IngestContext ]:
+        ''' Provides ingestion context for project directory.
+
+            Saves manifest and journal afterwards, unless dry run.
+        '''
+        from asyncio import to_thread
+        observers = observers or _Observers( )
+        retainer = _retention.access_retainer( )
+        if retainer is None:
+            manifest = await to_thread( _manifests.Manifest.load, target_dir )
+        else:
+            manifest = await to_thread( retainer.access_manifest, target_dir )
+        journal = None
+        if self.journal:
+            journal = _journals.Journal(
+                __.Path( self.cache_directory ) / 'journals', target_dir )
+        yield _ingestion.IngestContext(
+            target_dir = target_dir,
+            dry_run = dry_run,
+            index = provisions.index,
+            instruments = observers.instruments,
+            journal = journal,
+            manifest = manifest,
+            objects = self._produce_object_store( ),
+            reporter = observers.reporter,
+            scanner = provisions.scanner,
+            skip_duplicates = self.skip_duplicates,
+            workers = self.workers )
+        if observers.instruments is not None:
+            observers.instruments.record_cache(
+                'manifest', manifest.hits, manifest.misses )
+        if not dry_run:
+            await to_thread( manifest.save )
+            if retainer is not None: retainer.refresh_manifest( manifest )
+            if journal is not None: await to_thread( journal.save )
+
+    async def _catalog_outcomes(
+        self,
+        project_name: str,
+        target_dir: __.Path,
+        outcomes: __.cabc.Sequence[ _ingestion.IngestOutcome ],
+        provisions: '_Provisions',
+    ) -> None:
+        ''' Records archived files of project in catalog, if enabled.
+
+            Records of one run are upserted in a single transaction. Then,
+            contents which are new to catalog are added to its full-text
+            index.
+        '''
+        if provisions.catalog is None: return
+        from asyncio import to_thread
+        records = _produce_catalog_records(
+            project_name, target_dir, outcomes )
+        await to_thread( provisions.catalog.upsert, records )
+        await _catalogs.index_pending_texts( provisions.catalog )
+
+    async def _ingest_project(
+        self,
+        project_name: str,
+        source_files: __.cabc.Sequence[ _discovery.SourceFileTuple ],
+        provisions: '_Provisions',
+        *,
+        dry_run: bool = False,
+        observers: '_Observers | None' = None,
+    ) -> tuple[ _ingestion.IngestOutcome, ... ]:
+        target_dir = __.Path( self.target_base ) / project_name
+        dry_run = dry_run or self.dry_run
+        async with self._access_project(
+            target_dir, provisions, dry_run = dry_run, observers = observers,
+        ) as context:
+            outcomes = await _ingestion.ingest_files( source_files, context )
+        if not dry_run:
+            await self._catalog_outcomes(
+                project_name, target_dir, outcomes, provisions )
+        return outcomes
+
+
+class _Observers( __.immut.DataclassObject ):
+    ''' Observers of ingestion of one project. '''
+
+    instruments: _instruments.Instruments | None = None
+    reporter: _events.OutcomesStreamer | None = None
+
+
+class _Provisions( __.immut.DataclassObject ):
+    ''' Resources shared by ingestions of projects. '''
+
+    catalog: _catalogs.Catalog | None = None
+    index: _indexes.ContentIndex | None = None
+    scanner: _scanning.SecretsScanner | None = None
+
+
+class IngestCommand( _IngestCommandBase ):
+    ''' Ingests scribbles from source directory into organized archive.
+
+        Performs project-based file copying with duplicate detection and
+        secret screening.
+    '''
+
+    project_name: __.typx.Annotated[
+        str,
+        __.tyro.conf.arg( prefix_name = False ),
+        __.ddoc.Doc( ''' Target project name for ingestion. ''' ),
+    ] = ''
+    source_paths: __.typx.Annotated[
+        __.cabc.Sequence[ __.Location ],
+        __.tyro.conf.arg( prefix_name = False ),
+        __.ddoc.Doc( ''' Source file(s) or directory to ingest. ''' ),
+    ] = ( )
+    plan_out: __.typx.Annotated[
+        __.typx.Optional[ __.Location ],
+        __.tyro.conf.arg( prefix_name = False ),
+        __.ddoc.Doc(
+            ''' Write plan of dry run, with hashes and scan findings, to
+                file rather than ingesting. ''' ),
+    ] = None
+    apply: __.typx.Annotated[
+        __.typx.Optional[ __.Location ],
+        __.tyro.conf.arg( prefix_name = False ),
+        __.ddoc.Doc(
+            ''' Carry out copies of plan file, if sources are unchanged.
+                Project name and source paths are taken from plan. ''' ),
+    ] = None
 
     async def __call__( self ) -> IngestResult:
         ''' Executes ingestion command. '''
-        target_dir = __.Path( self.target_base ) / self.project_name
-        source_files = list( _discover_source_files( self.source_paths ) )
-        if not source_files:
-            return IngestResult(
-                copied = __.immut.Dictionary( ),
-                skipped = __.immut.Dictionary( ),
-                renamed = __.immut.Dictionary( ),
-                failed = __.immut.Dictionary( ),
-                warnings = ( ),
-            )
-        copied: dict[ __.Path, __.Path ] = { }
-        skipped: dict[ __.Path, str ] = { }
-        renamed: dict[ __.Path, PathPair ] = { }
-        failed: dict[ __.Path, str ] = { }
-        warnings: list[ str ] = [ ]
-        for base_path, source in source_files:
-            try:
-                result = await _process_file(
-                    base_path, source, target_dir, warnings,
-                    self.check_secrets, self.dry_run )
-            except Exception as exception:
-                failed[ source ] = str( exception )
-                continue
-            if result is None:
-                skipped[ source ] = "Same content already exists"
-            elif isinstance( result, tuple ):
-                renamed[ source ] = result
-            else:
-                copied[ source ] = result
-        return IngestResult(
-            copied = __.immut.Dictionary( copied ),
-            skipped = __.immut.Dictionary( skipped ),
-            renamed = __.immut.Dictionary( renamed ),
-            failed = __.immut.Dictionary( failed ),
-            warnings = tuple( warnings ),
-        )
+        instruments = self._produce_instruments( )
+        outcomes = await self._execute(
+            _Observers( instruments = instruments ) )
+        return _summarize_outcomes( outcomes, instruments )
+
+    async def stream( self, emitter: _events.Emitter ) -> IngestSummary:
+        ''' Executes ingestion command, emitting event per outcome. '''
+        instruments = self._produce_instruments( )
+        streamer = _events.OutcomesStreamer( emitter )
+        await self._execute(
+            _Observers( instruments = instruments, reporter = streamer ) )
+        return IngestSummary.from_streamer( streamer, instruments )
 
+    async def _execute(
+        self, observers: _Observers
+    ) -> tuple[ _ingestion.IngestOutcome, ... ]:
+        from asyncio import to_thread
+        if self.apply is not None:
+            if self.plan_out is not None:
+                raise _exceptions.OptionsInvalidity( ( 'apply', 'plan-out' ) )
+            return await self._apply_plan(
+                __.Path( self.apply ), observers )
+        if not self.project_name or not self.source_paths:
+            raise _exceptions.OptionsInvalidity(
+                ( 'project-name', 'source-paths' ) )
+        source_files = await to_thread(
+            self._discover, self.source_paths, observers.instruments )
+        async with __.ctxl.AsyncExitStack( ) as exits:
+            provisions = await self._enter_provisions(
+                exits, scan = bool( source_files ) )
+            outcomes = await self._ingest_project(
+                self.project_name, source_files, provisions,
+                dry_run = self.plan_out is not None, observers = observers )
+        if self.plan_out is not None:
+            plan = _plans.IngestPlan(
+                project_name = self.project_name,
+                target_dir = __.Path( self.target_base ) / self.project_name,
+                source_files = source_files,
+                outcomes = outcomes )
+            await to_thread( plan.save, __.Path( self.plan_out ) )
+        return outcomes
 
-class ClassifyResult( __.immut.DataclassObject ):
-    ''' Results of classification operation (stub). '''
+    async def _apply_plan(
+        self, file_path: __.Path, observers: _Observers
+    ) -> tuple[ _ingestion.IngestOutcome, ... ]:
+        from asyncio import to_thread
+        plan = await to_thread( _plans.IngestPlan.load, file_path )
+        async with __.ctxl.AsyncExitStack( ) as exits:
+            provisions = await self._enter_provisions( exits, scan = False )
+            async with self._access_project(
+                plan.target_dir, provisions,
+                dry_run = False, observers = observers,
+            ) as context:
+                outcomes = await _ingestion.apply_outcomes(
+                    plan.source_files, plan.outcomes, context )
+            await self._catalog_outcomes(
+                plan.project_name, plan.target_dir, outcomes, provisions )
+        return outcomes
+
+
+class IngestBatchResult( __.immut.DataclassObject ):
+    ''' Results of batch ingestion operation, by project. '''
+
+    results: __.immut.Dictionary[ str, IngestResult ]
+    failures: __.immut.Dictionary[ str, str ]
 
     def render_as_json( self ) -> str:
         ''' Renders result as JSON string. '''
-        return _json_dumps( { 'status': 'not implemented' }, indent = 2 )
+        data: dict[ str, __.typx.Any ] = {
+            'results': {
+                project: result.render_as_dictionary( )
+                for project, result in self.results.items( ) },
+            'failures': dict( self.failures ),
+        }
+        return _json_dumps( data, indent = 2 )
 
     def render_as_text( self ) -> str:
         ''' Renders result as human-readable text. '''
-        return "ClassifyCommand not yet implemented (Phase 2+)"
+        lines: list[ str ] = [ ]
+        for project, result in self.results.items( ):
+            lines.append( f"=== {project} ===" )
+            lines.append( result.render_as_text( ) )
+            lines.append( '' )
+        if self.failures:
+            lines.append( f"Failed {len( self.failures )} project(s):" )
+            for project, error in self.failures.items( ):
+                lines.append( f"  {project}: {error}" )
+        if not self.results and not self.failures:
+            lines.append( "No projects found." )
+        return '\n'.join( lines ).rstrip( )
+
 
+class IngestBatchCommand( _IngestCommandBase ):
+    ''' Ingests scribbles from many projects in one process.
 
-class ClassifyCommand( __.immut.DataclassObject ):
-    ''' Classifies and labels ingested scribbles (stub for Phase 2). '''
+        Projects are either found under a root directory, as directories
+        which contain scribbles, or given by name and source path.
+        Projects are ingested concurrently and share one secrets scanner
+        and its caches.
+    '''
 
-    async def __call__( self ) -> ClassifyResult:
-        ''' Stub implementation. '''
-        return ClassifyResult( )
+    scribbles_root: __.typx.Annotated[
+        __.typx.Optional[ __.Location ],
+        __.tyro.conf.arg( prefix_name = False ),
+        __.ddoc.Doc(
+            ''' Directory of projects, each with scribbles directory. ''' ),
+    ] = None
+    projects: __.typx.Annotated[
+        __.cabc.Mapping[ str, __.Location ],
+        __.tyro.conf.arg( prefix_name = False ),
+        __.ddoc.Doc( ''' Source paths by project name. ''' ),
+    ] = __.dcls.field( default_factory = __.immut.Dictionary[ str, str ] )
+    project_workers: __.typx.Annotated[
+        int,
+        __.tyro.conf.arg( prefix_name = False ),
+        __.ddoc.Doc( ''' Maximum number of projects ingested at once. ''' ),
+    ] = PROJECT_WORKERS_DEFAULT
 
+    async def __call__( self ) -> IngestBatchResult:
+        ''' Executes batch ingestion command. '''
+        results: dict[ str, IngestResult ] = { }
 
-class SearchResult( __.immut.DataclassObject ):
-    ''' Results of search operation (stub). '''
+        def conclude(
+            project: str,
+            outcomes: __.cabc.Sequence[ _ingestion.IngestOutcome ],
+            observers: _Observers,
+        ) -> None:
+            results[ project ] = _summarize_outcomes(
+                outcomes, observers.instruments )
+
+        failures = await self._execute( conclude )
+        return IngestBatchResult(
+            results = __.immut.Dictionary( sorted( results.items( ) ) ),
+            failures = __.immut.Dictionary( failures ) )
+
+    async def stream(
+        self, emitter: _events.Emitter
+    ) -> IngestBatchSummary:
+        ''' Executes batch ingestion command, emitting event per outcome.
+
+            Events carry names of their projects.
+        '''
+        summaries: dict[ str, IngestSummary ] = { }
+
+        def conclude(
+            project: str,
+            outcomes: __.cabc.Sequence[ _ingestion.IngestOutcome ],
+            observers: _Observers,
+        ) -> None:
+            summaries[ project ] = IngestSummary.from_streamer(
+                __.typx.cast( _events.OutcomesStreamer, observers.reporter ),
+                observers.instruments )
+
+        failures = await self._execute( conclude, emitter )
+        return IngestBatchSummary(
+            summaries = __.immut.Dictionary( sorted( summaries.items( ) ) ),
+            failures = __.immut.Dictionary( failures ) )
+
+    async def _execute(
+        self,
+        conclude: __.cabc.Callable[
+            [ str, __.cabc.Sequence[ _ingestion.IngestOutcome ], _Observers ],
+            None
+        ],
+        emitter: _events.Emitter | None = None,
+    ) -> dict[ str, str ]:
+        ''' Ingests projects, concluding each as it completes.
+
+            If emitter is supplied, then outcomes of each project are
+            streamed to it. Returns descriptions of failures to discover
+            projects.
+        '''
+        from asyncio import Semaphore, gather, to_thread
+        sources = await to_thread( self._survey_projects )
+        observers = {
+            project: _Observers(
+                instruments = self._produce_instruments( ),
+                reporter = None if emitter is None else (
+                    _events.OutcomesStreamer( emitter, project ) ) )
+            for project in sources }
+        discoveries = dict( zip( sources, await gather( *(
+            to_thread(
+                self._discover_project, path,
+                observers[ project ].instruments )
+            for project, path in sources.items( ) ) ) ) )
+        failures = {
+            project: discovery for project, discovery in discoveries.items( )
+            if isinstance( discovery, str ) }
+        admissions = Semaphore( max( 1, self.project_workers ) )
+        async with __.ctxl.AsyncExitStack( ) as exits:
+            provisions = await self._enter_provisions(
+                exits, scan = any(
+                    discovery for discovery in discoveries.values( )
+                    if not isinstance( discovery, str ) ) )
+
+            async def ingest(
+                project: str,
+                source_files: __.cabc.Sequence[ _discovery.SourceFileTuple ],
+            ) -> None:
+                async with admissions:
+                    outcomes = await self._ingest_project(
+                        project, source_files, provisions,
+                        observers = observers[ project ] )
+                conclude( project, outcomes, observers[ project ] )
+
+            await gather( *(
+                ingest( project, discovery )
+                for project, discovery in discoveries.items( )
+                if not isinstance( discovery, str ) ) )
+        return failures
+
+    def _discover_project(
+        self,
+        source_path: __.Path,
+        instruments: _instruments.Instruments | None,
+    ) -> tuple[ _discovery.SourceFileTuple, ... ] | str:
+        ''' Discovers source files of project or describes failure. '''
+        try: return self._discover( ( source_path, ), instruments )
+        except _exceptions.FileIngestionFailure as exc:
+            return exc.render_as_text( )
+
+    def _survey_projects( self ) -> dict[ str, __.Path ]:
+        ''' Maps project names to source paths, sorted by name. '''
+        sources: dict[ str, __.Path ] = { }
+        if self.scribbles_root is not None:
+            sources.update( _discovery.discover_projects(
+                __.Path( self.scribbles_root ) ) )
+        sources.update(
+            ( project, __.Path( path ) )
+            for project, path in self.projects.items( ) )
+        return dict( sorted( sources.items( ) ) )
+
+
+class DiscoverResult( __.immut.DataclassObject ):
+    ''' Inventory of scribbles awaiting ingestion, by project. '''
+
+    inventories: __.cabc.Sequence[ _inventories.ProjectInventory ]
 
     def render_as_json( self ) -> str:
         ''' Renders result as JSON string. '''
-        return _json_dumps( { 'status': 'not implemented' }, indent = 2 )
+        data: dict[ str, __.typx.Any ] = {
+            'projects': [
+                inventory.render_as_dictionary( )
+                for inventory in self.inventories ],
+        }
+        return _json_dumps( data, indent = 2 )
 
     def render_as_text( self ) -> str:
         ''' Renders result as human-readable text. '''
-        return "SearchCommand not yet implemented (Phase 2+)"
+        lines: list[ str ] = [ ]
+        for inventory in self.inventories:
+            new, changed = inventory.new, inventory.changed
+            pending = new.count + changed.count
+            if not pending and not inventory.ingested.count: continue
+            status = (
+                "[NEEDS INGESTION]" if pending else "[ALREADY INGESTED]" )
+            lines.append(
+                f"{status} {inventory.project_name}: "
+                f"{new.count} new ({new.size} bytes), "
+                f"{changed.count} changed ({changed.size} bytes), "
+                f"{inventory.ingested.count} ingested "
+                f"({inventory.ingested.size} bytes)" )
+        if not lines: lines.append( "No projects with scribbles found." )
+        return '\n'.join( lines )
+
+
+class DiscoverCommand( __.immut.DataclassObject ):
+    ''' Inventories scribbles of repositories relative to archive.
+
+        Finds scribbles directories of repositories under each root and
+        reports, per project, how many files are new, changed, or already
+        ingested, along with their total sizes. Uses ingestion journals
+        and content manifests of the archive. Projects are surveyed
+        concurrently.
+    '''
+
+    repository_roots: __.typx.Annotated[
+        __.cabc.Sequence[ __.Location ],
+        __.tyro.conf.arg( prefix_name = False ),
+        __.ddoc.Doc( ''' Directories of repositories or repositories. ''' ),
+    ]
+    target_base: __.typx.Annotated[
+        __.Location,
+        __.tyro.conf.arg( prefix_name = False ),
+        __.ddoc.Doc( ''' Base directory for ingestion. ''' ),
+    ] = "ingests"
+    exclude: __.typx.Annotated[
+        __.cabc.Sequence[ str ],
+        __.tyro.conf.arg( prefix_name = False ),
+        __.ddoc.Doc(
+            ''' Glob patterns of files and directories to exclude, in
+                addition to default exclusions. ''' ),
+    ] = ( )
+    default_excludes: __.typx.Annotated[
+        bool,
+        __.tyro.conf.arg( prefix_name = False ),
+        __.ddoc.Doc(
+            ''' Exclude '.gitignore' files, '__pycache__/', '.venv/',
+                and 'node_modules/'. ''' ),
+    ] = True
+    cache_directory: __.typx.Annotated[
+        __.Location,
+        __.tyro.conf.arg( prefix_name = False ),
+        __.ddoc.Doc( ''' Directory for persistent caches. ''' ),
+    ] = CACHE_DIRECTORY_DEFAULT
+    workers: __.typx.Annotated[
+        int,
+        __.tyro.conf.arg( prefix_name = False ),
+        __.ddoc.Doc( ''' Maximum number of projects surveyed at once. ''' ),
+    ] = _ingestion.WORKERS_DEFAULT
+
+    async def __call__( self ) -> DiscoverResult:
+        ''' Executes discovery command. '''
+        from asyncio import gather, get_running_loop
+        from concurrent.futures import ThreadPoolExecutor
+        from functools import partial
+        loop = get_running_loop( )
+        criteria = _discovery.DiscoveryFilter(
+            excludes = tuple( self.exclude ),
+            default_excludes = self.default_excludes )
+        journals_directory = __.Path( self.cache_directory ) / 'journals'
+        with ThreadPoolExecutor( max_workers = max( 1, self.workers ) ) as (
+            executor
+        ):
+            surveys = await gather( *(
+                loop.run_in_executor( executor, _survey_root, __.Path( root ) )
+                for root in self.repository_roots ) )
+            projects = sorted( {
+                path.resolve( ): ( name, path )
+                for survey in surveys for name, path in survey
+            }.values( ) )
+            inventories = await gather( *(
+                loop.run_in_executor( executor, partial(
+                    _inventories.survey_project,
+                    name, path, __.Path( self.target_base ) / name,
+                    journals_directory, criteria ) )
+                for name, path in projects ) )
+        return DiscoverResult( inventories = tuple( inventories ) )
+
+
+def _survey_root( root: __.Path ) -> tuple[ tuple[ str, __.Path ], ... ]:
+    ''' Finds projects with scribbles at or immediately under root. '''
+    scribbles = root / _discovery.SCRIBBLES_DIRECTORY
+    if scribbles.is_dir( ): return ( ( root.resolve( ).name, scribbles ), )
+    return tuple( _discovery.discover_projects( root ).items( ) )
+
+
+def _produce_catalog_records(
+    project_name: str,
+    target_dir: __.Path,
+    outcomes: __.cabc.Iterable[ _ingestion.IngestOutcome ],
+) -> tuple[ _catalogs.ScribbleMetadata, ... ]:
+    ''' Produces catalog records for files archived by ingestion.
+
+        Records of one run share one time of ingestion.
+    '''
+    ingested_at = _datetime.now( _timezone.utc )
+    records: list[ _catalogs.ScribbleMetadata ] = [ ]
+    for outcome in outcomes:
+        if outcome.disposition not in (
+            _ingestion.Dispositions.Copied, _ingestion.Dispositions.Renamed
+        ): continue
+        destination = __.typx.cast( __.Path, outcome.destination )
+        path = destination.relative_to( target_dir ).as_posix( )
+        size = outcome.size
+        if size is None: size = destination.stat( ).st_size
+        records.append( _catalogs.ScribbleMetadata(
+            id = _catalogs.produce_identifier( project_name, path ),
+            project = project_name,
+            path = path,
+            original_path = str( outcome.source ),
+            archived_path = str( destination ),
+            content_hash = outcome.content_hash or '',
+            ingested_at = ingested_at,
+            size_bytes = size ) )
+    return tuple( records )
+
+
+def _render_metrics(
+    metrics: _instruments.IngestMetrics | None
+) -> dict[ str, __.typx.Any ]:
+    ''' Renders metrics, if any, as entry of result data. '''
+    if metrics is None: return { }
+    return { 'metrics': metrics.render_as_dictionary( ) }
+
 
+def _summarize_instruments(
+    instruments: _instruments.Instruments | None
+) -> _instruments.IngestMetrics | None:
+    if instruments is None: return None
+    return instruments.summarize( )
 
-class SearchCommand( __.immut.DataclassObject ):
-    ''' Searches and queries scribbles catalog (stub for Phase 2). '''
 
-    async def __call__( self ) -> SearchResult:
-        ''' Stub implementation. '''
-        return SearchResult( )
+def _summarize_outcomes(
+    outcomes: __.cabc.Iterable[ _ingestion.IngestOutcome ],
+    instruments: _instruments.Instruments | None = None,
+) -> IngestResult:
+    ''' Folds ingestion outcomes, in order, into result. '''
+    copied: dict[ __.Path, __.Path ] = { }
+    skipped: dict[ __.Path, str ] = { }
+    renamed: dict[ __.Path, __.PathPair ] = { }
+    failed: dict[ __.Path, str ] = { }
+    warnings: list[ str ] = [ ]
+    novelties: dict[ _journals.Novelties | None, list[ __.Path ] ] = {
+        _journals.Novelties.New: [ ], _journals.Novelties.Changed: [ ] }
+    strategies: dict[ str, int ] = { }
+    duplicates: dict[ __.Path, __.cabc.Sequence[ str ] ] = { }
+    stages = dict.fromkeys( _ingestion.Stages, 0 )
+    for outcome in outcomes:
+        warnings.extend( outcome.warnings )
+        for stage in outcome.stages: stages[ stage ] += 1
+        if outcome.duplicates:
+            duplicates[ outcome.source ] = tuple( outcome.duplicates )
+        if outcome.copy_strategy is not None:
+            strategy = outcome.copy_strategy.value
+            strategies[ strategy ] = strategies.get( strategy, 0 ) + 1
+        if outcome.novelty in novelties:
+            novelties[ outcome.novelty ].append( outcome.source )
+        match outcome.disposition:
+            case _ingestion.Dispositions.Copied:
+                copied[ outcome.source ] = __.typx.cast(
+                    __.Path, outcome.destination )
+            case _ingestion.Dispositions.Renamed:
+                renamed[ outcome.source ] = __.typx.cast(
+                    __.PathPair, ( outcome.original, outcome.destination ) )
+            case _ingestion.Dispositions.Skipped:
+                skipped[ outcome.source ] = outcome.reason
+            case _ingestion.Dispositions.Failed:
+                failed[ outcome.source ] = outcome.reason
+    return IngestResult(
+        copied = __.immut.Dictionary( copied ),
+        skipped = __.immut.Dictionary( skipped ),
+        renamed = __.immut.Dictionary( renamed ),
+        failed = __.immut.Dictionary( failed ),
+        warnings = tuple( warnings ),
+        new = tuple( novelties[ _journals.Novelties.New ] ),
+        changed = tuple( novelties[ _journals.Novelties.Changed ] ),
+        copy_strategies = __.immut.Dictionary( sorted( strategies.items( ) ) ),
+        duplicates = __.immut.Dictionary( duplicates ),
+        stages = __.immut.Dictionary(
+            ( stage.value, count ) for stage, count in stages.items( )
+            if count ),
+        metrics = _summarize_instruments( instruments ),
+    )
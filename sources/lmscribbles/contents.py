@@ -0,0 +1,92 @@
+# vim: set filetype=python fileencoding=utf-8:
+# -*- coding: utf-8 -*-
+
+#============================================================================#
+#                                                                            #
+#  Licensed under the Apache License, Version 2.0 (the "License");           #
+#  you may not use this file except in compliance with the License.          #
+#  You may obtain a copy of the License at                                   #
+#                                                                            #
+#      http://www.apache.org/licenses/LICENSE-2.0                            #
+#                                                                            #
+#  Unless required by applicable law or agreed to in writing, software       #
+#  distributed under the License is distributed on an "AS IS" BASIS,         #
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.  #
+#  See the License for the specific language governing permissions and       #
+#  limitations under the License.                                            #
+#                                                                            #
+#============================================================================#
+
+
+
+''' Reading and hashing of file contents. '''
+
+
+from hashlib import sha256 as _sha256
+
+from . import __
+from . import exceptions as _exceptions
+
+
+_CHUNK_SIZE = 1 << 20
+
+
+class FileContent( __.immut.DataclassObject ):
+    ''' Hash, size, and modification time of file content, as read.
+
+        Processing stages rely on these to confirm that they act on the
+        content which was hashed, without holding the content itself.
+    '''
+
+    file_path: __.Path
+    content_hash: str
+    size: int
+    mtime_ns: int | None = None
+
+
+def compute_hash( file_path: __.Path ) -> str:
+    ''' Computes SHA-256 hash of file contents. '''
+    hasher = _sha256( )
+    with file_path.open( 'rb' ) as file:
+        while chunk := file.read( _CHUNK_SIZE ):
+            hasher.update( chunk )
+    return hasher.hexdigest( )
+
+
+def read_content( file_path: __.Path ) -> FileContent:
+    ''' Streams file through hasher in chunks of fixed size.
+
+        At most one chunk per reader is held in memory, regardless of size
+        of file. Modification time is taken before reading, so that later
+        copies from file can detect whether it changed since it was read.
+    '''
+    hasher = _sha256( )
+    size = 0
+    with file_path.open( 'rb' ) as file:
+        mtime_ns = __.os.fstat( file.fileno( ) ).st_mtime_ns
+        while chunk := file.read( _CHUNK_SIZE ):
+            hasher.update( chunk )
+            size += len( chunk )
+    return FileContent(
+        file_path = file_path,
+        content_hash = hasher.hexdigest( ),
+        size = size,
+        mtime_ns = mtime_ns )
+
+
+def stream_content(
+    content: FileContent,
+    source: __.typx.BinaryIO,
+    target: __.typx.BinaryIO,
+) -> None:
+    ''' Streams source to target in chunks of fixed size, hashing them.
+
+        Raises ContentChangeFailure, if streamed content does not have hash
+        of content as read, such as when source changed since it was read.
+    '''
+    hasher = _sha256( )
+    while chunk := source.read( _CHUNK_SIZE ):
+        hasher.update( chunk )
+        target.write( chunk )
+    if hasher.hexdigest( ) != content.content_hash:
+        raise _exceptions.ContentChangeFailure( str( content.file_path ) )
@@ -0,0 +1,159 @@
+# vim: set filetype=python fileencoding=utf-8:
+# -*- coding: utf-8 -*-
+
+#============================================================================#
+#                                                                            #
+#  Licensed under the Apache License, Version 2.0 (the "License");           #
+#  you may not use this file except in compliance with the License.          #
+#  You may obtain a copy of the License at                                   #
+#                                                                            #
+#      http://www.apache.org/licenses/LICENSE-2.0                            #
+#                                                                            #
+#  Unless required by applicable law or agreed to in writing, software       #
+#  distributed under the License is distributed on an "AS IS" BASIS,         #
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.  #
+#  See the License for the specific language governing permissions and       #
+#  limitations under the License.                                            #
+#                                                                            #
+#============================================================================#
+
+
+
+''' Copying of file contents with zero-copy strategies. '''
+
+
+from errno import EBADF as _EBADF
+from errno import EINVAL as _EINVAL
+from errno import ENOSYS as _ENOSYS
+from errno import ENOTTY as _ENOTTY
+from errno import EOPNOTSUPP as _EOPNOTSUPP
+from errno import EPERM as _EPERM
+from errno import EXDEV as _EXDEV
+
+from . import __
+from . import contents as _contents
+from . import exceptions as _exceptions
+
+
+# Copier of content between file descriptors: source, target, size
+_Copier: __.typx.TypeAlias = __.cabc.Callable[ [ int, int, int ], None ]
+
+
+# Linux ioctl request to share extents of one file with another.
+_FICLONE = 0x40049409
+# Failures which mean that strategy is unavailable for pair of files.
+_UNSUPPORTED = frozenset( (
+    _EBADF, _EINVAL, _ENOSYS, _ENOTTY, _EOPNOTSUPP, _EPERM, _EXDEV ) )
+
+
+class CopyStrategies( __.enum.Enum ):
+    ''' Strategies for copying file content, in order of preference. '''
+
+    Hardlink = 'hardlink'
+    Reflink = 'reflink'
+    CopyFileRange = 'copy_file_range'
+    Sendfile = 'sendfile'
+    Buffered = 'buffered'
+
+
+def copy_content(
+    content: _contents.FileContent, destination: __.Path
+) -> CopyStrategies:
+    ''' Copies content of source file to destination.
+
+        Tries, in order: reflink of source file via 'FICLONE', which
+        shares extents on copy-on-write filesystems, such as Btrfs and
+        XFS; in-kernel copy via 'copy_file_range'; in-kernel copy via
+        'sendfile'; and, as last resort, streamed copy in chunks of fixed
+        size. In-kernel strategies are used only if size and modification
+        time of source file match those of the content as read, which
+        guarantees that destination holds the hashed content. Streamed
+        copy is hashed as it is written and fails if the hash differs.
+        Returns strategy which succeeded. Destination is removed, if
+        streamed copy fails.
+    '''
+    with (
+        content.file_path.open( 'rb' ) as source,
+        destination.open( 'wb' ) as target,
+    ):
+        strategy = _copy_from_source( content, source, target )
+        if strategy is not None: return strategy
+        try: _contents.stream_content( content, source, target )
+        except _exceptions.ContentChangeFailure:
+            destination.unlink( missing_ok = True )
+            raise
+    return CopyStrategies.Buffered
+
+
+def _copy_from_source(
+    content: _contents.FileContent,
+    source: __.typx.BinaryIO,
+    target: __.typx.BinaryIO,
+) -> CopyStrategies | None:
+    ''' Copies in kernel, if source still holds content as read. '''
+    if content.mtime_ns is None: return None
+    stat = __.os.fstat( source.fileno( ) )
+    if stat.st_size != content.size or stat.st_mtime_ns != content.mtime_ns:
+        return None
+    for strategy, copier in _produce_copiers( ):
+        if _attempt_copy( copier, source, target, content.size ):
+            return strategy
+    return None
+
+
+def _attempt_copy(
+    copier: _Copier,
+    source: __.typx.BinaryIO,
+    target: __.typx.BinaryIO,
+    size: int,
+) -> bool:
+    ''' Attempts copy. Discards partial copy if strategy is unsupported. '''
+    try: copier( source.fileno( ), target.fileno( ), size )
+    except OSError as exception:
+        if exception.errno not in _UNSUPPORTED: raise
+        target.seek( 0 )
+        target.truncate( )
+        return False
+    return True
+
+
+def _clone( source: int, target: int, size: int ) -> None:
+    from fcntl import ioctl
+    ioctl( target, _FICLONE, source )
+
+
+def _copy_file_range( source: int, target: int, size: int ) -> None:
+    offset = 0
+    while offset < size:
+        count = __.os.copy_file_range(
+            source, target, size - offset, offset, offset )
+        if not count: break
+        offset += count
+    _confirm_size( target, size )
+
+
+def _produce_copiers( ) -> tuple[ tuple[ CopyStrategies, _Copier ], ... ]:
+    ''' Produces copiers available on platform, in order of preference. '''
+    copiers: list[ tuple[ CopyStrategies, _Copier ] ] = [ ]
+    if __.sys.platform.startswith( 'linux' ):
+        copiers.append( ( CopyStrategies.Reflink, _clone ) )
+    if hasattr( __.os, 'copy_file_range' ):
+        copiers.append( ( CopyStrategies.CopyFileRange, _copy_file_range ) )
+    if __.sys.platform.startswith( 'linux' ):
+        copiers.append( ( CopyStrategies.Sendfile, _sendfile ) )
+    return tuple( copiers )
+
+
+def _sendfile( source: int, target: int, size: int ) -> None:
+    offset = 0
+    while offset < size:
+        count = __.os.sendfile( target, source, offset, size - offset )
+        if not count: break
+        offset += count
+    _confirm_size( target, size )
+
+
+def _confirm_size( target: int, size: int ) -> None:
+    ''' Treats short copy, as from shrunken source, as unsupported. '''
+    if __.os.fstat( target ).st_size != size:
+        raise OSError( _EINVAL, 'Short copy' )
@@ -0,0 +1,234 @@
+# vim: set filetype=python fileencoding=utf-8:
+# -*- coding: utf-8 -*-
+
+#============================================================================#
+#                                                                            #
+#  Licensed under the Apache License, Version 2.0 (the "License");           #
+#  you may not use this file except in compliance with the License.          #
+#  You may obtain a copy of the License at                                   #
+#                                                                            #
+#      http://www.apache.org/licenses/LICENSE-2.0                            #
+#                                                                            #
+#  Unless required by applicable law or agreed to in writing, software       #
+#  distributed under the License is distributed on an "AS IS" BASIS,         #
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.  #
+#  See the License for the specific language governing permissions and       #
+#  limitations under the License.                                            #
+#                                                                            #
+#============================================================================#
+
+
+
+''' Generation of synthetic scribble corpora for benchmarks.
+
+    Corpora are modeled on the mix of files in real archives of scribbles:
+    mostly small test and debug scripts, with Sphinx HTML samples, JSON
+    artifacts, notes, and shell scripts. Some files have planted secrets
+    and some duplicate the content of others under different names.
+    Generation is deterministic for a given seed.
+'''
+
+
+from random import Random as _Random
+
+from . import __
+
+
+# Name prefix, suffix, and relative weight of each kind of file
+_KINDS: tuple[ tuple[ str, str, float ], ... ] = (
+    ( 'test', '.py', 0.50 ),
+    ( 'debug', '.py', 0.18 ),
+    ( 'analyze', '.py', 0.04 ),
+    ( 'sample', '.html', 0.12 ),
+    ( 'results', '.json', 0.07 ),
+    ( 'notes', '.md', 0.05 ),
+    ( 'run', '.sh', 0.02 ),
+    ( 'output', '.txt', 0.02 ),
+)
+_HTML_SIZE_RANGE = ( 30_000, 70_000 )
+_THEMES = ( 'furo', 'pydata', 'rtd', 'alabaster' )
+_WORDS = (
+    'archive', 'buffer', 'cache', 'config', 'content', 'detect', 'digest',
+    'entry', 'fixture', 'format', 'handler', 'index', 'inventory', 'journal',
+    'loader', 'manifest', 'module', 'object', 'parser', 'path', 'payload',
+    'probe', 'project', 'record', 'render', 'result', 'scanner', 'schema',
+    'search', 'session', 'source', 'stream', 'target', 'theme', 'token',
+    'value', 'window', 'worker',
+)
+
+DUPLICATES_FRACTION = 0.05
+SECRETS_FRACTION = 0.01
+
+
+class CorpusSummary( __.immut.DataclassObject ):
+    ''' Counts and total size of files in generated corpus. '''
+
+    files: int
+    size: int
+    duplicates: int
+    secrets: int
+    kinds: __.immut.Dictionary[ str, int ]
+
+    def render_as_dictionary( self ) -> dict[ str, __.typx.Any ]:
+        ''' Renders summary as dictionary for serialization. '''
+        return {
+            'files': self.files,
+            'bytes': self.size,
+            'duplicates': self.duplicates,
+            'secrets': self.secrets,
+            'kinds': dict( self.kinds ),
+        }
+
+
+def generate_corpus(
+    directory: __.Path, files: int, seed: int = 0
+) -> CorpusSummary:
+    ''' Generates corpus with number of files in directory.
+
+        HTML samples are placed in subdirectories by theme. Other files
+        are placed directly in the directory, as in real scribbles.
+    '''
+    random = _Random( seed )  # noqa: S311
+    directory.mkdir( parents = True, exist_ok = True )
+    for theme in _THEMES: ( directory / theme ).mkdir( exist_ok = True )
+    prefixes = tuple( kind[ 0 ] for kind in _KINDS )
+    weights = tuple( kind[ 2 ] for kind in _KINDS )
+    suffixes = { kind[ 0 ]: kind[ 1 ] for kind in _KINDS }
+    kinds = dict.fromkeys( prefixes, 0 )
+    written: list[ bytes ] = [ ]
+    size = duplicates = secrets = 0
+    for index in range( files ):
+        prefix, = random.choices( prefixes, weights )
+        name = f"{prefix}_{random.choice( _WORDS )}_{index}"
+        file_path = directory / f"{name}{suffixes[ prefix ]}"
+        if 'sample' == prefix:
+            file_path = directory / random.choice( _THEMES ) / file_path.name
+        if written and random.random( ) < DUPLICATES_FRACTION:
+            content = random.choice( written )
+            duplicates += 1
+        else:
+            planted = random.random( ) < SECRETS_FRACTION
+            content = _produce_content( random, prefix, name, planted )
+            secrets += planted
+            if len( written ) < 256: written.append( content )  # noqa: PLR2004
+        file_path.write_bytes( content )
+        kinds[ prefix ] += 1
+        size += len( content )
+    return CorpusSummary(
+        files = files,
+        size = size,
+        duplicates = duplicates,
+        secrets = secrets,
+        kinds = __.immut.Dictionary( kinds ) )
+
+
+def _produce_content(
+    random: _Random, prefix: str, name: str, planted: bool
+) -> bytes:
+    secret = _produce_secret( random ) if planted else ''
+    match prefix:
+        case 'sample': text = _produce_html( random, name )
+        case 'results': text = _produce_json( random, name, secret )
+        case 'notes' | 'output': text = _produce_prose( random, name, secret )
+        case 'run': text = _produce_shell( random, name, secret )
+        case _: text = _produce_script( random, prefix, secret )
+    return text.encode( )
+
+
+def _produce_html( random: _Random, name: str ) -> str:
+    target = random.randint( *_HTML_SIZE_RANGE )
+    parts = [
+        '<!DOCTYPE html>\n<html lang="en">\n<head>\n'
+        f'<meta charset="utf-8" />\n<title>{name} &#8212; Documentation'
+        '</title>\n<link rel="stylesheet" href="_static/pygments.css" />\n'
+        '</head>\n<body>\n<div class="document">\n'
+        '<div class="body" role="main">\n' ]
+    size = len( parts[ 0 ] )
+    while size < target:
+        identifier = f"{random.choice( _WORDS )}-{random.choice( _WORDS )}"
+        section = (
+            f'<section id="{identifier}">\n'
+            f'<h2>{identifier}<a class="headerlink" href="#{identifier}">'
+            '&#182;</a></h2>\n'
+            f'<p>{_produce_sentence( random, 40 )}</p>\n'
+            '<dl class="py function">\n'
+            f'<dt class="sig sig-object py" id="{identifier}">'
+            f'<span class="sig-name descname">{identifier}</span>'
+            '<span class="sig-paren">(</span><em class="sig-param">'
+            '<span class="n">value</span></em>'
+            '<span class="sig-paren">)</span></dt>\n'
+            f'<dd><p>{_produce_sentence( random, 24 )}</p></dd>\n'
+            '</dl>\n</section>\n' )
+        parts.append( section )
+        size += len( section )
+    parts.append( '</div>\n</div>\n</body>\n</html>\n' )
+    return ''.join( parts )
+
+
+def _produce_json( random: _Random, name: str, secret: str ) -> str:
+    from json import dumps
+    entries: dict[ str, __.typx.Any ] = {
+        f"{random.choice( _WORDS )}_{index}": {
+            'count': random.randint( 0, 1000 ),
+            'ratio': round( random.random( ), 4 ),
+            'tags': random.sample( _WORDS, 3 ),
+        }
+        for index in range( random.randint( 4, 60 ) ) }
+    data: dict[ str, __.typx.Any ] = { 'name': name, 'entries': entries }
+    if secret: data[ 'api_key' ] = secret
+    return dumps( data, indent = 2 )
+
+
+def _produce_prose( random: _Random, name: str, secret: str ) -> str:
+    lines = [ f"# {name}", '' ]
+    lines.extend(
+        _produce_sentence( random, random.randint( 8, 30 ) )
+        for _ in range( random.randint( 4, 40 ) ) )
+    if secret: lines.append( f"token: {secret}" )
+    return '\n'.join( lines ) + '\n'
+
+
+def _produce_script( random: _Random, prefix: str, secret: str ) -> str:
+    lines = [
+        '#!/usr/bin/env python3',
+        f'""" {_produce_sentence( random, 8 )} """',
+        '',
+        'import sys',
+        '',
+    ]
+    if secret: lines.extend( ( f'API_KEY = "{secret}"', '' ) )
+    function = prefix
+    for _ in range( random.randint( 1, 8 ) ):
+        function = f"{prefix}_{random.choice( _WORDS )}"
+        lines.extend( (
+            f"def {function}( ):",
+            f'    """ {_produce_sentence( random, 10 )} """',
+            f"    values = {random.sample( range( 1000 ), 5 )}",
+            '    for value in values:',
+            f"        print( f\"{random.choice( _WORDS )}: {{value}}\" )",
+            '    return sum( values )',
+            '', '' ) )
+    lines.extend( (
+        "if __name__ == '__main__':", f"    sys.exit( {function}( ) )" ) )
+    return '\n'.join( lines ) + '\n'
+
+
+def _produce_secret( random: _Random ) -> str:
+    ''' Produces value which secret detectors flag, as AWS access key. '''
+    alphabet = 'ABCDEFGHIJKLMNOPQRSTUVWXYZ234567'
+    return 'AKIA' + ''.join( random.choices( alphabet, k = 16 ) )
+
+
+def _produce_sentence( random: _Random, count: int ) -> str:
+    return ' '.join( random.choices( _WORDS, k = count ) ).capitalize( ) + '.'
+
+
+def _produce_shell( random: _Random, name: str, secret: str ) -> str:
+    lines = [ '#!/usr/bin/env bash', 'set -eu', '' ]
+    if secret: lines.append( f"export AWS_ACCESS_KEY_ID={secret}" )
+    lines.extend(
+        f"python3 {random.choice( _WORDS )}_{index}.py "
+        f"--{random.choice( _WORDS )} \"$@\""
+        for index in range( random.randint( 1, 12 ) ) )
+    lines.append( f"echo 'done: {name}'" )
+    return '\n'.join( lines ) + '\n'
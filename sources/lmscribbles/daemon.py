@@ -0,0 +1,223 @@
+# vim: set filetype=python fileencoding=utf-8:
+# -*- coding: utf-8 -*-
+
+#============================================================================#
+#                                                                            #
+#  Licensed under the Apache License, Version 2.0 (the "License");           #
+#  you may not use this file except in compliance with the License.          #
+#  You may obtain a copy of the License at                                   #
+#                                                                            #
+#      http://www.apache.org/licenses/LICENSE-2.0                            #
+#                                                                            #
+#  Unless required by applicable law or agreed to in writing, software       #
+#  distributed under the License is distributed on an "AS IS" BASIS,         #
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.  #
+#  See the License for the specific language governing permissions and       #
+#  limitations under the License.                                            #
+#                                                                            #
+#============================================================================#
+
+
+
+''' Long-lived process which serves commands with warm resources. '''
+
+
+from asyncio import Event as _Event
+from asyncio import StreamReader as _StreamReader
+from asyncio import StreamWriter as _StreamWriter
+from json import dumps as _json_dumps
+from json import loads as _json_loads
+
+from . import __
+from . import cli as _cli
+from . import exceptions as _exceptions
+from . import retention as _retention
+
+
+class ServeResult( __.immut.DataclassObject ):
+    ''' Summary of session of daemon. '''
+
+    socket_path: __.Path
+    requests: int
+
+    def render_as_json( self ) -> str:
+        ''' Renders result as JSON string. '''
+        data: dict[ str, __.typx.Any ] = {
+            'socket_path': str( self.socket_path ),
+            'requests': self.requests,
+        }
+        return _json_dumps( data, indent = 2 )
+
+    def render_as_text( self ) -> str:
+        ''' Renders result as human-readable text. '''
+        return (
+            f"Served {self.requests} requests on socket {self.socket_path}" )
+
+
+class ServeCommand( __.immut.DataclassObject ):
+    ''' Serves commands on Unix socket with warm scanners and indexes.
+
+        Executes subcommands forwarded by thin clients from the same
+        working directory, one at a time. Secret scanners, with their
+        worker pools and plugin settings, content indexes, and manifests
+        of projects are retained between commands, so that each command
+        starts warm. Stops on interrupt or termination signal.
+    '''
+
+    socket_path: __.typx.Annotated[
+        __.Location,
+        __.tyro.conf.arg( prefix_name = False ),
+        __.ddoc.Doc( ''' Path of Unix socket on which to listen. ''' ),
+    ] = _cli.DAEMON_SOCKET_DEFAULT
+
+    async def __call__( self ) -> ServeResult:
+        ''' Executes serve command. '''
+        from asyncio import get_running_loop
+        from signal import SIGINT, SIGTERM
+        loop = get_running_loop( )
+        stopped = _Event( )
+        signals = ( SIGINT, SIGTERM )
+        for signal in signals: loop.add_signal_handler( signal, stopped.set )
+        try: return await self.serve( stopped )
+        finally:
+            for signal in signals: loop.remove_signal_handler( signal )
+
+    async def serve( self, stopped: _Event ) -> ServeResult:
+        ''' Serves commands until event is set.
+
+            Command in progress, if any, is completed before retained
+            resources are released.
+        '''
+        from asyncio import start_unix_server, to_thread
+        socket_path = __.Path( self.socket_path )
+        await to_thread( _clear_socket, socket_path )
+        async with _retention.Retainer( ) as retainer:
+            session = _Session( __.Path.cwd( ), retainer )
+            server = await start_unix_server( session, path = socket_path )
+            try:
+                async with server: await stopped.wait( )
+                await session.conclude( )
+            finally: socket_path.unlink( missing_ok = True )
+        return ServeResult(
+            socket_path = socket_path, requests = session.requests )
+
+
+class _Session( __.immut.Object, instances_mutables = ( 'requests', ) ):
+    ''' Handles connections of clients to daemon. '''
+
+    directory: __.Path
+    requests: int
+    retainer: _retention.Retainer
+
+    def __init__(
+        self, directory: __.Path, retainer: _retention.Retainer
+    ) -> None:
+        from asyncio import Lock
+        self.directory = directory
+        self.requests = 0
+        self.retainer = retainer
+        self._lock = Lock( )
+
+    async def __call__(
+        self, reader: _StreamReader, writer: _StreamWriter
+    ) -> None:
+        try: await self._respond( reader, writer )
+        except OSError: pass  # Client disconnected.
+        finally:
+            writer.close( )
+            with __.ctxl.suppress( OSError ): await writer.wait_closed( )
+
+    async def conclude( self ) -> None:
+        ''' Waits for command in progress, if any, to complete. '''
+        async with self._lock: pass
+
+    async def _execute(
+        self, arguments: list[ str ], writer: _StreamWriter
+    ) -> int | None:
+        ''' Parses and executes command, relaying its output.
+
+            Returns None, without output, if command is not one which
+            daemon executes.
+        '''
+        from contextlib import redirect_stderr, redirect_stdout
+        from io import StringIO
+        stdout, stderr = StringIO( ), StringIO( )
+        try:
+            with redirect_stdout( stdout ), redirect_stderr( stderr ):
+                cli = _cli.parse_cli( arguments )
+        except SystemExit as termination:
+            code = termination.code
+            return code if isinstance( code, int ) else int( bool( code ) )
+        finally:
+            for line in stdout.getvalue( ).splitlines( ):
+                _reply( writer, stdout = line )
+            for line in stderr.getvalue( ).splitlines( ):
+                _reply( writer, stderr = line )
+        if not _cli.is_forwardable( cli.command ): return None
+        with _retention.retaining( self.retainer ):
+            try:
+                await _cli.execute_command(
+                    cli.command, cli.display_format,
+                    lambda text: _reply( writer, stdout = text ) )
+            except _exceptions.Omnierror as exception:
+                _reply( writer, stderr = exception.render_as_text( ) )
+                return 1
+            except Exception as exception:
+                _reply( writer, stderr = str( exception ) )
+                return 1
+        return 0
+
+    async def _respond(
+        self, reader: _StreamReader, writer: _StreamWriter
+    ) -> None:
+        try: request = _json_loads( await reader.readline( ) )
+        except ValueError: return
+        arguments = _parse_request( request, self.directory )
+        if isinstance( arguments, str ):
+            _reply( writer, declined = arguments )
+            await writer.drain( )
+            return
+        async with self._lock:
+            status = await self._execute( arguments, writer )
+            if status is not None: self.requests += 1
+        if status is None: _reply( writer, declined = 'command not served' )
+        else: _reply( writer, status = status )
+        await writer.drain( )
+
+
+def _clear_socket( socket_path: __.Path ) -> None:
+    ''' Removes stale socket. Raises conflict if daemon serves on it. '''
+    import socket
+    if not socket_path.exists( ):
+        socket_path.parent.mkdir( parents = True, exist_ok = True )
+        return
+    connection = socket.socket( socket.AF_UNIX, socket.SOCK_STREAM )
+    with connection:
+        try: connection.connect( str( socket_path ) )
+        except OSError:
+            socket_path.unlink( missing_ok = True )
+            return
+    raise _exceptions.DaemonConflict( str( socket_path ) )
+
+
+def _parse_request(
+    request: __.typx.Any, directory: __.Path
+) -> list[ str ] | str:
+    ''' Parses request into arguments. Else, returns reason to decline.
+
+        Requests from other working directories are declined, since
+        relative paths in their arguments and defaults would resolve
+        differently in the daemon.
+    '''
+    try:
+        arguments = [
+            str( argument ) for argument in request[ 'arguments' ] ]
+        requester_directory = __.Path( request[ 'directory' ] )
+    except ( KeyError, TypeError, ValueError ): return 'malformed request'
+    if requester_directory != directory:
+        return f"directory not served: {requester_directory}"
+    return arguments
+
+
+def _reply( writer: _StreamWriter, **fields: __.typx.Any ) -> None:
+    writer.write( _json_dumps( fields ).encode( ) + b'\n' )
@@ -0,0 +1,278 @@
+# vim: set filetype=python fileencoding=utf-8:
+# -*- coding: utf-8 -*-
+
+#============================================================================#
+#                                                                            #
+#  Licensed under the Apache License, Version 2.0 (the "License");           #
+#  you may not use this file except in compliance with the License.          #
+#  You may obtain a copy of the License at                                   #
+#                                                                            #
+#      http://www.apache.org/licenses/LICENSE-2.0                            #
+#                                                                            #
+#  Unless required by applicable law or agreed to in writing, software       #
+#  distributed under the License is distributed on an "AS IS" BASIS,         #
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.  #
+#  See the License for the specific language governing permissions and       #
+#  limitations under the License.                                            #
+#                                                                            #
+#============================================================================#
+
+
+
+''' Discovery of source files under source paths. '''
+
+
+from re import compile as _re_compile
+from re import escape as _re_escape
+
+from . import __
+from . import exceptions as _exceptions
+
+
+# Base path and file path tuple for preserving directory structure
+SourceFileTuple: __.typx.TypeAlias = tuple[ __.Path, __.Path ]
+# Directory, relative to base path, and matcher for its ignore file
+_Scope: __.typx.TypeAlias = tuple[ str, 'PathMatcher' ]
+
+
+EXCLUDES_DEFAULT = (
+    '.gitignore', '__pycache__/', '.venv/', 'node_modules/' )
+IGNORE_FILE_NAME = '.gitignore'
+SCRIBBLES_DIRECTORY = '.auxiliary/scribbles'
+
+
+class PathMatcher( __.immut.Object ):
+    ''' Matcher for paths compiled from glob patterns.
+
+        Patterns follow '.gitignore' semantics: a pattern without a slash
+        matches names at any depth, a pattern with a leading or inner
+        slash is anchored to the base path, a trailing slash restricts a
+        pattern to directories, '**' spans directories, and a leading '!'
+        negates a pattern. The last matching pattern decides. All patterns
+        are compiled into one regular expression, in reverse order, so
+        that a single match finds the last matching pattern.
+    '''
+
+    negations: frozenset[ str ]
+
+    def __init__( self, patterns: __.cabc.Iterable[ str ] ) -> None:
+        alternatives: list[ str ] = [ ]
+        negations: set[ str ] = set( )
+        for index, pattern in enumerate( patterns ):
+            translation = _translate_pattern( pattern )
+            if translation is None: continue
+            expression, negated = translation
+            group = f"p{index}"
+            if negated: negations.add( group )
+            alternatives.append( f"(?P<{group}>{expression})" )
+        alternatives.reverse( )
+        self.negations = frozenset( negations )
+        self._expression = (
+            _re_compile( '|'.join( alternatives ) ) if alternatives
+            else None )
+
+    def __bool__( self ) -> bool: return self._expression is not None
+
+    def match( self, path: str, is_directory: bool ) -> bool | None:
+        ''' Matches relative path, with forward slashes, against patterns.
+
+            Returns ``None`` if no pattern matches, ``False`` if the last
+            matching pattern is negated, and ``True`` otherwise.
+        '''
+        if self._expression is None: return None
+        if is_directory: path = f"{path}/"
+        matched = self._expression.fullmatch( path )
+        if matched is None: return None
+        return matched.lastgroup not in self.negations
+
+
+class DiscoveryFilter( __.immut.DataclassObject ):
+    ''' Inclusion and exclusion criteria for discovery of source files.
+
+        Excluded directories are pruned before descent. Exclusion patterns
+        add to the default exclusions, unless these are disabled, and
+        follow them, so that negated patterns can override them. If any
+        inclusion patterns are supplied, then only files which match at
+        least one of them are discovered. Ignore files are honored, if
+        requested, relative to the directories which contain them.
+    '''
+
+    includes: __.cabc.Sequence[ str ] = ( )
+    excludes: __.cabc.Sequence[ str ] = ( )
+    default_excludes: bool = True
+    honor_ignores: bool = False
+
+    def produce_matchers( self ) -> tuple[ PathMatcher, PathMatcher ]:
+        ''' Compiles inclusion and exclusion matchers. '''
+        excludes = tuple( self.excludes )
+        if self.default_excludes: excludes = ( *EXCLUDES_DEFAULT, *excludes )
+        return PathMatcher( self.includes ), PathMatcher( excludes )
+
+
+def discover_source_files(
+    source_paths: __.cabc.Sequence[ __.Location ],
+    criteria: DiscoveryFilter | None = None,
+) -> __.cabc.Iterator[ SourceFileTuple ]:
+    ''' Discovers all source files with their base paths.
+
+        Returns tuples of (base_path, file_path) where base_path is used
+        to calculate relative paths for preserving directory structure.
+        Directories are walked with 'os.scandir', in name order, and the
+        file type information of each directory entry is reused rather
+        than statting each path again. Symbolic links to directories are
+        not followed. Unreadable subdirectories are skipped.
+    '''
+    if criteria is None: criteria = DiscoveryFilter( )
+    includes, excludes = criteria.produce_matchers( )
+    for location in source_paths:
+        path = __.Path( location )
+        if path.is_file( ):
+            if not _is_excluded( path.name, False, excludes, ( ) ):
+                yield ( path.parent, path )
+        elif path.is_dir( ):
+            walker = _Walker(
+                path, includes, excludes, criteria.honor_ignores )
+            yield from walker.walk( )
+        else:
+            raise _exceptions.FileIngestionFailure( str( path ) )
+
+
+def discover_projects( root: __.Path ) -> dict[ str, __.Path ]:
+    ''' Maps names of projects under root to their scribbles directories.
+
+        A project is a directory immediately under root which contains a
+        scribbles directory.
+    '''
+    projects: dict[ str, __.Path ] = { }
+    for entry in _scan_directory( root ):
+        if not entry.is_dir( ): continue
+        scribbles = __.Path( entry.path ) / SCRIBBLES_DIRECTORY
+        if scribbles.is_dir( ): projects[ entry.name ] = scribbles
+    return projects
+
+
+class _Walker( __.immut.Object ):
+    ''' Walker of directory tree under base path. '''
+
+    def __init__(
+        self,
+        base: __.Path,
+        includes: PathMatcher,
+        excludes: PathMatcher,
+        honor_ignores: bool,
+    ) -> None:
+        self.base = base
+        self.includes = includes
+        self.excludes = excludes
+        self.honor_ignores = honor_ignores
+
+    def walk( self ) -> __.cabc.Iterator[ SourceFileTuple ]:
+        ''' Walks tree depth-first, yielding discovered files. '''
+        pending: list[ tuple[ str, tuple[ _Scope, ... ] ] ] = [ ( '', ( ) ) ]
+        while pending:
+            relative, scopes = pending.pop( )
+            directory = self.base / relative if relative else self.base
+            if self.honor_ignores:
+                scopes = _extend_scopes( directory, relative, scopes )
+            subdirectories: list[ str ] = [ ]
+            for entry in _scan_directory( directory ):
+                entry_relative = (
+                    f"{relative}/{entry.name}" if relative else entry.name )
+                if entry.is_dir( follow_symlinks = False ):
+                    if not _is_excluded(
+                        entry_relative, True, self.excludes, scopes
+                    ): subdirectories.append( entry_relative )
+                elif entry.is_file( ) and self._admits(
+                    entry_relative, scopes
+                ): yield ( self.base, __.Path( entry.path ) )
+            pending.extend(
+                ( subdirectory, scopes )
+                for subdirectory in reversed( subdirectories ) )
+
+    def _admits( self, relative: str, scopes: tuple[ _Scope, ... ] ) -> bool:
+        if _is_excluded( relative, False, self.excludes, scopes ):
+            return False
+        return not self.includes or bool(
+            self.includes.match( relative, False ) )
+
+
+def _extend_scopes(
+    directory: __.Path, relative: str, scopes: tuple[ _Scope, ... ]
+) -> tuple[ _Scope, ... ]:
+    ''' Adds matcher for ignore file in directory, if there is one. '''
+    try: text = ( directory / IGNORE_FILE_NAME ).read_text( )
+    except ( OSError, UnicodeDecodeError ): return scopes
+    matcher = PathMatcher( text.splitlines( ) )
+    if not matcher: return scopes
+    return ( *scopes, ( relative, matcher ) )
+
+
+def _is_excluded(
+    relative: str,
+    is_directory: bool,
+    excludes: PathMatcher,
+    scopes: tuple[ _Scope, ... ],
+) -> bool:
+    ''' Decides exclusion by explicit patterns, then ignore files. '''
+    if excludes.match( relative, is_directory ): return True
+    for directory, matcher in reversed( scopes ):
+        scoped = relative[ len( directory ) + 1 : ] if directory else relative
+        decision = matcher.match( scoped, is_directory )
+        if decision is not None: return decision
+    return False
+
+
+def _scan_directory( directory: __.Path ) -> list[ __.os.DirEntry[ str ] ]:
+    try:
+        with __.os.scandir( directory ) as entries:
+            return sorted( entries, key = lambda entry: entry.name )
+    except OSError: return [ ]
+
+
+def _translate_glob( glob: str ) -> str:
+    ''' Translates glob, without '**' components, to regular expression. '''
+    parts: list[ str ] = [ ]
+    index, size = 0, len( glob )
+    while index < size:
+        character = glob[ index ]
+        index += 1
+        if '*' == character: parts.append( '[^/]*' )
+        elif '?' == character: parts.append( '[^/]' )
+        elif '\\' == character and index < size:
+            parts.append( _re_escape( glob[ index ] ) )
+            index += 1
+        elif '[' == character and ( end := glob.find( ']', index + 1 ) ) > 0:
+            members = glob[ index : end ].replace( '\\', '\\\\' )
+            if members.startswith( '!' ): members = f"^{members[ 1 : ]}"
+            parts.append( f"(?!/)[{members}]" )
+            index = end + 1
+        else: parts.append( _re_escape( character ) )
+    return ''.join( parts )
+
+
+def _translate_pattern( pattern: str ) -> tuple[ str, bool ] | None:
+    ''' Translates ignore pattern to regular expression and negation.
+
+        Returns ``None`` for blank lines and comments.
+    '''
+    pattern = pattern.rstrip( '\n\r' )
+    if not pattern.endswith( '\\ ' ): pattern = pattern.rstrip( ' ' )
+    if not pattern or pattern.startswith( '#' ): return None
+    negated = pattern.startswith( '!' )
+    if negated or pattern.startswith( ( '\\!', '\\#' ) ):
+        pattern = pattern[ 1 : ]
+    directory_only = pattern.endswith( '/' )
+    pattern = pattern.rstrip( '/' )
+    if not pattern: return None
+    anchored = '/' in pattern
+    components = pattern.lstrip( '/' ).split( '/' )
+    parts: list[ str ] = [ ] if anchored else [ '(?:.*/)?' ]
+    for index, component in enumerate( components ):
+        last = index == len( components ) - 1
+        if '**' == component:
+            parts.append( '.*' if last else '(?:.*/)?' )
+            continue
+        parts.append( _translate_glob( component ) )
+        if not last: parts.append( '/' )
+    parts.append( '/' if directory_only else '/?' )
+    return ''.join( parts ), negated
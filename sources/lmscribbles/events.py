@@ -0,0 +1,116 @@
+# vim: set filetype=python fileencoding=utf-8:
+# -*- coding: utf-8 -*-
+
+#============================================================================#
+#                                                                            #
+#  Licensed under the Apache License, Version 2.0 (the "License");           #
+#  you may not use this file except in compliance with the License.          #
+#  You may obtain a copy of the License at                                   #
+#                                                                            #
+#      http://www.apache.org/licenses/LICENSE-2.0                            #
+#                                                                            #
+#  Unless required by applicable law or agreed to in writing, software       #
+#  distributed under the License is distributed on an "AS IS" BASIS,         #
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.  #
+#  See the License for the specific language governing permissions and       #
+#  limitations under the License.                                            #
+#                                                                            #
+#============================================================================#
+
+
+
+''' Streaming of ingestion outcomes as event records. '''
+
+
+from . import __
+from . import ingestion as _ingestion
+
+
+# Event record, as serializable to one line of JSON
+Event: __.typx.TypeAlias = dict[ str, __.typx.Any ]
+# Consumer of event records, such as writer of JSON lines
+Emitter: __.typx.TypeAlias = __.cabc.Callable[ [ Event ], None ]
+
+
+class OutcomesStreamer(
+    __.immut.Object, instances_mutables = ( 'duplicated', 'warnings' )
+):
+    ''' Emits event records for ingestion outcomes and tallies them.
+
+        One event is emitted per outcome, named by its disposition, and
+        one event is emitted per warning of an outcome. Only counts are
+        retained, so memory does not grow with the number of outcomes.
+    '''
+
+    emitter: Emitter
+    project_name: str
+    dispositions: dict[ str, int ]
+    novelties: dict[ str, int ]
+    copy_strategies: dict[ str, int ]
+    stages: dict[ str, int ]
+    duplicated: int
+    warnings: int
+
+    def __init__( self, emitter: Emitter, project_name: str = '' ) -> None:
+        self.emitter = emitter
+        self.project_name = project_name
+        self.dispositions = dict.fromkeys(
+            ( disposition.value for disposition in _ingestion.Dispositions ),
+            0 )
+        self.novelties = { }
+        self.copy_strategies = { }
+        self.stages = { }
+        self.duplicated = 0
+        self.warnings = 0
+
+    def __call__( self, outcome: _ingestion.IngestOutcome ) -> None:
+        self.emitter( render_outcome_event( outcome, self.project_name ) )
+        for warning in outcome.warnings:
+            event = _produce_event( 'warning', self.project_name, outcome )
+            event[ 'message' ] = warning
+            self.emitter( event )
+        self.dispositions[ outcome.disposition.value ] += 1
+        self.warnings += len( outcome.warnings )
+        if outcome.duplicates: self.duplicated += 1
+        if outcome.novelty is not None:
+            _increment( self.novelties, outcome.novelty.value )
+        if outcome.copy_strategy is not None:
+            _increment( self.copy_strategies, outcome.copy_strategy.value )
+        for stage in outcome.stages: _increment( self.stages, stage.value )
+
+
+def render_outcome_event(
+    outcome: _ingestion.IngestOutcome, project_name: str = ''
+) -> Event:
+    ''' Renders ingestion outcome as event record.
+
+        Fields which are absent or empty for the outcome are omitted.
+    '''
+    event = _produce_event(
+        outcome.disposition.value, project_name, outcome )
+    paths = { 'destination': outcome.destination,
+              'original': outcome.original }
+    event.update(
+        ( name, str( path ) ) for name, path in paths.items( )
+        if path is not None )
+    if outcome.reason: event[ 'reason' ] = outcome.reason
+    if outcome.content_hash: event[ 'content_hash' ] = outcome.content_hash
+    if outcome.novelty is not None:
+        event[ 'novelty' ] = outcome.novelty.value
+    if outcome.copy_strategy is not None:
+        event[ 'copy_strategy' ] = outcome.copy_strategy.value
+    if outcome.duplicates: event[ 'duplicates' ] = list( outcome.duplicates )
+    return event
+
+
+def _increment( counts: dict[ str, int ], name: str ) -> None:
+    counts[ name ] = counts.get( name, 0 ) + 1
+
+
+def _produce_event(
+    name: str, project_name: str, outcome: _ingestion.IngestOutcome
+) -> Event:
+    event: Event = { 'event': name }
+    if project_name: event[ 'project' ] = project_name
+    event[ 'source' ] = str( outcome.source )
+    return event
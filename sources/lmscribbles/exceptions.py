@@ -45,6 +45,22 @@ class Omnierror( Omniexception, Exception ):
     ''' Base for error exceptions raised by package API. '''
 
 
+class ContentChangeFailure( Omnierror, OSError ):
+    ''' Content of file changed since it was hashed. '''
+
+    def render_as_text( self ) -> str:
+        ''' Renders exception with file path details. '''
+        return f"Content changed since it was hashed: {self}"
+
+
+class DaemonConflict( Omnierror, RuntimeError ):
+    ''' Daemon already serves on socket. '''
+
+    def render_as_text( self ) -> str:
+        ''' Renders exception with socket path details. '''
+        return f"Daemon already serves on socket: {self}"
+
+
 class DuplicateDetectionFailure( Omnierror, OSError ):
     ''' Duplicate detection failure. '''
 
@@ -97,3 +113,57 @@ class SecretDetectionFailure( Omnierror, RuntimeError ):
             'message': 'Failed to scan file for secrets',
         }
         return _json_dumps( data, indent = 2 )
+
+
+class LabelQueryInvalidity( Omnierror, ValueError ):
+    ''' Invalid label query. '''
+
+    def render_as_text( self ) -> str:
+        ''' Renders exception with query details. '''
+        return f"Invalid label query: {self}"
+
+
+class OptionsInvalidity( Omnierror, ValueError ):
+    ''' Invalid combination of command options. '''
+
+    def __init__( self, options: __.cabc.Sequence[ str ] ) -> None:
+        super( ).__init__(
+            ', '.join( f"--{option}" for option in options ) )
+
+    def render_as_text( self ) -> str:
+        ''' Renders exception with option details. '''
+        return f"Missing or conflicting options: {self}"
+
+
+class PatternInvalidity( Omnierror, ValueError ):
+    ''' Invalid regular expression. '''
+
+    def render_as_text( self ) -> str:
+        ''' Renders exception with pattern details. '''
+        return f"Invalid regular expression: {self}"
+
+
+class PlanInvalidity( Omnierror, ValueError ):
+    ''' Invalid ingestion plan. '''
+
+    def render_as_text( self ) -> str:
+        ''' Renders exception with file path details. '''
+        return f"Invalid ingestion plan: {self}"
+
+    def render_as_json( self ) -> str:
+        ''' Renders exception with file path details as JSON. '''
+        from json import dumps as _json_dumps
+        data: dict[ str, __.typx.Any ] = {
+            'exception': self.__class__.__name__,
+            'file_path': str( self ),
+            'message': 'Plan is malformed or of unsupported format',
+        }
+        return _json_dumps( data, indent = 2 )
+
+
+class ToolArgumentInvalidity( Omnierror, ValueError ):
+    ''' Missing or invalid argument to tool of MCP server. '''
+
+    def render_as_text( self ) -> str:
+        ''' Renders exception with argument details. '''
+        return f"Missing or invalid tool argument: {self}"
@@ -0,0 +1,173 @@
+# vim: set filetype=python fileencoding=utf-8:
+# -*- coding: utf-8 -*-
+
+#============================================================================#
+#                                                                            #
+#  Licensed under the Apache License, Version 2.0 (the "License");           #
+#  you may not use this file except in compliance with the License.          #
+#  You may obtain a copy of the License at                                   #
+#                                                                            #
+#      http://www.apache.org/licenses/LICENSE-2.0                            #
+#                                                                            #
+#  Unless required by applicable law or agreed to in writing, software       #
+#  distributed under the License is distributed on an "AS IS" BASIS,         #
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.  #
+#  See the License for the specific language governing permissions and       #
+#  limitations under the License.                                            #
+#                                                                            #
+#============================================================================#
+
+
+
+''' Archive-wide index of file contents. '''
+
+
+import sqlite3 as _sqlite3
+
+from threading import Lock as _Lock
+
+from . import __
+from . import discovery as _discovery
+from . import locations as _locations
+from . import manifests as _manifests
+
+
+# Project name and path, relative to project directory, of archive entry
+ArchiveEntry: __.typx.TypeAlias = tuple[ str, str ]
+# Project name, path, and content hash of archive entry
+IndexedEntry: __.typx.TypeAlias = tuple[ str, str, str ]
+
+
+class ContentIndex( __.immut.Object ):
+    ''' Persistent index from SHA-256 hash of content to archive entries.
+
+        Each archive entry, identified by project name and path relative to
+        project directory, maps to the hash of its content. Populated from
+        the existing archive by a survey, once, and by catalog rebuilds,
+        then updated incrementally, as entries are ingested, so that
+        whether content exists anywhere in the archive is one indexed
+        lookup. Entries removed from the archive by other means are
+        filtered out by callers which check existence. Safe for use from
+        multiple threads.
+    '''
+
+    file_path: __.Path
+
+    def __init__( self, file_path: __.Path ) -> None:
+        self.file_path = file_path
+        self._connection = _connect_index( file_path )
+        self._lock = _Lock( )
+
+    def __enter__( self ) -> __.typx.Self:
+        return self
+
+    def __exit__( self, *exc_info: __.typx.Any ) -> None:
+        with self._lock: self._connection.close( )
+
+    def locate( self, content_hash: str ) -> tuple[ ArchiveEntry, ... ]:
+        ''' Finds archive entries with content hash, in name order. '''
+        with self._lock:
+            return tuple( self._connection.execute(
+                "SELECT project, path FROM contents "
+                "WHERE content_hash = ? ORDER BY project, path",
+                ( content_hash, ) ).fetchall( ) )
+
+    def record( self, project: str, path: str, content_hash: str ) -> None:
+        ''' Records content hash of archive entry. '''
+        with self._lock, self._connection as connection:
+            _insert_entries( connection, ( ( project, path, content_hash ), ) )
+
+    def replace( self, entries: __.cabc.Iterable[ IndexedEntry ] ) -> None:
+        ''' Replaces all entries with those of whole archive. '''
+        with self._lock, self._connection as connection:
+            connection.execute( "DELETE FROM contents" )
+            _insert_entries( connection, entries, surveyed = True )
+
+    def survey( self, archive: __.Path ) -> int:
+        ''' Indexes entries of existing archive, unless already surveyed.
+
+            Hashes are taken from manifests of project directories, for
+            files which are unchanged by stat, and are computed otherwise.
+            Manifests are not saved, since other processes may be ingesting
+            into project directories. Surveyed entries are merged with
+            entries recorded meanwhile. Returns number of surveyed entries.
+        '''
+        with self._lock:
+            surveyed = self._connection.execute(
+                "SELECT 1 FROM properties WHERE name = 'surveyed'"
+            ).fetchone( )
+        if surveyed: return 0
+        entries = tuple( _survey_archive( archive ) )
+        with self._lock, self._connection as connection:
+            _insert_entries( connection, entries, surveyed = True )
+        return len( entries )
+
+
+def produce_index_location(
+    cache_directory: __.Path, target_base: __.Path
+) -> __.Path:
+    ''' Produces location of index for archive, within cache directory. '''
+    return _locations.produce_archive_location(
+        cache_directory / 'contents', target_base, '.sqlite3' )
+
+
+def _connect_index( file_path: __.Path ) -> _sqlite3.Connection:
+    ''' Connects to index database, creating it if necessary. '''
+    file_path.parent.mkdir( parents = True, exist_ok = True )
+    connection = _sqlite3.connect( file_path, check_same_thread = False )
+    with connection:
+        connection.execute( "PRAGMA journal_mode = WAL" )
+        connection.execute( "PRAGMA synchronous = NORMAL" )
+        connection.execute(
+            "CREATE TABLE IF NOT EXISTS contents ( "
+            "project TEXT NOT NULL, "
+            "path TEXT NOT NULL, "
+            "content_hash TEXT NOT NULL, "
+            "PRIMARY KEY ( project, path ) ) WITHOUT ROWID" )
+        connection.execute(
+            "CREATE INDEX IF NOT EXISTS contents_hash "
+            "ON contents ( content_hash )" )
+        connection.execute(
+            "CREATE TABLE IF NOT EXISTS properties ( "
+            "name TEXT PRIMARY KEY, "
+            "value TEXT NOT NULL ) WITHOUT ROWID" )
+    return connection
+
+
+def _insert_entries(
+    connection: _sqlite3.Connection,
+    entries: __.cabc.Iterable[ IndexedEntry ],
+    surveyed: bool = False,
+) -> None:
+    ''' Inserts entries and, if they are of survey, marks index surveyed. '''
+    connection.executemany(
+        "INSERT OR REPLACE INTO contents "
+        "( project, path, content_hash ) VALUES ( ?, ?, ? )", entries )
+    if surveyed:
+        connection.execute(
+            "INSERT OR REPLACE INTO properties ( name, value ) "
+            "VALUES ( 'surveyed', '1' )" )
+
+
+def _survey_archive(
+    archive: __.Path
+) -> __.cabc.Iterator[ IndexedEntry ]:
+    ''' Surveys files of project directories of archive, with hashes. '''
+    if not archive.is_dir( ): return
+    criteria = _discovery.DiscoveryFilter(
+        excludes = ( f"/{_manifests.MANIFEST_NAME}*", ),
+        default_excludes = False )
+    for directory in sorted( archive.iterdir( ) ):
+        if directory.name.startswith( '.' ) or not directory.is_dir( ):
+            continue
+        manifest = _manifests.Manifest.load( directory )
+        for _, file_path in _discovery.discover_source_files(
+            ( directory, ), criteria
+        ):
+            try: content_hash = manifest.access_hash( file_path )
+            except OSError: continue
+            if content_hash is None: continue
+            yield (
+                directory.name,
+                file_path.relative_to( directory ).as_posix( ),
+                content_hash )
@@ -0,0 +1,773 @@
+# vim: set filetype=python fileencoding=utf-8:
+# -*- coding: utf-8 -*-
+
+#============================================================================#
+#                                                                            #
+#  Licensed under the Apache License, Version 2.0 (the "License");           #
+#  you may not use this file except in compliance with the License.          #
+#  You may obtain a copy of the License at                                   #
+#                                                                            #
+#      http://www.apache.org/licenses/LICENSE-2.0                            #
+#                                                                            #
+#  Unless required by applicable law or agreed to in writing, software       #
+#  distributed under the License is distributed on an "AS IS" BASIS,         #
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.  #
+#  See the License for the specific language governing permissions and       #
+#  limitations under the License.                                            #
+#                                                                            #
+#============================================================================#
+
+
+''' Concurrent engine for ingestion of scribbles. '''
+
+
+from asyncio import gather as _gather
+from asyncio import get_running_loop as _get_running_loop
+from concurrent.futures import ThreadPoolExecutor as _ThreadPoolExecutor
+from shutil import copystat as _copystat
+
+from . import __
+from . import contents as _contents
+from . import copying as _copying
+from . import discovery as _discovery
+from . import exceptions as _exceptions
+from . import indexes as _indexes
+from . import instruments as _instruments
+from . import journals as _journals
+from . import manifests as _manifests
+from . import objects as _objects
+from . import scanning as _scanning
+
+
+# Discovery index and source path for files which share a target path
+_GroupMember: __.typx.TypeAlias = tuple[ int, __.Path ]
+# Target path and files which share it
+_Group: __.typx.TypeAlias = tuple[ __.Path, list[ _GroupMember ] ]
+# Content, or failure to read it, for source file
+_Reading: __.typx.TypeAlias = _contents.FileContent | OSError
+# Source path and its reading
+_Subject: __.typx.TypeAlias = tuple[ __.Path, _Reading ]
+# Novelty and stat of source file, as examined against journal
+_Examination: __.typx.TypeAlias = tuple[
+    _journals.Novelties, __.os.stat_result ]
+
+
+WINDOW_SIZE = 256
+WORKERS_DEFAULT = min( 32, ( __.os.cpu_count( ) or 1 ) + 4 )
+
+
+class Dispositions( __.enum.Enum ):
+    ''' Disposition of source file after ingestion. '''
+
+    Copied = 'copied'
+    Failed = 'failed'
+    Renamed = 'renamed'
+    Skipped = 'skipped'
+
+
+class Stages( __.enum.Enum ):
+    ''' Stages of ingestion pipeline, in order. '''
+
+    Discover = 'discover'
+    Classify = 'classify'
+    Scan = 'scan'
+    Copy = 'copy'
+
+
+class IngestContext( __.immut.DataclassObject ):
+    ''' Destination, resources, and options for ingestion of files. '''
+
+    target_dir: __.Path
+    dry_run: bool = False
+    index: _indexes.ContentIndex | None = None
+    instruments: _instruments.Instruments | None = None
+    journal: _journals.Journal | None = None
+    manifest: _manifests.Manifest | None = None
+    objects: _objects.ObjectStore | None = None
+    reporter: __.typx.Optional[
+        __.cabc.Callable[ [ 'IngestOutcome' ], None ] ] = None
+    scanner: _scanning.SecretsScanner | None = None
+    skip_duplicates: bool = False
+    workers: int = WORKERS_DEFAULT
+
+
+class IngestOutcome( __.immut.DataclassObject ):
+    ''' Outcome of ingesting single source file. '''
+
+    source: __.Path
+    disposition: Dispositions
+    destination: __.Path | None = None
+    original: __.Path | None = None
+    reason: str = ''
+    warnings: __.cabc.Sequence[ str ] = ( )
+    content_hash: str | None = None
+    novelty: _journals.Novelties | None = None
+    copy_strategy: _copying.CopyStrategies | None = None
+    duplicates: __.cabc.Sequence[ str ] = ( )
+    size: int | None = None
+    mtime_ns: int | None = None
+    stages: __.cabc.Set[ Stages ] = frozenset( ( Stages.Discover, ) )
+
+
+_STAGES_CLASSIFIED = frozenset( ( Stages.Discover, Stages.Classify ) )
+
+
+class _Decision( __.immut.DataclassObject ):
+    ''' Classification of source file against target directory.
+
+        Outcome is provisional until decision is concluded by copy stage.
+    '''
+
+    outcome: IngestOutcome
+    content: _contents.FileContent | None = None
+
+
+async def ingest_files(
+    source_files: __.cabc.Sequence[ _discovery.SourceFileTuple ],
+    context: IngestContext,
+) -> tuple[ IngestOutcome, ... ]:
+    ''' Ingests source files into target directory with bounded workers.
+
+        Outcomes are returned in discovery order and match those of a
+        serial run, since files with the same target path are processed
+        serially.
+    '''
+    workers = max( 1, context.workers )
+    outcomes: dict[ int, IngestOutcome ] = { }
+    with _ThreadPoolExecutor( max_workers = workers ) as executor:
+        examinations: dict[ int, _Examination ] = { }
+        if context.journal is not None:
+            examinations = await _examine_sources(
+                context.journal, source_files, executor )
+        unchanged = _skip_unchanged( source_files, examinations, context )
+        if context.instruments is not None and context.journal is not None:
+            context.instruments.record_cache(
+                'journal', len( unchanged ),
+                len( examinations ) - len( unchanged ) )
+        groups, failures = _group_by_target(
+            { index: pair for index, pair in enumerate( source_files )
+              if index not in unchanged },
+            context.target_dir )
+        _report_outcomes( unchanged, examinations, context, outcomes )
+        _report_outcomes( failures, examinations, context, outcomes )
+        for window in _window_groups( groups ):
+            _report_outcomes(
+                await _process_window( window, context, executor ),
+                examinations, context, outcomes )
+    if context.journal is not None and not context.dry_run:
+        _record_outcomes(
+            context.journal, source_files, examinations, outcomes )
+    return tuple( outcomes[ index ] for index in sorted( outcomes ) )
+
+
+async def apply_outcomes(
+    source_files: __.cabc.Sequence[ _discovery.SourceFileTuple ],
+    planned: __.cabc.Sequence[ IngestOutcome ],
+    context: IngestContext,
+) -> tuple[ IngestOutcome, ... ]:
+    ''' Carries out planned outcomes of dry-run ingestion.
+
+        Only planned copies and renames are carried out. Other outcomes
+        are returned as planned. Each source must be unchanged, by size
+        and modification time, since it was planned, and its content must
+        hash as planned. A planned copy fails if its destination has since
+        come to hold other content. Outcomes for the same destination are
+        carried out serially. If a reporter is supplied, then outcomes are
+        reported as they are concluded. Outcomes are returned in planned
+        order.
+    '''
+    outcomes: dict[ int, IngestOutcome ] = { }
+    groups: dict[ __.Path, list[ int ] ] = { }
+    for index, outcome in enumerate( planned ):
+        if outcome.destination is not None and outcome.disposition in (
+            Dispositions.Copied, Dispositions.Renamed
+        ): groups.setdefault( outcome.destination, [ ] ).append( index )
+        else: outcomes[ index ] = outcome
+    _report_outcomes( dict( outcomes ), { }, context, outcomes )
+    loop = _get_running_loop( )
+
+    async def apply_group( group: __.cabc.Sequence[ int ] ) -> None:
+        group_outcomes = await loop.run_in_executor(
+            executor, _apply_group,
+            tuple( ( source_files[ index ][ 0 ], planned[ index ] )
+                   for index in group ),
+            context )
+        _report_outcomes(
+            dict( zip( group, group_outcomes ) ), { }, context, outcomes )
+
+    with _ThreadPoolExecutor( max_workers = max( 1, context.workers ) ) as (
+        executor
+    ):
+        if context.journal is not None:
+            await loop.run_in_executor(
+                executor, context.journal.load,
+                { base for base, _ in source_files } )
+        await _gather( *map( apply_group, groups.values( ) ) )
+    return tuple( outcomes[ index ] for index in sorted( outcomes ) )
+
+
+def _apply_group(
+    members: __.cabc.Sequence[ tuple[ __.Path, IngestOutcome ] ],
+    context: IngestContext,
+) -> tuple[ IngestOutcome, ... ]:
+    ''' Carries out planned outcomes for one destination, in order. '''
+    outcomes: list[ IngestOutcome ] = [ ]
+    for base, planned in members:
+        with _measure_file(
+            context, _instruments.Phases.Copy, planned.source
+        ): outcome = _apply_outcome( base, planned, context )
+        _measure_written( context, outcome, planned.size or 0 )
+        outcomes.append( outcome )
+    return tuple( outcomes )
+
+
+def _apply_outcome(
+    base: __.Path, planned: IngestOutcome, context: IngestContext
+) -> IngestOutcome:
+    ''' Carries out planned copy or rename and captures its outcome. '''
+    destination = __.typx.cast( __.Path, planned.destination )
+    try:
+        verification = _verify_planned_source( planned )
+        if verification is None:
+            return _fail_plan( planned, "Source changed since plan" )
+        stat, content = verification
+        destination.parent.mkdir( parents = True, exist_ok = True )
+        existing = _access_hash( destination, context.manifest )
+        strategy = None
+        if existing != content.content_hash:
+            if existing is not None and (
+                Dispositions.Copied is planned.disposition
+            ): return _fail_plan( planned, "Destination changed since plan" )
+            strategy = _write_file( content, destination, context )
+        _record_index( context, destination, content.content_hash )
+        if context.journal is not None:
+            context.journal.record(
+                base, planned.source, stat, content.content_hash,
+                destination )
+    except Exception as exception:
+        return _fail_plan( planned, str( exception ) )
+    return __.dcls.replace(
+        planned,
+        copy_strategy = strategy,
+        stages = frozenset( ( *planned.stages, Stages.Copy ) ) )
+
+
+def _check_secrets(
+    report: _scanning.ScanReport,
+    warnings: list[ str ],
+) -> None:
+    ''' Adds warnings for secrets found by scan of file. '''
+    if report.error:
+        raise _exceptions.SecretDetectionFailure( str( report.file_path ) )
+    if report.secrets_count:
+        msg = (
+            f"Secrets in {report.file_path}: "
+            f"{report.secrets_count} found" )
+        warnings.append( msg )
+
+
+def _classify_file(
+    subject: _Subject,
+    target_path: __.Path,
+    context: IngestContext,
+    overlay: dict[ __.Path, str ],
+) -> _Decision:
+    ''' Classifies source file as copy, rename, or skip.
+
+        Overlay holds hashes of contents which earlier files of the same
+        group are to write, by destination.
+    '''
+    source, reading = subject
+    if isinstance( reading, OSError ):
+        return _Decision( outcome = IngestOutcome(
+            source = source,
+            disposition = Dispositions.Failed,
+            reason = str( reading ),
+            stages = _STAGES_CLASSIFIED ) )
+    content_hash = reading.content_hash
+    try:
+        duplicates = ( ) if context.index is None else _locate_duplicates(
+            context.index, content_hash, context )
+        if duplicates and context.skip_duplicates:
+            return _Decision( outcome = IngestOutcome(
+                source = source,
+                disposition = Dispositions.Skipped,
+                reason = f"Same content exists in {duplicates[ 0 ]}",
+                content_hash = content_hash,
+                duplicates = duplicates,
+                stages = _STAGES_CLASSIFIED ) )
+        target_hash = _access_overlaid_hash( target_path, context, overlay )
+        if content_hash == target_hash:
+            return _Decision( outcome = IngestOutcome(
+                source = source,
+                disposition = Dispositions.Skipped,
+                destination = target_path,
+                reason = "Same content already exists",
+                content_hash = content_hash,
+                duplicates = duplicates,
+                stages = _STAGES_CLASSIFIED ) )
+        destination = target_path
+        if target_hash is not None:
+            destination = _produce_renamed_path( target_path, content_hash )
+            # Renamed copy may exist from prior ingestion of same content.
+            if content_hash == _access_overlaid_hash(
+                destination, context, overlay
+            ):
+                return _Decision( outcome = IngestOutcome(
+                    source = source,
+                    disposition = Dispositions.Skipped,
+                    destination = destination,
+                    reason = "Same content already exists",
+                    content_hash = content_hash,
+                    duplicates = duplicates,
+                    stages = _STAGES_CLASSIFIED ) )
+    except Exception as exception:
+        return _Decision( outcome = IngestOutcome(
+            source = source,
+            disposition = Dispositions.Failed,
+            reason = str( exception ),
+            stages = _STAGES_CLASSIFIED ) )
+    overlay[ destination ] = content_hash
+    renamed = target_hash is not None
+    return _Decision(
+        outcome = IngestOutcome(
+            source = source,
+            disposition = (
+                Dispositions.Renamed if renamed else Dispositions.Copied ),
+            destination = destination,
+            original = target_path if renamed else None,
+            content_hash = content_hash,
+            duplicates = duplicates,
+            stages = _STAGES_CLASSIFIED ),
+        content = reading )
+
+
+def _classify_group(
+    target_path: __.Path,
+    subjects: __.cabc.Sequence[ _Subject ],
+    context: IngestContext,
+) -> tuple[ _Decision, ... ]:
+    ''' Classifies files which share target path, in discovery order. '''
+    overlay: dict[ __.Path, str ] = { }
+    decisions: list[ _Decision ] = [ ]
+    for subject in subjects:
+        with _measure_file(
+            context, _instruments.Phases.Classify, subject[ 0 ]
+        ):
+            decisions.append(
+                _classify_file( subject, target_path, context, overlay ) )
+    return tuple( decisions )
+
+
+def _conclude_decision(
+    decision: _Decision,
+    report: _scanning.ScanReport | None,
+    context: IngestContext,
+) -> IngestOutcome:
+    ''' Copies file, if decided, and records its destination.
+
+        Scan findings are checked even in dry runs, so that plans carry
+        them. Copy stage is added only if file is written.
+    '''
+    outcome = decision.outcome
+    destination = outcome.destination
+    stages = set( outcome.stages )
+    if report is not None: stages.add( Stages.Scan )
+    warnings: list[ str ] = [ ]
+    strategy = None
+    try:
+        if report is not None: _check_secrets( report, warnings )
+        if not context.dry_run and destination is not None:
+            if decision.content is not None:
+                destination.parent.mkdir( parents = True, exist_ok = True )
+                strategy = _write_file(
+                    decision.content, destination, context )
+                stages.add( Stages.Copy )
+            _record_index(
+                context, destination,
+                __.typx.cast( str, outcome.content_hash ) )
+    except Exception as exception:
+        return IngestOutcome(
+            source = outcome.source,
+            disposition = Dispositions.Failed,
+            reason = str( exception ),
+            warnings = tuple( warnings ),
+            stages = frozenset( stages ) )
+    return __.dcls.replace(
+        outcome,
+        warnings = tuple( warnings ),
+        copy_strategy = strategy,
+        stages = frozenset( stages ) )
+
+
+def _conclude_group(
+    decisions: __.cabc.Sequence[ _Decision ],
+    reports: __.cabc.Sequence[ _scanning.ScanReport | None ],
+    context: IngestContext,
+) -> tuple[ IngestOutcome, ... ]:
+    ''' Concludes decisions for files which share target path, in order. '''
+    outcomes: list[ IngestOutcome ] = [ ]
+    for decision, report in zip( decisions, reports ):
+        if decision.content is None:
+            outcomes.append( _conclude_decision( decision, report, context ) )
+            continue
+        with _measure_file(
+            context, _instruments.Phases.Copy, decision.outcome.source
+        ): outcome = _conclude_decision( decision, report, context )
+        _measure_written(
+            context, outcome, decision.content.size )
+        outcomes.append( outcome )
+    return tuple( outcomes )
+
+
+def _access_overlaid_hash(
+    file_path: __.Path, context: IngestContext, overlay: dict[ __.Path, str ]
+) -> str | None:
+    ''' Returns hash of content which file holds or is to hold. '''
+    if file_path in overlay: return overlay[ file_path ]
+    return _access_hash( file_path, context.manifest )
+
+
+def _access_hash(
+    file_path: __.Path, manifest: _manifests.Manifest | None
+) -> str | None:
+    ''' Returns hash of existing file content. None, if no file exists. '''
+    try:
+        if manifest is not None: return manifest.access_hash( file_path )
+        return _contents.compute_hash( file_path )
+    except FileNotFoundError: return None
+    except OSError as exception:
+        raise _exceptions.DuplicateDetectionFailure(
+            str( file_path ) ) from exception
+
+
+def _fail_plan( planned: IngestOutcome, reason: str ) -> IngestOutcome:
+    return IngestOutcome(
+        source = planned.source,
+        disposition = Dispositions.Failed,
+        reason = reason,
+        warnings = planned.warnings,
+        content_hash = planned.content_hash )
+
+
+async def _examine_sources(
+    journal: _journals.Journal,
+    source_files: __.cabc.Sequence[ _discovery.SourceFileTuple ],
+    executor: _ThreadPoolExecutor,
+) -> dict[ int, _Examination ]:
+    ''' Examines source files against journal by stat alone.
+
+        Source files which cannot be examined are left to fail later.
+    '''
+    loop = _get_running_loop( )
+    await loop.run_in_executor(
+        executor, journal.load, { base for base, _ in source_files } )
+    examinations = await _gather( *(
+        loop.run_in_executor( executor, _examine_source, journal, base, path )
+        for base, path in source_files ) )
+    return {
+        index: examination
+        for index, examination in enumerate( examinations )
+        if examination is not None }
+
+
+def _examine_source(
+    journal: _journals.Journal, base: __.Path, source: __.Path
+) -> _Examination | None:
+    try:
+        stat = source.stat( )
+        return ( journal.examine( base, source, stat ), stat )
+    except ( OSError, ValueError ): return None
+
+
+def _group_by_target(
+    source_files: __.cabc.Mapping[ int, _discovery.SourceFileTuple ],
+    target_dir: __.Path,
+) -> tuple[
+    dict[ __.Path, list[ _GroupMember ] ], dict[ int, IngestOutcome ]
+]:
+    ''' Groups source files by target path, preserving discovery order.
+
+        Also returns failure outcomes, by discovery index, for source files
+        which are not relative to their base paths.
+    '''
+    groups: dict[ __.Path, list[ _GroupMember ] ] = { }
+    failures: dict[ int, IngestOutcome ] = { }
+    for index, ( base_path, source ) in source_files.items( ):
+        try: relative_path = source.relative_to( base_path )
+        except ValueError:
+            failures[ index ] = IngestOutcome(
+                source = source,
+                disposition = Dispositions.Failed,
+                reason = str( _exceptions.FileIngestionFailure(
+                    str( source ) ) ) )
+            continue
+        target_path = target_dir / relative_path
+        groups.setdefault( target_path, [ ] ).append( ( index, source ) )
+    return groups, failures
+
+
+def _locate_duplicates(
+    index: _indexes.ContentIndex, content_hash: str, context: IngestContext
+) -> tuple[ str, ... ]:
+    ''' Locates existing entries with same content in other projects. '''
+    project = context.target_dir.name
+    archive = context.target_dir.parent
+    return tuple(
+        f"{holder}/{path}" for holder, path in index.locate( content_hash )
+        if holder != project and ( archive / holder / path ).is_file( ) )
+
+
+def _record_index(
+    context: IngestContext, destination: __.Path, content_hash: str
+) -> None:
+    ''' Records content of archive entry in index, if one is supplied. '''
+    if context.index is None: return
+    context.index.record(
+        context.target_dir.name,
+        destination.relative_to( context.target_dir ).as_posix( ),
+        content_hash )
+
+
+def _record_outcomes(
+    journal: _journals.Journal,
+    source_files: __.cabc.Sequence[ _discovery.SourceFileTuple ],
+    examinations: __.cabc.Mapping[ int, _Examination ],
+    outcomes: __.cabc.Mapping[ int, IngestOutcome ],
+) -> None:
+    ''' Records successfully ingested source files in journal. '''
+    for index, ( novelty, stat ) in examinations.items( ):
+        if _journals.Novelties.Unchanged is novelty: continue
+        outcome = outcomes[ index ]
+        if Dispositions.Failed is outcome.disposition: continue
+        if outcome.destination is None or outcome.content_hash is None:
+            continue
+        base, source = source_files[ index ]
+        journal.record(
+            base, source, stat, outcome.content_hash, outcome.destination )
+
+
+async def _process_window(
+    window: __.cabc.Sequence[ _Group ],
+    context: IngestContext,
+    executor: _ThreadPoolExecutor,
+) -> dict[ int, IngestOutcome ]:
+    ''' Reads, classifies, scans, and copies window of grouped files.
+
+        Contents are streamed in chunks, so memory in flight is bounded
+        by window rather than by sizes of files.
+    '''
+    loop = _get_running_loop( )
+    members = tuple( member for _, group in window for member in group )
+    with _measure_phase( context, _instruments.Phases.Read ):
+        readings = await _gather( *(
+            loop.run_in_executor( executor, _read_source, source, context )
+            for _, source in members ) )
+    subjects = dict( zip(
+        ( index for index, _ in members ),
+        zip( ( source for _, source in members ), readings ) ) )
+    with _measure_phase( context, _instruments.Phases.Classify ):
+        classifications = await _gather( *(
+            loop.run_in_executor(
+                executor, _classify_group, target_path,
+                tuple( subjects[ index ] for index, _ in group ), context )
+            for target_path, group in window ) )
+    decisions = {
+        index: decision
+        for ( _, group ), group_decisions in zip( window, classifications )
+        for ( index, _ ), decision in zip( group, group_decisions ) }
+    reports: dict[ int, _scanning.ScanReport ] = { }
+    if context.scanner is not None:
+        with _measure_phase( context, _instruments.Phases.Scan ):
+            reports = await _scan_decisions( context.scanner, decisions )
+        _measure_scans( context, reports.values( ) )
+    with _measure_phase( context, _instruments.Phases.Copy ):
+        results = await _gather( *(
+            loop.run_in_executor(
+                executor, _conclude_group,
+                tuple( decisions[ index ] for index, _ in group ),
+                tuple( reports.get( index ) for index, _ in group ),
+                context )
+            for _, group in window ) )
+    return {
+        index: _stamp_outcome( outcome, subjects[ index ][ 1 ] )
+        for ( _, group ), group_outcomes in zip( window, results )
+        for ( index, _ ), outcome in zip( group, group_outcomes ) }
+
+
+def _measure_file(
+    context: IngestContext, phase: _instruments.Phases, file_path: __.Path
+) -> __.typx.ContextManager[ None ]:
+    ''' Measures work on file within phase, if instrumented. '''
+    if context.instruments is None: return __.ctxl.nullcontext( )
+    return context.instruments.measure_file( phase, file_path )
+
+
+def _measure_phase(
+    context: IngestContext, phase: _instruments.Phases
+) -> __.typx.ContextManager[ None ]:
+    ''' Measures span of phase, if instrumented. '''
+    if context.instruments is None: return __.ctxl.nullcontext( )
+    return context.instruments.measure_phase( phase )
+
+
+def _measure_scans(
+    context: IngestContext,
+    reports: __.cabc.Iterable[ _scanning.ScanReport ],
+) -> None:
+    ''' Records times of scans and use of scan cache, if instrumented. '''
+    if context.instruments is None: return
+    hits = misses = 0
+    for report in reports:
+        if report.cached: hits += 1
+        else: misses += 1
+        context.instruments.record_file(
+            _instruments.Phases.Scan, report.file_path,
+            report.elapsed, report.cpu_time )
+    context.instruments.record_cache( 'scans', hits, misses )
+
+
+def _measure_written(
+    context: IngestContext, outcome: IngestOutcome, size: int
+) -> None:
+    ''' Records bytes written for outcome, if instrumented. '''
+    if context.instruments is None or outcome.copy_strategy is None: return
+    context.instruments.record_bytes( _instruments.Phases.Copy, size )
+
+
+def _produce_renamed_path(
+    target_path: __.Path, content_hash: str
+) -> __.Path:
+    ''' Produces path for content which differs from that of target. '''
+    stem = target_path.stem
+    suffix = target_path.suffix
+    return target_path.parent / f"{stem}-{content_hash[ :6 ]}{suffix}"
+
+
+def _read_source( file_path: __.Path, context: IngestContext ) -> _Reading:
+    ''' Reads source file once or captures failure to read it. '''
+    with _measure_file( context, _instruments.Phases.Read, file_path ):
+        try: reading = _contents.read_content( file_path )
+        except OSError as exception: return exception
+    if context.instruments is not None:
+        context.instruments.record_bytes(
+            _instruments.Phases.Read, reading.size )
+    return reading
+
+
+async def _scan_decisions(
+    scanner: _scanning.SecretsScanner,
+    decisions: __.cabc.Mapping[ int, _Decision ],
+) -> dict[ int, _scanning.ScanReport ]:
+    ''' Scans files to be copied for secrets. '''
+    contents = {
+        index: decision.content for index, decision in decisions.items( )
+        if decision.content is not None }
+    reports = await scanner.scan( tuple( contents.values( ) ) )
+    return dict( zip( contents, reports ) )
+
+
+def _report_outcomes(
+    concluded: __.cabc.Mapping[ int, IngestOutcome ],
+    examinations: __.cabc.Mapping[ int, _Examination ],
+    context: IngestContext,
+    outcomes: dict[ int, IngestOutcome ],
+) -> None:
+    ''' Adds novelties to concluded outcomes, collects, and reports them. '''
+    for index, outcome in concluded.items( ):
+        if index in examinations:
+            outcomes[ index ] = __.dcls.replace(
+                outcome, novelty = examinations[ index ][ 0 ] )
+        else: outcomes[ index ] = outcome
+        if context.reporter is not None: context.reporter( outcomes[ index ] )
+
+
+def _skip_unchanged(
+    source_files: __.cabc.Sequence[ _discovery.SourceFileTuple ],
+    examinations: __.cabc.Mapping[ int, _Examination ],
+    context: IngestContext,
+) -> dict[ int, IngestOutcome ]:
+    ''' Produces outcomes for source files unchanged since last ingest.
+
+        Destinations and content hashes are taken from the journal. Their
+        archive entries are recorded in the index, unless in a dry run,
+        since they are known without reading.
+    '''
+    journal = __.typx.cast( _journals.Journal, context.journal )
+    outcomes: dict[ int, IngestOutcome ] = { }
+    for index, ( novelty, _ ) in examinations.items( ):
+        if _journals.Novelties.Unchanged is not novelty: continue
+        base, source = source_files[ index ]
+        entry = __.typx.cast(
+            _journals.JournalEntry, journal.access( base, source ) )
+        destination = context.target_dir / entry.destination
+        outcomes[ index ] = IngestOutcome(
+            source = source,
+            disposition = Dispositions.Skipped,
+            destination = destination,
+            reason = "Unchanged since last ingest",
+            content_hash = entry.content_hash )
+        if not context.dry_run:
+            _record_index( context, destination, entry.content_hash )
+    return outcomes
+
+
+def _stamp_outcome(
+    outcome: IngestOutcome, reading: _Reading
+) -> IngestOutcome:
+    ''' Adds size and modification time of source, as read, to outcome. '''
+    if isinstance( reading, OSError ): return outcome
+    return __.dcls.replace(
+        outcome, size = reading.size, mtime_ns = reading.mtime_ns )
+
+
+def _verify_planned_source(
+    planned: IngestOutcome
+) -> tuple[ __.os.stat_result, _contents.FileContent ] | None:
+    ''' Reads source, if unchanged since it was planned. '''
+    stat = planned.source.stat( )
+    if (    stat.st_size != planned.size
+        or  stat.st_mtime_ns != planned.mtime_ns
+    ): return None
+    content = _contents.read_content( planned.source )
+    if content.content_hash != planned.content_hash: return None
+    return stat, content
+
+
+def _window_groups(
+    groups: __.cabc.Mapping[ __.Path, list[ _GroupMember ] ]
+) -> __.cabc.Iterator[ tuple[ _Group, ... ] ]:
+    ''' Partitions groups into windows of about WINDOW_SIZE files.
+
+        Groups are never split across windows.
+    '''
+    window: list[ _Group ] = [ ]
+    count = 0
+    for target_path, group in groups.items( ):
+        window.append( ( target_path, group ) )
+        count += len( group )
+        if count >= WINDOW_SIZE:
+            yield tuple( window )
+            window.clear( )
+            count = 0
+    if window: yield tuple( window )
+
+
+def _write_file(
+    content: _contents.FileContent,
+    destination: __.Path,
+    context: IngestContext,
+) -> _copying.CopyStrategies:
+    ''' Writes content to destination with source metadata.
+
+        If context has object store, then destination is materialized
+        from object for content.
+    '''
+    if context.objects is not None:
+        strategy = context.objects.materialize( content, destination )
+    else:
+        strategy = _copying.copy_content( content, destination )
+        _copystat( content.file_path, destination )
+    if context.manifest is not None:
+        context.manifest.record( destination, content.content_hash )
+    return strategy
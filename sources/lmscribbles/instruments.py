@@ -0,0 +1,270 @@
+# vim: set filetype=python fileencoding=utf-8:
+# -*- coding: utf-8 -*-
+
+#============================================================================#
+#                                                                            #
+#  Licensed under the Apache License, Version 2.0 (the "License");           #
+#  you may not use this file except in compliance with the License.          #
+#  You may obtain a copy of the License at                                   #
+#                                                                            #
+#      http://www.apache.org/licenses/LICENSE-2.0                            #
+#                                                                            #
+#  Unless required by applicable law or agreed to in writing, software       #
+#  distributed under the License is distributed on an "AS IS" BASIS,         #
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.  #
+#  See the License for the specific language governing permissions and       #
+#  limitations under the License.                                            #
+#                                                                            #
+#============================================================================#
+
+
+
+''' Timing and throughput instrumentation of ingestion phases. '''
+
+
+from heapq import heappush as _heappush
+from heapq import heappushpop as _heappushpop
+from threading import Lock as _Lock
+from time import perf_counter as _perf_counter
+from time import thread_time as _thread_time
+
+from . import __
+
+
+# Elapsed seconds and path of file
+_Sample: __.typx.TypeAlias = tuple[ float, str ]
+
+
+SLOWEST_COUNT_DEFAULT = 5
+
+
+class Phases( __.enum.Enum ):
+    ''' Phases of ingestion, as timed. Reading includes hashing. '''
+
+    Discover = 'discover'
+    Read = 'read'
+    Classify = 'classify'
+    Scan = 'scan'
+    Copy = 'copy'
+
+
+class PhaseMetrics( __.immut.DataclassObject ):
+    ''' Time and throughput of one phase of ingestion.
+
+        Wall time spans the phase across all windows of files. CPU time is
+        summed over the threads and processes which did the work of the
+        phase.
+    '''
+
+    wall_time: float = 0.0
+    cpu_time: float = 0.0
+    files: int = 0
+    size: int = 0
+    slowest: __.cabc.Sequence[ tuple[ str, float ] ] = ( )
+
+    @property
+    def files_per_second( self ) -> float:
+        ''' Files processed per second of wall time. '''
+        if not self.wall_time: return 0.0
+        return self.files / self.wall_time
+
+    def render_as_dictionary( self ) -> dict[ str, __.typx.Any ]:
+        ''' Renders metrics as dictionary for serialization. '''
+        return {
+            'wall_time': round( self.wall_time, 6 ),
+            'cpu_time': round( self.cpu_time, 6 ),
+            'files': self.files,
+            'bytes': self.size,
+            'files_per_second': round( self.files_per_second, 3 ),
+            'slowest': [
+                { 'path': path, 'seconds': round( seconds, 6 ) }
+                for path, seconds in self.slowest ],
+        }
+
+
+class CacheMetrics( __.immut.DataclassObject ):
+    ''' Hits and misses of cache. '''
+
+    hits: int = 0
+    misses: int = 0
+
+    @property
+    def hit_rate( self ) -> float:
+        ''' Fraction of lookups which were hits. '''
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def render_as_dictionary( self ) -> dict[ str, __.typx.Any ]:
+        ''' Renders metrics as dictionary for serialization. '''
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': round( self.hit_rate, 4 ),
+        }
+
+
+class IngestMetrics( __.immut.DataclassObject ):
+    ''' Time and throughput, by phase, and cache use of ingestion. '''
+
+    phases: __.immut.Dictionary[ str, PhaseMetrics ]
+    caches: __.immut.Dictionary[ str, CacheMetrics ]
+    bytes_read: int = 0
+    bytes_written: int = 0
+
+    def render_as_dictionary( self ) -> dict[ str, __.typx.Any ]:
+        ''' Renders metrics as dictionary for serialization. '''
+        return {
+            'phases': {
+                name: metrics.render_as_dictionary( )
+                for name, metrics in self.phases.items( ) },
+            'caches': {
+                name: metrics.render_as_dictionary( )
+                for name, metrics in self.caches.items( ) },
+            'bytes_read': self.bytes_read,
+            'bytes_written': self.bytes_written,
+        }
+
+    def render_as_lines( self ) -> list[ str ]:
+        ''' Renders metrics as lines of human-readable text. '''
+        lines = [
+            f"Timings ({self.bytes_read} bytes read, "
+            f"{self.bytes_written} bytes written):" ]
+        for name, metrics in self.phases.items( ):
+            lines.append(
+                f"  {name}: {metrics.wall_time:.3f}s wall, "
+                f"{metrics.cpu_time:.3f}s CPU, {metrics.files} file(s), "
+                f"{metrics.size} bytes, "
+                f"{metrics.files_per_second:.1f} files/s" )
+            lines.extend(
+                f"    {seconds:.3f}s {path}"
+                for path, seconds in metrics.slowest )
+        if self.caches:
+            rates = ', '.join(
+                f"{name} {metrics.hit_rate:.0%} "
+                f"({metrics.hits}/{metrics.hits + metrics.misses})"
+                for name, metrics in self.caches.items( ) )
+            lines.append( f"Cache hit rates: {rates}" )
+        return lines
+
+
+class Instruments( __.immut.Object ):
+    ''' Collects timings of ingestion phases and of files within them.
+
+        Retains only totals and the slowest files of each phase, so that
+        memory does not grow with the number of files. Safe for use from
+        multiple threads.
+    '''
+
+    slowest_count: int
+
+    def __init__( self, slowest_count: int = SLOWEST_COUNT_DEFAULT ) -> None:
+        self.slowest_count = max( 0, slowest_count )
+        self._caches: dict[ str, CacheMetrics ] = { }
+        self._lock = _Lock( )
+        self._phases = { phase: _PhaseTally( ) for phase in Phases }
+
+    @__.ctxl.contextmanager
+    def measure_file(
+        self, phase: Phases, file_path: __.Path
+    ) -> __.cabc.Iterator[ None ]:
+        ''' Measures work on file, within phase, by current thread. '''
+        started, cpu_started = _perf_counter( ), _thread_time( )
+        try: yield
+        finally:
+            self.record_file(
+                phase, file_path,
+                _perf_counter( ) - started, _thread_time( ) - cpu_started )
+
+    @__.ctxl.contextmanager
+    def measure_phase( self, phase: Phases ) -> __.cabc.Iterator[ None ]:
+        ''' Measures span of wall time spent in phase. '''
+        started = _perf_counter( )
+        try: yield
+        finally:
+            elapsed = _perf_counter( ) - started
+            with self._lock: self._phases[ phase ].wall_time += elapsed
+
+    def record_bytes( self, phase: Phases, size: int ) -> None:
+        ''' Records bytes read or written by phase. '''
+        with self._lock: self._phases[ phase ].size += size
+
+    def record_cache( self, name: str, hits: int, misses: int ) -> None:
+        ''' Records hits and misses of named cache, if it was used. '''
+        if not hits and not misses: return
+        with self._lock:
+            metrics = self._caches.get( name, CacheMetrics( ) )
+            self._caches[ name ] = CacheMetrics(
+                hits = metrics.hits + hits, misses = metrics.misses + misses )
+
+    def record_file(
+        self,
+        phase: Phases,
+        file_path: __.Path,
+        elapsed: float,
+        cpu_time: float,
+    ) -> None:
+        ''' Records time spent on file within phase. '''
+        sample = ( elapsed, str( file_path ) )
+        with self._lock:
+            tally = self._phases[ phase ]
+            tally.cpu_time += cpu_time
+            tally.files += 1
+            if not self.slowest_count: return
+            if len( tally.slowest ) < self.slowest_count:
+                _heappush( tally.slowest, sample )
+            else: _heappushpop( tally.slowest, sample )
+
+    def record_work(
+        self, phase: Phases, files: int, cpu_time: float
+    ) -> None:
+        ''' Records files processed by phase in bulk, without timings. '''
+        with self._lock:
+            tally = self._phases[ phase ]
+            tally.cpu_time += cpu_time
+            tally.files += files
+
+    def summarize( self ) -> IngestMetrics:
+        ''' Produces metrics from measurements so far. '''
+        with self._lock:
+            phases = {
+                phase.value: tally.summarize( )
+                for phase, tally in self._phases.items( )
+                if tally.files or tally.wall_time }
+            caches = dict( self._caches )
+            bytes_read = self._phases[ Phases.Read ].size
+            bytes_written = self._phases[ Phases.Copy ].size
+        return IngestMetrics(
+            phases = __.immut.Dictionary( phases ),
+            caches = __.immut.Dictionary( caches ),
+            bytes_read = bytes_read,
+            bytes_written = bytes_written )
+
+
+class _PhaseTally(
+    __.immut.Object,
+    instances_mutables = ( 'cpu_time', 'files', 'size', 'wall_time' ),
+):
+    ''' Running totals for phase. Guarded by lock of instruments. '''
+
+    cpu_time: float
+    files: int
+    size: int
+    slowest: list[ _Sample ]
+    wall_time: float
+
+    def __init__( self ) -> None:
+        self.cpu_time = 0.0
+        self.files = 0
+        self.size = 0
+        self.slowest: list[ _Sample ] = [ ]
+        self.wall_time = 0.0
+
+    def summarize( self ) -> PhaseMetrics:
+        return PhaseMetrics(
+            wall_time = self.wall_time,
+            cpu_time = self.cpu_time,
+            files = self.files,
+            size = self.size,
+            slowest = tuple(
+                ( path, elapsed )
+                for elapsed, path in sorted( self.slowest, reverse = True ) ) )
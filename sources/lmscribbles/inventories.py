@@ -0,0 +1,143 @@
+# vim: set filetype=python fileencoding=utf-8:
+# -*- coding: utf-8 -*-
+
+#============================================================================#
+#                                                                            #
+#  Licensed under the Apache License, Version 2.0 (the "License");           #
+#  you may not use this file except in compliance with the License.          #
+#  You may obtain a copy of the License at                                   #
+#                                                                            #
+#      http://www.apache.org/licenses/LICENSE-2.0                            #
+#                                                                            #
+#  Unless required by applicable law or agreed to in writing, software       #
+#  distributed under the License is distributed on an "AS IS" BASIS,         #
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.  #
+#  See the License for the specific language governing permissions and       #
+#  limitations under the License.                                            #
+#                                                                            #
+#============================================================================#
+
+
+
+''' Inventories of scribbles awaiting ingestion. '''
+
+
+from . import __
+from . import contents as _contents
+from . import discovery as _discovery
+from . import journals as _journals
+from . import manifests as _manifests
+
+
+class Tally( __.immut.DataclassObject ):
+    ''' Count and total size of files. '''
+
+    count: int = 0
+    size: int = 0
+
+    def add( self, size: int ) -> __.typx.Self:
+        ''' Produces tally with one more file of given size. '''
+        return type( self )( count = self.count + 1, size = self.size + size )
+
+
+class ProjectInventory( __.immut.DataclassObject ):
+    ''' Inventory of scribbles of project relative to archive. '''
+
+    project_name: str
+    source_path: __.Path
+    new: Tally = __.dcls.field( default_factory = Tally )
+    changed: Tally = __.dcls.field( default_factory = Tally )
+    ingested: Tally = __.dcls.field( default_factory = Tally )
+
+    def render_as_dictionary( self ) -> dict[ str, __.typx.Any ]:
+        ''' Renders inventory as JSON-compatible dictionary. '''
+        return {
+            'project': self.project_name,
+            'source_path': str( self.source_path ),
+            **{ f"{name}_files": tally.count
+                for name, tally in self._produce_tallies( ) },
+            **{ f"{name}_bytes": tally.size
+                for name, tally in self._produce_tallies( ) },
+        }
+
+    def _produce_tallies( self ) -> tuple[ tuple[ str, Tally ], ... ]:
+        return (
+            ( 'new', self.new ),
+            ( 'changed', self.changed ),
+            ( 'ingested', self.ingested ) )
+
+
+def survey_project(
+    project_name: str,
+    source_path: __.Path,
+    target_dir: __.Path,
+    journals_directory: __.Path,
+    criteria: _discovery.DiscoveryFilter | None = None,
+) -> ProjectInventory:
+    ''' Inventories source files of project against archive.
+
+        Source files are first examined, by stat alone, against the
+        ingestion journal. Source files absent from the journal are
+        considered ingested if their content matches a file of the same
+        size in the project directory, as hashed via its manifest. Hashes
+        computed anew are kept for the inventory only; the archive is
+        never written, since inventory is read-only and may run alongside
+        ingestion into the same project directory.
+    '''
+    journal = _journals.Journal( journals_directory, target_dir )
+    journal.load( ( source_path, ) )
+    tallies = {
+        novelty: Tally( ) for novelty in _journals.Novelties }
+    unknown: list[ tuple[ __.Path, int ] ] = [ ]
+    for base, source in _discovery.discover_source_files(
+        ( source_path, ), criteria
+    ):
+        try: stat = source.stat( )
+        except OSError: continue
+        novelty = journal.examine( base, source, stat )
+        if _journals.Novelties.New is novelty:
+            unknown.append( ( source, stat.st_size ) )
+        else: tallies[ novelty ] = tallies[ novelty ].add( stat.st_size )
+    if unknown:
+        archive = _ArchiveIndex( target_dir )
+        for source, size in unknown:
+            novelty = (
+                _journals.Novelties.Unchanged
+                if archive.contains( source, size )
+                else _journals.Novelties.New )
+            tallies[ novelty ] = tallies[ novelty ].add( size )
+    return ProjectInventory(
+        project_name = project_name,
+        source_path = source_path,
+        new = tallies[ _journals.Novelties.New ],
+        changed = tallies[ _journals.Novelties.Changed ],
+        ingested = tallies[ _journals.Novelties.Unchanged ] )
+
+
+class _ArchiveIndex( __.immut.Object ):
+    ''' Files of project directory, by size, with hashes via manifest. '''
+
+    def __init__( self, target_dir: __.Path ) -> None:
+        self.manifest = _manifests.Manifest.load( target_dir )
+        self.sizes: dict[ int, list[ __.Path ] ] = { }
+        if not target_dir.is_dir( ): return
+        criteria = _discovery.DiscoveryFilter(
+            excludes = ( f"/{_manifests.MANIFEST_NAME}", ),
+            default_excludes = False )
+        for _, path in _discovery.discover_source_files(
+            ( target_dir, ), criteria
+        ):
+            try: size = path.stat( ).st_size
+            except OSError: continue
+            self.sizes.setdefault( size, [ ] ).append( path )
+
+    def contains( self, source: __.Path, size: int ) -> bool:
+        ''' Does project directory hold file with content of source? '''
+        candidates = self.sizes.get( size )
+        if not candidates: return False
+        try:
+            content_hash = _contents.compute_hash( source )
+            return any(
+                self.manifest.access_hash( candidate ) == content_hash
+                for candidate in candidates )
+        except OSError: return False
@@ -0,0 +1,168 @@
+# vim: set filetype=python fileencoding=utf-8:
+# -*- coding: utf-8 -*-
+
+#============================================================================#
+#                                                                            #
+#  Licensed under the Apache License, Version 2.0 (the "License");           #
+#  you may not use this file except in compliance with the License.          #
+#  You may obtain a copy of the License at                                   #
+#                                                                            #
+#      http://www.apache.org/licenses/LICENSE-2.0                            #
+#                                                                            #
+#  Unless required by applicable law or agreed to in writing, software       #
+#  distributed under the License is distributed on an "AS IS" BASIS,         #
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.  #
+#  See the License for the specific language governing permissions and       #
+#  limitations under the License.                                            #
+#                                                                            #
+#============================================================================#
+
+
+
+''' Journals of files ingested from source roots. '''
+
+
+from threading import Lock as _Lock
+
+from . import __
+
+
+_HEADER = (
+    '# lmscribbles ingestion journal: '
+    'size mtime_ns inode sha256 destination path\n' )
+
+
+class Novelties( __.enum.Enum ):
+    ''' Novelty of source file relative to ingestion journal. '''
+
+    Changed = 'changed'
+    New = 'new'
+    Unchanged = 'unchanged'
+
+
+class JournalEntry( __.immut.DataclassObject ):
+    ''' Recorded state of source file when it was last ingested. '''
+
+    size: int
+    mtime_ns: int
+    inode: int
+    content_hash: str
+    destination: str
+
+
+class Journal( __.immut.Object ):
+    ''' Journal of files ingested from source roots into project directory.
+
+        Records, by path relative to each source root, the size,
+        modification time, inode, and content hash of each ingested file,
+        along with its destination relative to the project directory. A
+        source file is unchanged if its stat matches the journal and its
+        destination still exists. Each source root has its own journal file
+        within the journals directory. Safe for use from multiple threads.
+    '''
+
+    directory: __.Path
+    target_dir: __.Path
+
+    def __init__( self, directory: __.Path, target_dir: __.Path ) -> None:
+        self.directory = directory
+        self.target_dir = target_dir
+        self._altered: set[ __.Path ] = set( )
+        self._lock = _Lock( )
+        self._roots: dict[ __.Path, dict[ str, JournalEntry ] ] = { }
+
+    def load( self, roots: __.cabc.Iterable[ __.Path ] ) -> None:
+        ''' Loads journals for source roots which are not yet loaded. '''
+        for root in roots:
+            if root in self._roots: continue
+            try: text = self._produce_location( root ).read_text( )
+            except FileNotFoundError: entries = { }
+            else: entries = _parse_entries( text )
+            with self._lock: self._roots[ root ] = entries
+
+    def access(
+        self, root: __.Path, source: __.Path
+    ) -> JournalEntry | None:
+        ''' Returns recorded state of source file, if any. '''
+        key = source.relative_to( root ).as_posix( )
+        with self._lock: return self._roots.get( root, { } ).get( key )
+
+    def examine(
+        self, root: __.Path, source: __.Path, stat: __.os.stat_result
+    ) -> Novelties:
+        ''' Determines novelty of source file from its stat. '''
+        key = source.relative_to( root ).as_posix( )
+        with self._lock: entry = self._roots.get( root, { } ).get( key )
+        if entry is None: return Novelties.New
+        if (    entry.size != stat.st_size
+            or  entry.mtime_ns != stat.st_mtime_ns
+            or  entry.inode != stat.st_ino
+        ): return Novelties.Changed
+        if not ( self.target_dir / entry.destination ).exists( ):
+            return Novelties.New
+        return Novelties.Unchanged
+
+    def record(
+        self,
+        root: __.Path,
+        source: __.Path,
+        stat: __.os.stat_result,
+        content_hash: str,
+        destination: __.Path,
+    ) -> None:
+        ''' Records ingestion of source file. '''
+        key = source.relative_to( root ).as_posix( )
+        if '\n' in key: return  # Cannot be represented in journal.
+        entry = JournalEntry(
+            size = stat.st_size,
+            mtime_ns = stat.st_mtime_ns,
+            inode = stat.st_ino,
+            content_hash = content_hash,
+            destination = destination.relative_to(
+                self.target_dir ).as_posix( ) )
+        with self._lock:
+            self._roots.setdefault( root, { } )[ key ] = entry
+            self._altered.add( root )
+
+    def save( self ) -> None:
+        ''' Saves altered journals atomically. '''
+        from tempfile import NamedTemporaryFile
+        with self._lock:
+            self.directory.mkdir( parents = True, exist_ok = True )
+            for root in sorted( self._altered ):
+                lines = [ _HEADER, f"# root: {root}\n" ]
+                lines.extend(
+                    f"{entry.size}\t{entry.mtime_ns}\t{entry.inode}\t"
+                    f"{entry.content_hash}\t{entry.destination}\t{key}\n"
+                    for key, entry in sorted( self._roots[ root ].items( ) )
+                    if '\t' not in entry.destination )
+                with NamedTemporaryFile(
+                    'w', dir = self.directory, prefix = '.journal',
+                    delete = False
+                ) as file: file.writelines( lines )
+                __.os.replace( file.name, self._produce_location( root ) )
+            self._altered.clear( )
+
+    def _produce_location( self, root: __.Path ) -> __.Path:
+        from hashlib import sha256
+        identity = f"{self.target_dir.resolve( )}\n{root.resolve( )}"
+        digest = sha256( identity.encode( ) ).hexdigest( )[ : 32 ]
+        return self.directory / f"{digest}.tsv"
+
+
+def _parse_entries( text: str ) -> dict[ str, JournalEntry ]:
+    ''' Parses journal entries. Malformed lines are ignored. '''
+    entries: dict[ str, JournalEntry ] = { }
+    for line in text.splitlines( ):
+        if not line or line.startswith( '#' ): continue
+        fields = line.split( '\t', maxsplit = 5 )
+        if len( fields ) != 6: continue  # noqa: PLR2004
+        size, mtime_ns, inode, content_hash, destination, key = fields
+        if not all( map( str.isdigit, ( size, mtime_ns, inode ) ) ): continue
+        entries[ key ] = JournalEntry(
+            size = int( size ),
+            mtime_ns = int( mtime_ns ),
+            inode = int( inode ),
+            content_hash = content_hash,
+            destination = destination )
+    return entries
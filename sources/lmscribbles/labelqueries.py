@@ -0,0 +1,216 @@
+# vim: set filetype=python fileencoding=utf-8:
+# -*- coding: utf-8 -*-
+
+#============================================================================#
+#                                                                            #
+#  Licensed under the Apache License, Version 2.0 (the "License");           #
+#  you may not use this file except in compliance with the License.          #
+#  You may obtain a copy of the License at                                   #
+#                                                                            #
+#      http://www.apache.org/licenses/LICENSE-2.0                            #
+#                                                                            #
+#  Unless required by applicable law or agreed to in writing, software       #
+#  distributed under the License is distributed on an "AS IS" BASIS,         #
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.  #
+#  See the License for the specific language governing permissions and       #
+#  limitations under the License.                                            #
+#                                                                            #
+#============================================================================#
+
+''' Boolean queries over labels of scribbles.
+
+    Queries combine labels with ``AND``, ``OR``, ``NOT``, and parentheses,
+    such as ``quality:gem AND (purpose:analysis OR purpose:debug) AND NOT
+    tech:web-scraping``. Adjacent terms are combined with ``AND``.
+    Operators are recognized regardless of case. Terms with asterisks or
+    question marks are wildcards, such as ``tech:*``, which match any label
+    of a namespace.
+
+    Queries are parsed into expressions, which are evaluated as operations
+    on posting sets: the identifiers of records with each label.
+'''
+
+
+from re import findall as _find_all
+
+from . import __
+from . import exceptions as _exceptions
+
+
+_OPERATORS = frozenset( ( 'and', 'or', 'not' ) )
+_WILDCARDS = frozenset( '*?' )
+
+
+class LabelTerm( __.immut.DataclassObject ):
+    ''' Label, or wildcard pattern of labels. '''
+
+    pattern: str
+
+    @property
+    def wildcard( self ) -> bool:
+        ''' Whether pattern has wildcards. '''
+        return not _WILDCARDS.isdisjoint( self.pattern )
+
+
+class LabelConjunction( __.immut.DataclassObject ):
+    ''' Expressions which must all be satisfied. '''
+
+    operands: tuple[ 'LabelExpression', ... ]
+
+
+class LabelDisjunction( __.immut.DataclassObject ):
+    ''' Expressions of which any must be satisfied. '''
+
+    operands: tuple[ 'LabelExpression', ... ]
+
+
+class LabelNegation( __.immut.DataclassObject ):
+    ''' Expression which must not be satisfied. '''
+
+    operand: 'LabelExpression'
+
+
+LabelExpression: __.typx.TypeAlias = (
+    LabelTerm | LabelConjunction | LabelDisjunction | LabelNegation )
+
+# Returns identifiers of records with labels which match term
+PostingsResolver: __.typx.TypeAlias = __.cabc.Callable[
+    [ LabelTerm ], frozenset[ str ] ]
+# Returns identifiers of all records
+UniverseSurveyor: __.typx.TypeAlias = __.cabc.Callable[
+    [ ], frozenset[ str ] ]
+
+
+def evaluate_label_expression(
+    expression: LabelExpression,
+    resolve: PostingsResolver,
+    survey_universe: UniverseSurveyor,
+) -> frozenset[ str ]:
+    ''' Evaluates expression as operations on posting sets.
+
+        Posting sets are resolved once per term. Conjunctions intersect
+        their positive operands, smallest first, and subtract their negated
+        operands, so that universe of records is surveyed only if negation
+        cannot be expressed as subtraction.
+    '''
+    return _Evaluator( resolve, survey_universe ).evaluate( expression )
+
+
+def parse_label_query( text: str ) -> LabelExpression:
+    ''' Parses label query into expression.
+
+        Raises LabelQueryInvalidity, if query is malformed.
+    '''
+    parser = _Parser( _tokenize( text ) )
+    expression = parser.parse_disjunction( )
+    if not parser.exhausted:
+        raise _exceptions.LabelQueryInvalidity( text )
+    return expression
+
+
+class _Parser:
+    ''' Recursive descent parser of label queries. '''
+
+    def __init__( self, tokens: __.cabc.Sequence[ str ] ) -> None:
+        self.tokens = tokens
+        self.index = 0
+
+    @property
+    def exhausted( self ) -> bool:
+        ''' Whether all tokens have been parsed. '''
+        return self.index == len( self.tokens )
+
+    def parse_conjunction( self ) -> LabelExpression:
+        operands = [ self.parse_negation( ) ]
+        while not self.exhausted:
+            word = self.tokens[ self.index ]
+            if word.casefold( ) == 'and': self.index += 1
+            elif word == ')' or word.casefold( ) == 'or': break
+            operands.append( self.parse_negation( ) )
+        if len( operands ) == 1: return operands[ 0 ]
+        return LabelConjunction( operands = tuple( operands ) )
+
+    def parse_disjunction( self ) -> LabelExpression:
+        operands = [ self.parse_conjunction( ) ]
+        while not self.exhausted and (
+            self.tokens[ self.index ].casefold( ) == 'or'
+        ):
+            self.index += 1
+            operands.append( self.parse_conjunction( ) )
+        if len( operands ) == 1: return operands[ 0 ]
+        return LabelDisjunction( operands = tuple( operands ) )
+
+    def parse_negation( self ) -> LabelExpression:
+        word = self._consume( )
+        if word.casefold( ) == 'not':
+            return LabelNegation( operand = self.parse_negation( ) )
+        if word == '(':
+            expression = self.parse_disjunction( )
+            if self._consume( ) != ')': self._fail( )
+            return expression
+        if word == ')' or word.casefold( ) in _OPERATORS: self._fail( )
+        return LabelTerm( pattern = word )
+
+    def _consume( self ) -> str:
+        if self.exhausted: self._fail( )
+        word = self.tokens[ self.index ]
+        self.index += 1
+        return word
+
+    def _fail( self ) -> __.typx.NoReturn:
+        raise _exceptions.LabelQueryInvalidity( ' '.join( self.tokens ) )
+
+
+class _Evaluator:
+    ''' Evaluator of expressions with cached posting sets. '''
+
+    def __init__(
+        self, resolve: PostingsResolver, survey_universe: UniverseSurveyor
+    ) -> None:
+        self.resolve = resolve
+        self.survey_universe = survey_universe
+        self.postings: dict[ str, frozenset[ str ] ] = { }
+        self.universe: frozenset[ str ] | None = None
+
+    def evaluate( self, expression: LabelExpression ) -> frozenset[ str ]:
+        match expression:
+            case LabelTerm( ): return self._resolve( expression )
+            case LabelNegation( ):
+                return self._survey( ) - self.evaluate( expression.operand )
+            case LabelDisjunction( ):
+                selection: frozenset[ str ] = frozenset( )
+                for operand in expression.operands:
+                    selection = selection | self.evaluate( operand )
+                return selection
+            case LabelConjunction( ): return self._conjoin( expression )
+
+    def _conjoin( self, expression: LabelConjunction ) -> frozenset[ str ]:
+        positives = sorted(
+            ( self.evaluate( operand ) for operand in expression.operands
+              if not isinstance( operand, LabelNegation ) ),
+            key = len )
+        negatives = [
+            operand.operand for operand in expression.operands
+            if isinstance( operand, LabelNegation ) ]
+        selection = positives[ 0 ] if positives else self._survey( )
+        for positive in positives[ 1 : ]:
+            if not selection: return selection
+            selection = selection & positive
+        for negative in negatives:
+            if not selection: return selection
+            selection = selection - self.evaluate( negative )
+        return selection
+
+    def _resolve( self, term: LabelTerm ) -> frozenset[ str ]:
+        if term.pattern not in self.postings:
+            self.postings[ term.pattern ] = self.resolve( term )
+        return self.postings[ term.pattern ]
+
+    def _survey( self ) -> frozenset[ str ]:
+        if self.universe is None: self.universe = self.survey_universe( )
+        return self.universe
+
+
+def _tokenize( text: str ) -> tuple[ str, ... ]:
+    ''' Splits query into parentheses and words. '''
+    return tuple( _find_all( r'[()]|[^\s()]+', text ) )
@@ -0,0 +1,38 @@
+# vim: set filetype=python fileencoding=utf-8:
+# -*- coding: utf-8 -*-
+
+#============================================================================#
+#                                                                            #
+#  Licensed under the Apache License, Version 2.0 (the "License");           #
+#  you may not use this file except in compliance with the License.          #
+#  You may obtain a copy of the License at                                   #
+#                                                                            #
+#      http://www.apache.org/licenses/LICENSE-2.0                            #
+#                                                                            #
+#  Unless required by applicable law or agreed to in writing, software       #
+#  distributed under the License is distributed on an "AS IS" BASIS,         #
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.  #
+#  See the License for the specific language governing permissions and       #
+#  limitations under the License.                                            #
+#                                                                            #
+#============================================================================#
+
+
+
+''' Locations of persistent caches. '''
+
+
+from . import __
+
+
+CACHE_DIRECTORY_DEFAULT = '.auxiliary/caches/lmscribbles'
+
+
+def produce_archive_location(
+    directory: __.Path, archive: __.Path, suffix: str
+) -> __.Path:
+    ''' Produces location, unique to archive, for cache of archive. '''
+    from hashlib import sha256
+    identity = str( archive.resolve( ) )
+    digest = sha256( identity.encode( ) ).hexdigest( )[ : 32 ]
+    return directory / f"{digest}{suffix}"
@@ -0,0 +1,171 @@
+# vim: set filetype=python fileencoding=utf-8:
+# -*- coding: utf-8 -*-
+
+#============================================================================#
+#                                                                            #
+#  Licensed under the Apache License, Version 2.0 (the "License");           #
+#  you may not use this file except in compliance with the License.          #
+#  You may obtain a copy of the License at                                   #
+#                                                                            #
+#      http://www.apache.org/licenses/LICENSE-2.0                            #
+#                                                                            #
+#  Unless required by applicable law or agreed to in writing, software       #
+#  distributed under the License is distributed on an "AS IS" BASIS,         #
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.  #
+#  See the License for the specific language governing permissions and       #
+#  limitations under the License.                                            #
+#                                                                            #
+#============================================================================#
+
+
+
+''' Content manifests of project directories in archive. '''
+
+
+from threading import Lock as _Lock
+
+from . import __
+from . import contents as _contents
+
+
+MANIFEST_NAME = '.manifest.tsv'
+
+_HEADER = '# lmscribbles content manifest: sha256 size mtime_ns path\n'
+
+
+class ManifestEntry( __.immut.DataclassObject ):
+    ''' Recorded state of file in project directory. '''
+
+    content_hash: str
+    size: int
+    mtime_ns: int
+
+
+class Manifest(
+    __.immut.Object, instances_mutables = ( 'altered', 'hits', 'misses' )
+):
+    ''' Content manifest for project directory in archive.
+
+        Records size, modification time, and SHA-256 hash of each file,
+        by path relative to the project directory. A file is rehashed only
+        if its size or modification time differ from those recorded.
+        Counts lookups which used recorded hashes, as hits, and which
+        hashed files, as misses. Safe for use from multiple threads.
+    '''
+
+    altered: bool
+    directory: __.Path
+    hits: int
+    misses: int
+
+    def __init__(
+        self,
+        directory: __.Path,
+        entries: __.cabc.Mapping[ str, ManifestEntry ] | None = None,
+    ) -> None:
+        self.altered = False
+        self.directory = directory
+        self.hits = 0
+        self.misses = 0
+        self._entries: dict[ str, ManifestEntry ] = dict( entries or { } )
+        self._lock = _Lock( )
+
+    @classmethod
+    def load( cls, directory: __.Path ) -> __.typx.Self:
+        ''' Loads manifest from project directory, if it has one. '''
+        try: text = ( directory / MANIFEST_NAME ).read_text( )
+        except FileNotFoundError: return cls( directory )
+        return cls( directory, _parse_entries( text ) )
+
+    def access_hash( self, file_path: __.Path ) -> str | None:
+        ''' Returns hash of file content. None, if file does not exist.
+
+            Uses recorded hash when file is unchanged by stat. Otherwise,
+            computes hash and records it.
+        '''
+        key = self._produce_key( file_path )
+        try: stat = file_path.stat( )
+        except FileNotFoundError:
+            with self._lock:
+                if self._entries.pop( key, None ): self.altered = True
+            return None
+        with self._lock:
+            entry = self._entries.get( key )
+            if (    entry is not None
+                and entry.size == stat.st_size
+                and entry.mtime_ns == stat.st_mtime_ns
+            ):
+                self.hits += 1
+                return entry.content_hash
+            self.misses += 1
+        content_hash = _contents.compute_hash( file_path )
+        self._record( key, content_hash, stat )
+        return content_hash
+
+    def discard_absent( self, keys: __.cabc.Collection[ str ] ) -> int:
+        ''' Discards entries for paths not among keys. Returns count. '''
+        present = frozenset( keys )
+        with self._lock:
+            absent = [ key for key in self._entries if key not in present ]
+            for key in absent: del self._entries[ key ]
+            if absent: self.altered = True
+        return len( absent )
+
+    def record( self, file_path: __.Path, content_hash: str ) -> None:
+        ''' Records hash of file which was just written. '''
+        self._record(
+            self._produce_key( file_path ), content_hash, file_path.stat( ) )
+
+    def save( self ) -> None:
+        ''' Saves manifest atomically, if it has been altered. '''
+        from tempfile import NamedTemporaryFile
+        with self._lock:
+            if not self.altered: return
+            lines = [ _HEADER ]
+            lines.extend(
+                f"{entry.content_hash}\t{entry.size}\t{entry.mtime_ns}\t"
+                f"{key}\n"
+                for key, entry in sorted( self._entries.items( ) ) )
+            self.directory.mkdir( parents = True, exist_ok = True )
+            with NamedTemporaryFile(
+                'w', dir = self.directory, prefix = MANIFEST_NAME,
+                delete = False
+            ) as file:
+                file.writelines( lines )
+            __.os.replace( file.name, self.directory / MANIFEST_NAME )
+            self.altered = False
+
+    def survey_entries( self ) -> tuple[ tuple[ str, ManifestEntry ], ... ]:
+        ''' Returns recorded entries, by relative path, in path order. '''
+        with self._lock: return tuple( sorted( self._entries.items( ) ) )
+
+    def _produce_key( self, file_path: __.Path ) -> str:
+        return file_path.relative_to( self.directory ).as_posix( )
+
+    def _record(
+        self, key: str, content_hash: str, stat: __.os.stat_result
+    ) -> None:
+        if '\n' in key: return  # Cannot be represented in manifest.
+        entry = ManifestEntry(
+            content_hash = content_hash,
+            size = stat.st_size,
+            mtime_ns = stat.st_mtime_ns )
+        with self._lock:
+            self._entries[ key ] = entry
+            self.altered = True
+
+
+def _parse_entries( text: str ) -> dict[ str, ManifestEntry ]:
+    ''' Parses manifest entries. Malformed lines are ignored. '''
+    entries: dict[ str, ManifestEntry ] = { }
+    for line in text.splitlines( ):
+        if not line or line.startswith( '#' ): continue
+        fields = line.split( '\t', maxsplit = 3 )
+        if len( fields ) != 4: continue  # noqa: PLR2004
+        content_hash, size, mtime_ns, key = fields
+        if not ( size.isdigit( ) and mtime_ns.isdigit( ) ): continue
+        entries[ key ] = ManifestEntry(
+            content_hash = content_hash,
+            size = int( size ),
+            mtime_ns = int( mtime_ns ) )
+    return entries
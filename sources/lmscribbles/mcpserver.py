@@ -0,0 +1,603 @@
+# vim: set filetype=python fileencoding=utf-8:
+# -*- coding: utf-8 -*-
+
+#============================================================================#
+#                                                                            #
+#  Licensed under the Apache License, Version 2.0 (the "License");           #
+#  you may not use this file except in compliance with the License.          #
+#  You may obtain a copy of the License at                                   #
+#                                                                            #
+#      http://www.apache.org/licenses/LICENSE-2.0                            #
+#                                                                            #
+#  Unless required by applicable law or agreed to in writing, software       #
+#  distributed under the License is distributed on an "AS IS" BASIS,         #
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.  #
+#  See the License for the specific language governing permissions and       #
+#  limitations under the License.                                            #
+#                                                                            #
+#============================================================================#
+
+
+''' Server of archive tools for agents over Model Context Protocol.
+
+    Speaks JSON-RPC 2.0 over standard input and output, one message per
+    line, as per the stdio transport of the protocol. Results of tools are
+    paged and are limited by an estimated budget of tokens, so that agents
+    can query large archives in small, predictable increments.
+'''
+
+
+from fnmatch import fnmatchcase as _fnmatchcase
+from itertools import islice as _islice
+from json import dumps as _json_dumps
+from json import loads as _json_loads
+
+from . import __
+from . import archives as _archives
+from . import commands as _commands
+from . import discovery as _discovery
+from . import exceptions as _exceptions
+from . import manifests as _manifests
+from . import retention as _retention
+
+
+# JSON object of message or result
+_Data: __.typx.TypeAlias = dict[ str, __.typx.Any ]
+
+_T = __.typx.TypeVar( '_T' )
+
+
+PROTOCOL_VERSIONS = ( '2025-06-18', '2025-03-26', '2024-11-05' )
+PAGE_SIZE_DEFAULT = 50
+PAGE_SIZE_MAXIMUM = 500
+TOKEN_BUDGET_DEFAULT = 4_000
+
+_CHARACTERS_PER_TOKEN = 4  # Approximate, for serialized results.
+_CONTENT_LINES_DEFAULT = 200
+_SNIPPET_LENGTH_MAXIMUM = 200
+_SNIPPETS_MAXIMUM = 3
+
+_JSONRPC_INTERNAL_ERROR = -32603
+_JSONRPC_INVALID_PARAMS = -32602
+_JSONRPC_INVALID_REQUEST = -32600
+_JSONRPC_METHOD_NOT_FOUND = -32601
+_JSONRPC_PARSE_ERROR = -32700
+
+_PAGING_PROPERTIES: _Data = {
+    'cursor': {
+        'type': 'string',
+        'description': 'Cursor from previous page of results.' },
+    'limit': {
+        'type': 'integer', 'minimum': 1, 'maximum': PAGE_SIZE_MAXIMUM,
+        'description': 'Maximum number of results in page.' },
+    'token_budget': {
+        'type': 'integer', 'minimum': 1,
+        'description': 'Approximate maximum number of tokens in page.' },
+}
+_TOOLS: tuple[ _Data, ... ] = (
+    {
+        'name': 'ingest',
+        'description':
+            'Ingest scribbles from source paths into project of archive. '
+            'Returns counts of outcomes and notable events, within limit '
+            'and budget of tokens, with count of events omitted beyond '
+            'them.',
+        'inputSchema': {
+            'type': 'object',
+            'properties': {
+                'project_name': { 'type': 'string' },
+                'source_paths': {
+                    'type': 'array', 'items': { 'type': 'string' } },
+                'dry_run': { 'type': 'boolean' },
+                'check_secrets': { 'type': 'boolean' },
+                'limit': _PAGING_PROPERTIES[ 'limit' ],
+                'token_budget': _PAGING_PROPERTIES[ 'token_budget' ],
+            },
+            'required': [ 'project_name', 'source_paths' ],
+        },
+    },
+    {
+        'name': 'search',
+        'description':
+            'Search archived scribbles by path and, optionally, by text. '
+            'Returns page of file records, with snippets of matching lines '
+            'for text searches.',
+        'inputSchema': {
+            'type': 'object',
+            'properties': {
+                'query': {
+                    'type': 'string',
+                    'description':
+                        'Case-insensitive substring of project/path.' },
+                'pattern': {
+                    'type': 'string',
+                    'description': 'Glob pattern for project/path.' },
+                'text': {
+                    'type': 'string',
+                    'description':
+                        'Case-insensitive substring of file content.' },
+                'project': { 'type': 'string' },
+                **_PAGING_PROPERTIES,
+            },
+        },
+    },
+    {
+        'name': 'file_metadata',
+        'description':
+            'Describe archived file: size, hash, and duplicates elsewhere '
+            'in archive. Optionally, include range of its lines.',
+        'inputSchema': {
+            'type': 'object',
+            'properties': {
+                'project': { 'type': 'string' },
+                'path': { 'type': 'string' },
+                'include_content': { 'type': 'boolean' },
+                'start_line': { 'type': 'integer', 'minimum': 1 },
+                'line_count': { 'type': 'integer', 'minimum': 1 },
+                'token_budget': _PAGING_PROPERTIES[ 'token_budget' ],
+            },
+            'required': [ 'project', 'path' ],
+        },
+    },
+    {
+        'name': 'update_manifest',
+        'description':
+            'Reconcile content manifest of project with its directory: '
+            'hash new or changed files and forget removed ones.',
+        'inputSchema': {
+            'type': 'object',
+            'properties': { 'project': { 'type': 'string' } },
+            'required': [ 'project' ],
+        },
+    },
+)
+
+
+class McpServeResult( __.immut.DataclassObject ):
+    ''' Summary of session of MCP server. '''
+
+    requests: int
+
+    def render_as_json( self ) -> str:
+        ''' Renders result as JSON string. '''
+        return _json_dumps( { 'requests': self.requests }, indent = 2 )
+
+    def render_as_text( self ) -> str:
+        ''' Renders result as human-readable text. '''
+        return f"Served {self.requests} MCP requests."
+
+
+class McpServeCommand( __.immut.DataclassObject ):
+    ''' Serves archive tools to agents over Model Context Protocol.
+
+        Provides tools to ingest scribbles, search archive, describe
+        archived files, and update manifests, over standard input and
+        output. Manifests, scanners, and indexes are retained for the
+        session, so that each call starts warm.
+    '''
+
+    target_base: __.typx.Annotated[
+        __.Location,
+        __.tyro.conf.arg( prefix_name = False ),
+        __.ddoc.Doc( ''' Base directory for ingestion. ''' ),
+    ] = "ingests"
+    cache_directory: __.typx.Annotated[
+        __.Location,
+        __.tyro.conf.arg( prefix_name = False ),
+        __.ddoc.Doc( ''' Directory for persistent caches. ''' ),
+    ] = _commands.CACHE_DIRECTORY_DEFAULT
+    token_budget: __.typx.Annotated[
+        int,
+        __.tyro.conf.arg( prefix_name = False ),
+        __.ddoc.Doc(
+            ''' Default approximate maximum number of tokens per page of
+                results. ''' ),
+    ] = TOKEN_BUDGET_DEFAULT
+
+    async def __call__( self ) -> McpServeResult:
+        ''' Executes MCP server command until input closes. '''
+        from asyncio import to_thread
+        async with _retention.Retainer( ) as retainer:
+            session = _McpSession( self, retainer )
+            while line := await to_thread( __.sys.stdin.readline ):
+                if not line.strip( ): continue
+                response = await session.respond( line )
+                if response is None: continue
+                __.sys.stdout.write( _json_dumps( response ) + '\n' )
+                __.sys.stdout.flush( )
+        return McpServeResult( requests = session.requests )
+
+
+class _McpSession( __.immut.Object, instances_mutables = ( 'requests', ) ):
+    ''' Responds to messages from client of MCP server. '''
+
+    listing: _archives.ArchiveListing
+    options: McpServeCommand
+    requests: int
+    retainer: _retention.Retainer
+
+    def __init__(
+        self, options: McpServeCommand, retainer: _retention.Retainer
+    ) -> None:
+        self.listing = _archives.ArchiveListing(
+            __.Path( options.target_base ), retainer )
+        self.options = options
+        self.requests = 0
+        self.retainer = retainer
+
+    async def respond( self, line: str ) -> _Data | None:
+        ''' Responds to message. None, for notifications. '''
+        identifier = None
+        try:
+            message = _parse_message( line )
+            if 'id' not in message: return None
+            identifier = message[ 'id' ]
+            self.requests += 1
+            result = await self._dispatch(
+                message[ 'method' ], message[ 'params' ] )
+        except _ProtocolError as exception:
+            return _produce_error(
+                identifier, exception.code, exception.message )
+        except _exceptions.ToolArgumentInvalidity as exception:
+            return _produce_error(
+                identifier, _JSONRPC_INVALID_PARAMS,
+                exception.render_as_text( ) )
+        except Exception as exception:
+            return _produce_error(
+                identifier, _JSONRPC_INTERNAL_ERROR, str( exception ) )
+        return { 'jsonrpc': '2.0', 'id': identifier, 'result': result }
+
+    async def _call_tool( self, params: _Data ) -> _Data:
+        name = params.get( 'name' )
+        arguments = __.typx.cast(
+            _Data, params.get( 'arguments' ) or { } )
+        handlers = {
+            'file_metadata': self._describe_file,
+            'ingest': self._ingest,
+            'search': self._search,
+            'update_manifest': self._update_manifest,
+        }
+        if name not in handlers or not isinstance( arguments, dict ):
+            raise _exceptions.ToolArgumentInvalidity( 'name' )
+        try:
+            with _retention.retaining( self.retainer ):
+                data = await handlers[ name ]( arguments )
+        except ( _exceptions.Omnierror, OSError ) as exception:
+            message = (
+                exception.render_as_text( )
+                if isinstance( exception, _exceptions.Omnierror )
+                else str( exception ) )
+            return {
+                'content': [ { 'type': 'text', 'text': message } ],
+                'isError': True,
+            }
+        return {
+            'content': [ { 'type': 'text', 'text': _json_dumps( data ) } ],
+            'structuredContent': data,
+            'isError': False,
+        }
+
+    async def _describe_file( self, arguments: _Data ) -> _Data:
+        from asyncio import to_thread
+        project = _access_argument( arguments, 'project', str )
+        path = _access_argument( arguments, 'path', str )
+        record = await to_thread( self.listing.locate, project, path )
+        if record is None:
+            raise _exceptions.ToolArgumentInvalidity( 'path' )
+        records = await to_thread( self.listing.survey )
+        data = record.render_as_dictionary( )
+        data[ 'duplicates' ] = [
+            f"{other.project}/{other.path}" for other in records
+            if other.content_hash == record.content_hash
+            and other != record ]
+        if _access_argument( arguments, 'include_content', bool, False ):
+            data[ 'content' ] = await to_thread(
+                _read_lines,
+                self.listing.base / project / path,
+                _access_argument( arguments, 'start_line', int, 1 ),
+                _access_argument(
+                    arguments, 'line_count', int, _CONTENT_LINES_DEFAULT ),
+                self._access_token_budget( arguments ) )
+        return data
+
+    async def _dispatch( self, method: str, params: _Data ) -> _Data:
+        match method:
+            case 'initialize':
+                requested = params.get( 'protocolVersion' )
+                from . import __version__
+                return {
+                    'protocolVersion': (
+                        requested if requested in PROTOCOL_VERSIONS
+                        else PROTOCOL_VERSIONS[ 0 ] ),
+                    'capabilities': { 'tools': { 'listChanged': False } },
+                    'serverInfo': {
+                        'name': 'lmscribbles', 'version': __version__ },
+                }
+            case 'ping': return { }
+            case 'tools/list': return { 'tools': list( _TOOLS ) }
+            case 'tools/call': return await self._call_tool( params )
+            case _:
+                raise _ProtocolError(
+                    _JSONRPC_METHOD_NOT_FOUND, f"Method not found: {method}" )
+
+    async def _ingest( self, arguments: _Data ) -> _Data:
+        source_paths = __.typx.cast(
+            list[ __.typx.Any ],
+            _access_argument( arguments, 'source_paths', list ) )
+        command = _commands.IngestCommand(
+            project_name = _access_argument( arguments, 'project_name', str ),
+            source_paths = tuple( str( path ) for path in source_paths ),
+            target_base = self.options.target_base,
+            cache_directory = self.options.cache_directory,
+            dry_run = _access_argument( arguments, 'dry_run', bool, False ),
+            check_secrets = _access_argument(
+                arguments, 'check_secrets', bool, True ) )
+        page = _EventsPage(
+            limit = self._access_limit( arguments ),
+            token_budget = self._access_token_budget( arguments ) )
+        summary = await command.stream( page )
+        return {
+            'summary': summary.render_as_dictionary( ),
+            **page.render_as_dictionary( ),
+        }
+
+    async def _search( self, arguments: _Data ) -> _Data:
+        from asyncio import to_thread
+        query = _access_argument( arguments, 'query', str, '' ).casefold( )
+        pattern = _access_argument( arguments, 'pattern', str, '*' )
+        text = _access_argument( arguments, 'text', str, '' )
+        project = _access_optional( arguments, 'project', str )
+        records = await to_thread( self.listing.survey, project )
+        matches = (
+            record for record in records
+            if query in f"{record.project}/{record.path}".casefold( )
+            and _fnmatchcase( f"{record.project}/{record.path}", pattern ) )
+        items = (
+            _search_contents( self.listing.base, matches, text ) if text
+            else ( record.render_as_dictionary( ) for record in matches ) )
+        return await to_thread(
+            _paginate, items, self._access_paging( arguments ) )
+
+    async def _update_manifest( self, arguments: _Data ) -> _Data:
+        from asyncio import to_thread
+        project = _access_argument( arguments, 'project', str )
+        if project not in await to_thread( self.listing.survey_projects ):
+            raise _exceptions.ToolArgumentInvalidity( 'project' )
+        manifest = self.listing.access_manifest( project )
+        files, removed = await to_thread( _reconcile_manifest, manifest )
+        self.retainer.refresh_manifest( manifest )
+        return {
+            'project': project,
+            'files': files,
+            'rehashed': manifest.misses,
+            'unchanged': manifest.hits,
+            'removed': removed,
+        }
+
+    def _access_paging( self, arguments: _Data ) -> '_Paging':
+        cursor = _access_argument( arguments, 'cursor', str, '0' )
+        if not cursor.isdigit( ):
+            raise _exceptions.ToolArgumentInvalidity( 'cursor' )
+        return _Paging(
+            offset = int( cursor ),
+            limit = self._access_limit( arguments ),
+            token_budget = self._access_token_budget( arguments ) )
+
+    def _access_limit( self, arguments: _Data ) -> int:
+        limit = _access_argument( arguments, 'limit', int, PAGE_SIZE_DEFAULT )
+        return max( 1, min( limit, PAGE_SIZE_MAXIMUM ) )
+
+    def _access_token_budget( self, arguments: _Data ) -> int:
+        return max( 1, _access_argument(
+            arguments, 'token_budget', int, self.options.token_budget ) )
+
+
+class _EventsPage(
+    __.immut.Object, instances_mutables = ( 'omitted', 'tokens' )
+):
+    ''' Collects notable events of ingestion, as they are streamed.
+
+        Events are collected within limit and budget of tokens, as per
+        pages of other tools, and later events are only counted. At least
+        one event is collected, if any is notable. Skips are not notable.
+    '''
+
+    items: list[ _Data ]
+    limit: int
+    omitted: int
+    token_budget: int
+    tokens: int
+
+    def __init__( self, limit: int, token_budget: int ) -> None:
+        self.items = [ ]
+        self.limit = limit
+        self.omitted = 0
+        self.token_budget = token_budget
+        self.tokens = 0
+
+    def __call__( self, event: _Data ) -> None:
+        if event[ 'event' ] == 'skipped': return
+        cost = _estimate_tokens( event )
+        if self.omitted or ( self.items and (
+            len( self.items ) == self.limit
+            or self.tokens + cost > self.token_budget
+        ) ):
+            self.omitted += 1
+            return
+        self.items.append( event )
+        self.tokens += cost
+
+    def render_as_dictionary( self ) -> _Data:
+        ''' Renders collected events and count of omitted events. '''
+        return {
+            'items': list( self.items ),
+            'tokens': self.tokens,
+            'omitted': self.omitted,
+        }
+
+
+class _ProtocolError( Exception ):
+    ''' Error in JSON-RPC message, with code for response. '''
+
+    def __init__( self, code: int, message: str ) -> None:
+        super( ).__init__( message )
+        self.code = code
+        self.message = message
+
+
+class _Paging( __.immut.DataclassObject ):
+    ''' Position, size, and budget of requested page of results. '''
+
+    offset: int
+    limit: int
+    token_budget: int
+
+
+def _access_argument(
+    arguments: _Data,
+    name: str,
+    kind: type[ _T ],
+    default: _T | None = None,
+) -> _T:
+    ''' Returns argument of kind. Else, default, if there is one. '''
+    value = arguments.get( name, default )
+    if value is None: raise _exceptions.ToolArgumentInvalidity( name )
+    if not isinstance( value, kind ) or (
+        isinstance( value, bool ) and kind is not bool
+    ): raise _exceptions.ToolArgumentInvalidity( name )
+    return value
+
+
+def _access_optional(
+    arguments: _Data, name: str, kind: type[ _T ]
+) -> _T | None:
+    if arguments.get( name ) is None: return None
+    return _access_argument( arguments, name, kind )
+
+
+def _estimate_tokens( item: __.typx.Any ) -> int:
+    return len( _json_dumps( item ) ) // _CHARACTERS_PER_TOKEN + 1
+
+
+def _paginate( items: __.cabc.Iterable[ _Data ], paging: _Paging ) -> _Data:
+    ''' Collects page of items within limit and budget of tokens.
+
+        At least one item is included, if any remain, so that paging always
+        advances. The cursor of the next page is absent after last item.
+    '''
+    page: list[ _Data ] = [ ]
+    tokens = 0
+    iterator = _islice( items, paging.offset, None )
+    for item in iterator:
+        cost = _estimate_tokens( item )
+        if page and (
+            len( page ) == paging.limit
+            or tokens + cost > paging.token_budget
+        ):
+            break
+        page.append( item )
+        tokens += cost
+    else: return { 'items': page, 'tokens': tokens, 'next_cursor': None }
+    return {
+        'items': page,
+        'tokens': tokens,
+        'next_cursor': str( paging.offset + len( page ) ),
+    }
+
+
+def _parse_message( line: str ) -> _Data:
+    ''' Parses JSON-RPC message, with parameters defaulted to empty. '''
+    try: message = _json_loads( line )
+    except ValueError as exception:
+        raise _ProtocolError( _JSONRPC_PARSE_ERROR, 'Parse error' ) from (
+            exception )
+    if not isinstance( message, dict ): message = { }
+    message_ = __.typx.cast( _Data, message )
+    params: __.typx.Any = message_.get( 'params' ) or { }
+    if 'method' not in message_ or not isinstance( params, dict ):
+        raise _ProtocolError( _JSONRPC_INVALID_REQUEST, 'Invalid request' )
+    return { **message_, 'params': params }
+
+
+def _produce_error(
+    identifier: __.typx.Any, code: int, message: str
+) -> _Data:
+    return {
+        'jsonrpc': '2.0',
+        'id': identifier,
+        'error': { 'code': code, 'message': message },
+    }
+
+
+def _read_lines(
+    file_path: __.Path, start: int, count: int, token_budget: int
+) -> _Data:
+    ''' Reads range of lines from file, within budget of tokens.
+
+        Reading stops once range or budget is exhausted, rather than
+        reading the whole file.
+    '''
+    lines: list[ str ] = [ ]
+    characters = token_budget * _CHARACTERS_PER_TOKEN
+    with file_path.open( encoding = 'utf-8', errors = 'replace' ) as file:
+        for line in _islice( file, max( 0, start - 1 ), None ):
+            if len( lines ) == count or (
+                lines and len( line ) > characters
+            ): break
+            lines.append( line[ : characters ] )
+            characters -= len( line )
+        else:
+            return { 'start_line': start, 'lines': lines, 'next_line': None }
+    return {
+        'start_line': start,
+        'lines': lines,
+        'next_line': start + len( lines ),
+    }
+
+
+def _reconcile_manifest( manifest: _manifests.Manifest ) -> tuple[ int, int ]:
+    ''' Hashes files of project directory anew, where changed by stat.
+
+        Forgets entries of removed files and saves manifest. Returns counts
+        of files and of removed entries.
+    '''
+    criteria = _discovery.DiscoveryFilter(
+        excludes = ( f"/{_manifests.MANIFEST_NAME}", ),
+        default_excludes = False )
+    keys: list[ str ] = [ ]
+    for _, file_path in _discovery.discover_source_files(
+        ( manifest.directory, ), criteria
+    ):
+        if manifest.access_hash( file_path ) is None: continue
+        keys.append( file_path.relative_to( manifest.directory ).as_posix( ) )
+    removed = manifest.discard_absent( keys )
+    manifest.save( )
+    return len( keys ), removed
+
+
+def _search_contents(
+    base: __.Path,
+    records: __.cabc.Iterable[ _archives.ArchiveRecord ],
+    text: str,
+) -> __.cabc.Iterator[ _Data ]:
+    ''' Yields records of files with text, with snippets of matching lines.
+
+        Files are read only as results are consumed.
+    '''
+    needle = text.casefold( )
+    for record in records:
+        file_path = base / record.project / record.path
+        snippets: list[ _Data ] = [ ]
+        try:
+            with file_path.open( encoding = 'utf-8', errors = 'replace' ) as (
+                file
+            ):
+                for number, line in enumerate( file, start = 1 ):
+                    if needle not in line.casefold( ): continue
+                    snippets.append( {
+                        'line': number,
+                        'text': line.strip( )[ : _SNIPPET_LENGTH_MAXIMUM ] } )
+                    if len( snippets ) == _SNIPPETS_MAXIMUM: break
+        except OSError: continue
+        if snippets:
+            yield { **record.render_as_dictionary( ), 'snippets': snippets }
@@ -0,0 +1,131 @@
+# vim: set filetype=python fileencoding=utf-8:
+# -*- coding: utf-8 -*-
+
+#============================================================================#
+#                                                                            #
+#  Licensed under the Apache License, Version 2.0 (the "License");           #
+#  you may not use this file except in compliance with the License.          #
+#  You may obtain a copy of the License at                                   #
+#                                                                            #
+#      http://www.apache.org/licenses/LICENSE-2.0                            #
+#                                                                            #
+#  Unless required by applicable law or agreed to in writing, software       #
+#  distributed under the License is distributed on an "AS IS" BASIS,         #
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.  #
+#  See the License for the specific language governing permissions and       #
+#  limitations under the License.                                            #
+#                                                                            #
+#============================================================================#
+
+
+
+''' Content-addressed store of file contents. '''
+
+
+from errno import EMLINK as _EMLINK
+from errno import ENOTSUP as _ENOTSUP
+from errno import EPERM as _EPERM
+from errno import EXDEV as _EXDEV
+from shutil import copystat as _copystat
+from stat import S_IMODE as _S_IMODE
+from stat import S_IWGRP as _S_IWGRP
+from stat import S_IWOTH as _S_IWOTH
+from stat import S_IWUSR as _S_IWUSR
+
+from . import __
+from . import contents as _contents
+from . import copying as _copying
+
+
+# Failures which mean that hardlink is impossible for pair of paths.
+_UNLINKABLE = frozenset( ( _EMLINK, _ENOTSUP, _EPERM, _EXDEV ) )
+_WRITABLE = _S_IWUSR | _S_IWGRP | _S_IWOTH
+
+
+class ObjectStore( __.immut.Object ):
+    ''' Store of file contents, as objects named by SHA-256 hash.
+
+        Objects live under directories named by the first two hex digits
+        of their hashes. Archive entries are materialized from objects as
+        hardlinks, if permitted and possible, else as reflinks or copies.
+        Objects are made read-only, since hardlinked entries share them,
+        and so an in-place edit of one entry would alter all of them.
+    '''
+
+    directory: __.Path
+    hardlinks: bool
+
+    def __init__(
+        self, directory: __.Path, hardlinks: bool = True
+    ) -> None:
+        self.directory = directory
+        self.hardlinks = hardlinks
+
+    def contains( self, content_hash: str ) -> bool:
+        ''' Has store seen content with hash? '''
+        return self.locate( content_hash ).is_file( )
+
+    def locate( self, content_hash: str ) -> __.Path:
+        ''' Produces location of object for content hash. '''
+        return self.directory / content_hash[ : 2 ] / content_hash[ 2 : ]
+
+    def materialize(
+        self, content: _contents.FileContent, destination: __.Path
+    ) -> _copying.CopyStrategies:
+        ''' Places content at destination via its object.
+
+            Stores object first, if it is not already stored. Destination
+            is replaced atomically. Returns strategy which succeeded.
+        '''
+        location = self.store( content )
+        temporary = _produce_temporary( destination )
+        try:
+            if self.hardlinks and _link( location, temporary ):
+                __.os.replace( temporary, destination )
+                return _copying.CopyStrategies.Hardlink
+            stat = location.stat( )
+            strategy = _copying.copy_content(
+                _contents.FileContent(
+                    file_path = location,
+                    content_hash = content.content_hash,
+                    size = content.size,
+                    mtime_ns = stat.st_mtime_ns ),
+                temporary )
+            _copystat( content.file_path, temporary )
+            __.os.replace( temporary, destination )
+        except BaseException:
+            temporary.unlink( missing_ok = True )
+            raise
+        return strategy
+
+    def store( self, content: _contents.FileContent ) -> __.Path:
+        ''' Stores content as object, unless already stored. '''
+        location = self.locate( content.content_hash )
+        if location.is_file( ): return location
+        location.parent.mkdir( parents = True, exist_ok = True )
+        temporary = _produce_temporary( location )
+        try:
+            _copying.copy_content( content, temporary )
+            _copystat( content.file_path, temporary )
+            mode = _S_IMODE( temporary.stat( ).st_mode )
+            temporary.chmod( mode & ~_WRITABLE )
+            __.os.replace( temporary, location )
+        except BaseException:
+            temporary.unlink( missing_ok = True )
+            raise
+        return location
+
+
+def _link( location: __.Path, destination: __.Path ) -> bool:
+    ''' Hardlinks object to destination, if possible. '''
+    try: __.os.link( location, destination )
+    except OSError as exception:
+        if exception.errno not in _UNLINKABLE: raise
+        return False
+    return True
+
+
+def _produce_temporary( location: __.Path ) -> __.Path:
+    ''' Produces unique temporary path beside location. '''
+    from uuid import uuid4
+    return location.with_name( f".{location.name}.{uuid4( ).hex}.partial" )
@@ -0,0 +1,130 @@
+# vim: set filetype=python fileencoding=utf-8:
+# -*- coding: utf-8 -*-
+
+#============================================================================#
+#                                                                            #
+#  Licensed under the Apache License, Version 2.0 (the "License");           #
+#  you may not use this file except in compliance with the License.          #
+#  You may obtain a copy of the License at                                   #
+#                                                                            #
+#      http://www.apache.org/licenses/LICENSE-2.0                            #
+#                                                                            #
+#  Unless required by applicable law or agreed to in writing, software       #
+#  distributed under the License is distributed on an "AS IS" BASIS,         #
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.  #
+#  See the License for the specific language governing permissions and       #
+#  limitations under the License.                                            #
+#                                                                            #
+#============================================================================#
+
+
+
+''' Ingestion plans, computed once and applied later. '''
+
+
+from json import dumps as _json_dumps
+from json import loads as _json_loads
+
+from . import __
+from . import discovery as _discovery
+from . import exceptions as _exceptions
+from . import ingestion as _ingestion
+
+
+PLAN_FORMAT = 1
+
+
+class IngestPlan( __.immut.DataclassObject ):
+    ''' Decisions of dry-run ingestion, with hashes and scan findings.
+
+        Each decision is recorded as an ingestion outcome, along with the
+        base path of its source, and with size
+        and modification time of its source as it was read, so that
+        application of the plan can verify that sources are unchanged.
+    '''
+
+    project_name: str
+    target_dir: __.Path
+    source_files: __.cabc.Sequence[ _discovery.SourceFileTuple ]
+    outcomes: __.cabc.Sequence[ _ingestion.IngestOutcome ]
+
+    @classmethod
+    def load( cls, file_path: __.Path ) -> __.typx.Self:
+        ''' Loads plan from JSON file. '''
+        try: data: __.typx.Any = _json_loads( file_path.read_text( ) )
+        except ValueError as exception:
+            raise _exceptions.PlanInvalidity(
+                str( file_path ) ) from exception
+        if not isinstance( data, dict ) or (
+            data.get( 'format' ) != PLAN_FORMAT  # pyright: ignore
+        ): raise _exceptions.PlanInvalidity( str( file_path ) )
+        data = __.typx.cast( dict[ str, __.typx.Any ], data )
+        try:
+            return cls(
+                project_name = data[ 'project' ],
+                target_dir = __.Path( data[ 'target_dir' ] ),
+                source_files = tuple(
+                    (   __.Path( entry[ 'base' ] ),
+                        __.Path( entry[ 'source' ] ) )
+                    for entry in data[ 'entries' ] ),
+                outcomes = tuple(
+                    _restore_outcome( entry ) for entry in data[ 'entries' ] ),
+            )
+        except ( KeyError, TypeError, ValueError ) as exception:
+            raise _exceptions.PlanInvalidity(
+                str( file_path ) ) from exception
+
+    def save( self, file_path: __.Path ) -> None:
+        ''' Saves plan as JSON file. '''
+        data: dict[ str, __.typx.Any ] = {
+            'format': PLAN_FORMAT,
+            'project': self.project_name,
+            'target_dir': str( self.target_dir ),
+            'entries': [
+                { 'base': str( base ), **_render_outcome( outcome ) }
+                for ( base, _ ), outcome
+                in zip( self.source_files, self.outcomes ) ],
+        }
+        file_path.parent.mkdir( parents = True, exist_ok = True )
+        file_path.write_text( _json_dumps( data, indent = 2 ) )
+
+
+def _render_outcome(
+    outcome: _ingestion.IngestOutcome
+) -> dict[ str, __.typx.Any ]:
+    return {
+        'source': str( outcome.source ),
+        'disposition': outcome.disposition.value,
+        'destination': _render_path( outcome.destination ),
+        'original': _render_path( outcome.original ),
+        'reason': outcome.reason,
+        'warnings': list( outcome.warnings ),
+        'content_hash': outcome.content_hash,
+        'duplicates': list( outcome.duplicates ),
+        'size': outcome.size,
+        'mtime_ns': outcome.mtime_ns,
+    }
+
+
+def _render_path( path: __.Path | None ) -> str | None:
+    return None if path is None else str( path )
+
+
+def _restore_outcome(
+    entry: dict[ str, __.typx.Any ]
+) -> _ingestion.IngestOutcome:
+    return _ingestion.IngestOutcome(
+        source = __.Path( entry[ 'source' ] ),
+        disposition = _ingestion.Dispositions( entry[ 'disposition' ] ),
+        destination = _restore_path( entry[ 'destination' ] ),
+        original = _restore_path( entry[ 'original' ] ),
+        reason = str( entry[ 'reason' ] ),
+        warnings = tuple( map( str, entry[ 'warnings' ] ) ),
+        content_hash = entry[ 'content_hash' ],
+        duplicates = tuple( map( str, entry[ 'duplicates' ] ) ),
+        size = entry[ 'size' ],
+        mtime_ns = entry[ 'mtime_ns' ] )
+
+
+def _restore_path( path: str | None ) -> __.Path | None:
+    return None if path is None else __.Path( path )
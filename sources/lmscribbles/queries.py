@@ -0,0 +1,432 @@
+# vim: set filetype=python fileencoding=utf-8:
+# -*- coding: utf-8 -*-
+
+#============================================================================#
+#                                                                            #
+#  Licensed under the Apache License, Version 2.0 (the "License");           #
+#  you may not use this file except in compliance with the License.          #
+#  You may obtain a copy of the License at                                   #
+#                                                                            #
+#      http://www.apache.org/licenses/LICENSE-2.0                            #
+#                                                                            #
+#  Unless required by applicable law or agreed to in writing, software       #
+#  distributed under the License is distributed on an "AS IS" BASIS,         #
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.  #
+#  See the License for the specific language governing permissions and       #
+#  limitations under the License.                                            #
+#                                                                            #
+#============================================================================#
+
+''' Commands for classification and search of archived scribbles. '''
+
+
+from json import dumps as _json_dumps
+from re import IGNORECASE as _IGNORECASE
+from re import Pattern as _Pattern
+from re import compile as _compile_regex
+from re import error as _RegexError
+
+from . import __
+from . import catalogs as _catalogs
+from . import exceptions as _exceptions
+from . import labelqueries as _labelqueries
+from . import locations as _locations
+from . import retention as _retention
+from . import trigrams as _trigrams
+
+
+LIMIT_DEFAULT = 50
+# Maximum number of matching lines in snippet of regular expression search
+_LINES_MAXIMUM = 3
+_LINE_WIDTH_MAXIMUM = 160
+
+
+class ClassifyResult( __.immut.DataclassObject ):
+    ''' Results of classification, or scribbles awaiting review. '''
+
+    classified: int
+    records: __.cabc.Sequence[ _catalogs.ScribbleMetadata ]
+    total: int
+
+    def render_as_json( self ) -> str:
+        ''' Renders result as JSON string. '''
+        data: dict[ str, __.typx.Any ] = {
+            'classified': self.classified,
+            'total': self.total,
+            'records': [
+                record.render_as_dictionary( ) for record in self.records ],
+        }
+        return _json_dumps( data, indent = 2 )
+
+    def render_as_text( self ) -> str:
+        ''' Renders result as human-readable text. '''
+        lines = [ f"Classified {self.classified} scribble(s)." ]
+        if self.records:
+            lines.append(
+                f"Showing {len( self.records )} of {self.total} "
+                "scribble(s):" )
+            lines.extend(
+                f"  {_render_record_line( record )}"
+                for record in self.records )
+        return '\n'.join( lines )
+
+
+class ClassifyCommand( __.immut.DataclassObject ):
+    ''' Classifies and labels archived scribbles in catalog.
+
+        Labels, status, and notes are applied to named scribbles of
+        project. Without changes to apply, lists scribbles of status, raw
+        by default, for review.
+    '''
+
+    target_base: __.typx.Annotated[
+        __.Location,
+        __.tyro.conf.arg( prefix_name = False ),
+        __.ddoc.Doc( ''' Base directory of archive. ''' ),
+    ] = "ingests"
+    cache_directory: __.typx.Annotated[
+        __.Location,
+        __.tyro.conf.arg( prefix_name = False ),
+        __.ddoc.Doc( ''' Directory for persistent caches. ''' ),
+    ] = _locations.CACHE_DIRECTORY_DEFAULT
+    project: __.typx.Annotated[
+        __.typx.Optional[ str ],
+        __.tyro.conf.arg( prefix_name = False ),
+        __.ddoc.Doc( ''' Project of scribbles. ''' ),
+    ] = None
+    paths: __.typx.Annotated[
+        __.cabc.Sequence[ str ],
+        __.tyro.conf.arg( prefix_name = False ),
+        __.ddoc.Doc( ''' Paths of scribbles, relative to project. ''' ),
+    ] = ( )
+    add_labels: __.typx.Annotated[
+        __.cabc.Sequence[ str ],
+        __.tyro.conf.arg( prefix_name = False ),
+        __.ddoc.Doc( ''' Labels to add to scribbles. ''' ),
+    ] = ( )
+    remove_labels: __.typx.Annotated[
+        __.cabc.Sequence[ str ],
+        __.tyro.conf.arg( prefix_name = False ),
+        __.ddoc.Doc( ''' Labels to remove from scribbles. ''' ),
+    ] = ( )
+    status: __.typx.Annotated[
+        __.typx.Optional[ _catalogs.ScribbleStatuses ],
+        __.tyro.conf.arg( prefix_name = False ),
+        __.ddoc.Doc(
+            ''' Status to set on scribbles. Or, without changes, status of
+                scribbles to review. ''' ),
+    ] = None
+    notes: __.typx.Annotated[
+        __.typx.Optional[ str ],
+        __.tyro.conf.arg( prefix_name = False ),
+        __.ddoc.Doc( ''' Notes to set on scribbles. ''' ),
+    ] = None
+    limit: __.typx.Annotated[
+        int,
+        __.tyro.conf.arg( prefix_name = False ),
+        __.ddoc.Doc( ''' Maximum number of scribbles to review. ''' ),
+    ] = LIMIT_DEFAULT
+
+    async def __call__( self ) -> ClassifyResult:
+        ''' Executes classification command. '''
+        from asyncio import to_thread
+        changing = (
+            self.add_labels or self.remove_labels or self.notes is not None )
+        if not changing and not self.paths:
+            query = _catalogs.CatalogQuery(
+                project = self.project,
+                status = self.status or _catalogs.ScribbleStatuses.Raw,
+                limit = self.limit )
+            with _access_catalog(
+                self.cache_directory, self.target_base
+            ) as catalog:
+                records = await to_thread( catalog.query, query )
+                total = await to_thread( catalog.count, query )
+            return ClassifyResult(
+                classified = 0, records = records, total = total )
+        if self.project is None or not self.paths:
+            raise _exceptions.OptionsInvalidity( ( 'project', 'paths' ) )
+        identifiers = tuple(
+            _catalogs.produce_identifier(
+                self.project, __.Path( path ).as_posix( ) )
+            for path in self.paths )
+        with _access_catalog(
+            self.cache_directory, self.target_base
+        ) as catalog:
+            classified = await to_thread(
+                catalog.classify, identifiers,
+                labels_added = tuple( self.add_labels ),
+                labels_removed = tuple( self.remove_labels ),
+                status = self.status, notes = self.notes )
+        return ClassifyResult(
+            classified = classified, records = ( ), total = 0 )
+
+
+class SearchResult( __.immut.DataclassObject ):
+    ''' Page of catalog records which satisfy search.
+
+        Total is a lower bound, if not exact, as when search stops
+        confirming candidates once page is filled.
+    '''
+
+    records: __.cabc.Sequence[ _catalogs.ScribbleMetadata ]
+    total: int
+    offset: int = 0
+    snippets: __.cabc.Mapping[ str, str ] = __.dcls.field(
+        default_factory = __.immut.Dictionary[ str, str ] )
+    total_exact: bool = True
+    candidates: int | None = None
+
+    def render_as_json( self ) -> str:
+        ''' Renders result as JSON string. '''
+        records: list[ dict[ str, __.typx.Any ] ] = [ ]
+        for record in self.records:
+            data = record.render_as_dictionary( )
+            if record.id in self.snippets:
+                data[ 'snippet' ] = self.snippets[ record.id ]
+            records.append( data )
+        data: dict[ str, __.typx.Any ] = {
+            'total': self.total, 'total_exact': self.total_exact }
+        if self.candidates is not None:
+            data[ 'candidates' ] = self.candidates
+        return _json_dumps(
+            { **data, 'offset': self.offset, 'records': records },
+            indent = 2 )
+
+    def render_as_text( self ) -> str:
+        ''' Renders result as human-readable text. '''
+        if not self.records: return "No scribbles found."
+        start = self.offset + 1
+        finish = self.offset + len( self.records )
+        total = str( self.total ) if self.total_exact else (
+            f"at least {self.total}" )
+        if self.candidates is not None:
+            total = f"{total} (of {self.candidates} candidates)"
+        lines = [ f"Scribbles {start}-{finish} of {total}:" ]
+        for record in self.records:
+            lines.append( f"  {_render_record_line( record )}" )
+            snippet = self.snippets.get( record.id )
+            if snippet:
+                lines.append( f"    {' '.join( snippet.split( ) )}" )
+        return '\n'.join( lines )
+
+
+class SearchCommand( __.immut.DataclassObject ):
+    ''' Searches catalog of archived scribbles.
+
+        Criteria are combined; scribbles must satisfy all of them. Results are
+        ordered by recency of ingestion. With text, contents are searched in
+        full-text index; results are then ordered by BM25 relevance, with
+        snippets of matching contents. Contents which are not yet in full-text
+        index are indexed before either search of contents. With regular
+        expression, only scribbles whose contents have the trigrams which it
+        requires are read, in order of identifier, until one match past the
+        page is confirmed; results then have matching lines, and their total is
+        a lower bound, unless every candidate was read.
+    '''
+
+    target_base: __.typx.Annotated[
+        __.Location,
+        __.tyro.conf.arg( prefix_name = False ),
+        __.ddoc.Doc( ''' Base directory of archive. ''' ),
+    ] = "ingests"
+    cache_directory: __.typx.Annotated[
+        __.Location,
+        __.tyro.conf.arg( prefix_name = False ),
+        __.ddoc.Doc( ''' Directory for persistent caches. ''' ),
+    ] = _locations.CACHE_DIRECTORY_DEFAULT
+    project: __.typx.Annotated[
+        __.typx.Optional[ str ],
+        __.tyro.conf.arg( prefix_name = False ),
+        __.ddoc.Doc( ''' Project of scribbles. ''' ),
+    ] = None
+    status: __.typx.Annotated[
+        __.typx.Optional[ _catalogs.ScribbleStatuses ],
+        __.tyro.conf.arg( prefix_name = False ),
+        __.ddoc.Doc( ''' Status of scribbles. ''' ),
+    ] = None
+    labels: __.typx.Annotated[
+        __.cabc.Sequence[ str ],
+        __.tyro.conf.arg( prefix_name = False ),
+        __.ddoc.Doc(
+            ''' Query over labels of scribbles. Labels combine with AND,
+                OR, NOT, and parentheses; adjacent labels must all match.
+                Asterisks are wildcards, as in 'tech:*'. ''' ),
+    ] = ( )
+    pattern: __.typx.Annotated[
+        __.typx.Optional[ str ],
+        __.tyro.conf.arg( prefix_name = False ),
+        __.ddoc.Doc(
+            ''' Glob pattern for paths of scribbles, relative to
+                project. ''' ),
+    ] = None
+    content_hash: __.typx.Annotated[
+        __.typx.Optional[ str ],
+        __.tyro.conf.arg( prefix_name = False ),
+        __.ddoc.Doc( ''' Hash of content of scribbles. ''' ),
+    ] = None
+    text: __.typx.Annotated[
+        __.typx.Optional[ str ],
+        __.tyro.conf.arg( prefix_name = False ),
+        __.ddoc.Doc(
+            ''' Words or quoted phrases which contents of scribbles must
+                all contain. Words which end with asterisk match as
+                prefixes. ''' ),
+    ] = None
+    regex: __.typx.Annotated[
+        __.typx.Optional[ str ],
+        __.tyro.conf.arg( prefix_name = False ),
+        __.ddoc.Doc(
+            ''' Regular expression which contents of scribbles must
+                match. ''' ),
+    ] = None
+    ignore_case: __.typx.Annotated[
+        bool,
+        __.tyro.conf.arg( prefix_name = False ),
+        __.ddoc.Doc( ''' Match regular expression without case. ''' ),
+    ] = False
+    limit: __.typx.Annotated[
+        int,
+        __.tyro.conf.arg( prefix_name = False ),
+        __.ddoc.Doc( ''' Maximum number of scribbles in results. ''' ),
+    ] = LIMIT_DEFAULT
+    offset: __.typx.Annotated[
+        int,
+        __.tyro.conf.arg( prefix_name = False ),
+        __.ddoc.Doc( ''' Number of matching scribbles to skip. ''' ),
+    ] = 0
+
+    async def __call__( self ) -> SearchResult:
+        ''' Executes search command. '''
+        from asyncio import to_thread
+        query = _catalogs.CatalogQuery(
+            project = self.project,
+            content_hash = self.content_hash,
+            status = self.status,
+            label_expression = (
+                _labelqueries.parse_label_query( ' '.join( self.labels ) )
+                if self.labels else None ),
+            path_pattern = self.pattern,
+            text = (
+                None if self.text is None
+                else _catalogs.produce_text_query( self.text ) ),
+            limit = self.limit,
+            offset = self.offset )
+        with _access_catalog(
+            self.cache_directory, self.target_base
+        ) as catalog:
+            if self.regex is not None or query.text is not None:
+                # Contents may await indexing, as after upgrade of schema.
+                await _catalogs.index_pending_texts( catalog )
+            if self.regex is not None:
+                return await self._search_regex( catalog, query )
+            total = await to_thread( catalog.count, query )
+            if query.text is None:
+                records = await to_thread( catalog.query, query )
+                return SearchResult(
+                    records = records, total = total, offset = self.offset )
+            matches = await to_thread( catalog.search, query )
+        return SearchResult(
+            records = tuple( match.record for match in matches ),
+            total = total,
+            offset = self.offset,
+            snippets = __.immut.Dictionary(
+                ( match.record.id, match.snippet ) for match in matches ) )
+
+    async def _search_regex(
+        self, catalog: _catalogs.Catalog, query: _catalogs.CatalogQuery
+    ) -> SearchResult:
+        ''' Searches contents of candidates from trigram index. '''
+        from asyncio import to_thread
+        regex = __.typx.cast( str, self.regex )
+        flags = _IGNORECASE if self.ignore_case else 0
+        try:
+            pattern = _compile_regex( regex, flags )
+            trigram_query = _trigrams.produce_trigram_query( regex, flags )
+        except _RegexError as exc:
+            raise _exceptions.PatternInvalidity( regex ) from exc
+        candidates = await to_thread(
+            catalog.select_candidates, query, trigram_query )
+        matches, examined = await to_thread(
+            _confirm_matches, candidates, pattern,
+            self.offset + self.limit + 1 )
+        page = matches[ self.offset : self.offset + self.limit ]
+        return SearchResult(
+            records = tuple( record for record, _ in page ),
+            total = len( matches ),
+            offset = self.offset,
+            snippets = __.immut.Dictionary(
+                ( record.id, snippet ) for record, snippet in page ),
+            total_exact = examined == len( candidates ),
+            candidates = len( candidates ) )
+
+
+@__.ctxl.contextmanager
+def _access_catalog(
+    cache_directory: __.Location, target_base: __.Location
+) -> __.cabc.Iterator[ _catalogs.Catalog ]:
+    ''' Provides catalog of archive, from current retainer if any. '''
+    location = _catalogs.produce_catalog_location(
+        __.Path( cache_directory ), __.Path( target_base ) )
+    retainer = _retention.access_retainer( )
+    if retainer is not None:
+        yield retainer.retain(
+            ( 'catalog', location.resolve( ) ),
+            lambda: _catalogs.Catalog( location ) )
+        return
+    with _catalogs.Catalog( location ) as catalog: yield catalog
+
+
+def _confirm_matches(
+    records: __.cabc.Sequence[ _catalogs.ScribbleMetadata ],
+    pattern: _Pattern[ str ],
+    maximum: int,
+) -> tuple[ list[ tuple[ _catalogs.ScribbleMetadata, str ] ], int ]:
+    ''' Reads contents of records and keeps those which match pattern.
+
+        Reading stops once maximum number of matches is reached. Also
+        returns number of records examined. Contents are read whole,
+        regardless of size limit of full-text index, once per content
+        hash. Snippets have first matching lines, with their numbers.
+    '''
+    snippets: dict[ str, str | None ] = { }
+    matches: list[ tuple[ _catalogs.ScribbleMetadata, str ] ] = [ ]
+    examined = 0
+    for record in records:
+        if len( matches ) >= maximum: break
+        examined += 1
+        if record.content_hash not in snippets:
+            text = _catalogs.read_text(
+                __.Path( record.archived_path ), size_maximum = None )
+            snippets[ record.content_hash ] = _produce_regex_snippet(
+                text, pattern )
+        snippet = snippets[ record.content_hash ]
+        if snippet is not None: matches.append( ( record, snippet ) )
+    return matches, examined
+
+
+def _produce_regex_snippet(
+    text: str, pattern: _Pattern[ str ]
+) -> str | None:
+    ''' Produces snippet of first matching lines. None, if no match. '''
+    lines: list[ str ] = [ ]
+    position = 0
+    while len( lines ) < _LINES_MAXIMUM:
+        match = pattern.search( text, position )
+        if match is None: break
+        start = text.rfind( '\n', 0, match.start( ) ) + 1
+        end = text.find( '\n', match.end( ) )
+        if end == -1: end = len( text )
+        number = text.count( '\n', 0, start ) + 1
+        line = text[ start : end ].strip( )[ : _LINE_WIDTH_MAXIMUM ]
+        lines.append( f"{number}: {line}" )
+        position = max( end, match.end( ) + 1 )
+    if not lines: return None
+    return ' … '.join( lines )
+
+
+def _render_record_line( record: _catalogs.ScribbleMetadata ) -> str:
+    labels = ', '.join( sorted( record.labels ) )
+    line = f"{record.id} [{record.status.value}]"
+    if labels: line = f"{line} ({labels})"
+    return line
@@ -0,0 +1,426 @@
+# vim: set filetype=python fileencoding=utf-8:
+# -*- coding: utf-8 -*-
+
+#============================================================================#
+#                                                                            #
+#  Licensed under the Apache License, Version 2.0 (the "License");           #
+#  you may not use this file except in compliance with the License.          #
+#  You may obtain a copy of the License at                                   #
+#                                                                            #
+#      http://www.apache.org/licenses/LICENSE-2.0                            #
+#                                                                            #
+#  Unless required by applicable law or agreed to in writing, software       #
+#  distributed under the License is distributed on an "AS IS" BASIS,         #
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.  #
+#  See the License for the specific language governing permissions and       #
+#  limitations under the License.                                            #
+#                                                                            #
+#============================================================================#
+
+''' Rebuild of catalog from archive and selections on disk. '''
+
+
+from json import dumps as _json_dumps
+
+from . import __
+from . import catalogs as _catalogs
+from . import contents as _contents
+from . import indexes as _indexes
+from . import locations as _locations
+from . import manifests as _manifests
+
+
+SELECTIONS_DIRECTORY_DEFAULT = 'selections'
+WORKERS_DEFAULT = min( 32, ( __.os.cpu_count( ) or 1 ) + 4 )
+
+
+class ArchivedFile( __.immut.DataclassObject ):
+    ''' File in project directory of archive, with its stat. '''
+
+    project: str
+    path: str
+    location: __.Path
+    size: int
+    mtime_ns: int
+
+    @property
+    def identifier( self ) -> str:
+        ''' Identifier of catalog record for file. '''
+        return _catalogs.produce_identifier( self.project, self.path )
+
+
+class ProjectSelections( __.immut.DataclassObject ):
+    ''' Labels of selected scribbles of project.
+
+        Labels are by path relative to project directory of archive.
+        Selected scribbles without labels in selections file, but with
+        links in selections directory, have empty labels.
+    '''
+
+    project: str
+    labels: __.cabc.Mapping[ str, frozenset[ str ] ]
+    warnings: __.cabc.Sequence[ str ] = ( )
+
+
+class RebuildResult( __.immut.DataclassObject ):
+    ''' Results of catalog rebuild. '''
+
+    scribbles: int
+    selected: int
+    hashed: int
+    discarded: int
+    incremental: bool
+    indexed: int = 0
+    warnings: __.cabc.Sequence[ str ] = ( )
+
+    def render_as_json( self ) -> str:
+        ''' Renders result as JSON string. '''
+        data: dict[ str, __.typx.Any ] = {
+            'scribbles': self.scribbles,
+            'selected': self.selected,
+            'hashed': self.hashed,
+            'discarded': self.discarded,
+            'incremental': self.incremental,
+            'indexed': self.indexed,
+            'warnings': list( self.warnings ),
+        }
+        return _json_dumps( data, indent = 2 )
+
+    def render_as_text( self ) -> str:
+        ''' Renders result as human-readable text. '''
+        mode = 'Updated' if self.incremental else 'Rebuilt'
+        lines = [
+            f"{mode} catalog of {self.scribbles} scribble(s), "
+            f"{self.selected} selected.",
+            f"Hashed {self.hashed} file(s); "
+            f"discarded {self.discarded} record(s); "
+            f"indexed {self.indexed} new content(s).",
+        ]
+        if self.warnings:
+            lines.append( f"Warnings ({len( self.warnings )}):" )
+            lines.extend( f"  {warning}" for warning in self.warnings )
+        return '\n'.join( lines )
+
+
+class CatalogRebuildCommand( __.immut.DataclassObject ):
+    ''' Rebuilds catalog from archive and selections on disk.
+
+        Walks project directories of archive, resolves links in selections
+        directories, and parses selections files, in parallel. Labels of
+        selected scribbles come from selections files; selected scribbles
+        are classified. A full rebuild hashes every file and bulk loads
+        the catalog, creating its indexes after the load; labels, notes,
+        and statuses which were applied in catalog are kept for files which
+        remain. An incremental rebuild hashes only files whose stat differs
+        from the last rebuild, discards records of vanished files, and adds
+        labels from selections to existing ones. Either way, contents which
+        are new to catalog are read, in parallel and in bounded batches,
+        into its full-text index, and the content index of the archive is
+        replaced with the hashes of all files, for detection of duplicates
+        by later ingestions.
+    '''
+
+    target_base: __.typx.Annotated[
+        __.Location,
+        __.tyro.conf.arg( prefix_name = False ),
+        __.ddoc.Doc( ''' Base directory of archive. ''' ),
+    ] = "ingests"
+    selections_directory: __.typx.Annotated[
+        __.Location,
+        __.tyro.conf.arg( prefix_name = False ),
+        __.ddoc.Doc(
+            ''' Directory of selections files and link directories,
+                by project. ''' ),
+    ] = SELECTIONS_DIRECTORY_DEFAULT
+    cache_directory: __.typx.Annotated[
+        __.Location,
+        __.tyro.conf.arg( prefix_name = False ),
+        __.ddoc.Doc( ''' Directory for persistent caches. ''' ),
+    ] = _locations.CACHE_DIRECTORY_DEFAULT
+    incremental: __.typx.Annotated[
+        bool,
+        __.tyro.conf.arg( prefix_name = False ),
+        __.ddoc.Doc(
+            ''' Hash only files changed since last rebuild and update
+                catalog in place. ''' ),
+    ] = False
+    workers: __.typx.Annotated[
+        int,
+        __.tyro.conf.arg( prefix_name = False ),
+        __.ddoc.Doc(
+            ''' Maximum number of files hashed or parsed at once. ''' ),
+    ] = WORKERS_DEFAULT
+
+    async def __call__( self ) -> RebuildResult:
+        ''' Executes catalog rebuild command. '''
+        from asyncio import gather, get_running_loop
+        from concurrent.futures import ThreadPoolExecutor
+        from functools import partial
+        loop = get_running_loop( )
+        base = __.Path( self.target_base )
+        selections_directory = __.Path( self.selections_directory )
+        with ThreadPoolExecutor( max_workers = max( 1, self.workers ) ) as (
+            executor
+        ):
+            projects, selecting = await gather(
+                loop.run_in_executor( executor, _survey_directories, base ),
+                loop.run_in_executor(
+                    executor, _survey_selecting, selections_directory ) )
+            surveys = await gather( *(
+                loop.run_in_executor(
+                    executor, survey_archived_files, base, project )
+                for project in projects ) )
+            selections = await gather( *(
+                loop.run_in_executor( executor, partial(
+                    parse_selections, selections_directory, base, project ) )
+                for project in selecting ) )
+            files = tuple( file for survey in surveys for file in survey )
+            location = _catalogs.produce_catalog_location(
+                __.Path( self.cache_directory ), base )
+            with _catalogs.Catalog( location ) as catalog:
+                previous: dict[ str, _catalogs.CatalogStamp ] = { }
+                if self.incremental:
+                    previous = await loop.run_in_executor(
+                        executor, catalog.survey_stamps )
+                stale = tuple(
+                    file for file in files
+                    if _detect_staleness( file, previous ) )
+                hashes = await gather( *(
+                    loop.run_in_executor(
+                        executor, _contents.compute_hash, file.location )
+                    for file in stale ) )
+                hashes_ = dict( zip(
+                    ( file.identifier for file in stale ), hashes ) )
+                result = await loop.run_in_executor( executor, partial(
+                    self._load, catalog, files, previous, hashes_,
+                    selections ) )
+                await loop.run_in_executor( executor, partial(
+                    self._index_contents, files, previous, hashes_ ) )
+                indexed = await _catalogs.index_pending_texts(
+                    catalog, executor )
+        return __.dcls.replace( result, indexed = indexed )
+
+    def _index_contents(
+        self,
+        files: __.cabc.Sequence[ ArchivedFile ],
+        previous: __.cabc.Mapping[ str, _catalogs.CatalogStamp ],
+        hashes: __.cabc.Mapping[ str, str ],
+    ) -> None:
+        ''' Replaces entries of content index with those of files. '''
+        location = _indexes.produce_index_location(
+            __.Path( self.cache_directory ), __.Path( self.target_base ) )
+        with _indexes.ContentIndex( location ) as index:
+            index.replace(
+                ( file.project, file.path,
+                  hashes.get( file.identifier )
+                  or previous[ file.identifier ].content_hash )
+                for file in files )
+
+    def _load(
+        self,
+        catalog: _catalogs.Catalog,
+        files: __.cabc.Sequence[ ArchivedFile ],
+        previous: __.cabc.Mapping[ str, _catalogs.CatalogStamp ],
+        hashes: __.cabc.Mapping[ str, str ],
+        selections: __.cabc.Sequence[ ProjectSelections ],
+    ) -> RebuildResult:
+        ''' Loads records of files into catalog. '''
+        labels = {
+            _catalogs.produce_identifier( selection.project, path ): labels_
+            for selection in selections
+            for path, labels_ in selection.labels.items( ) }
+        present = { file.identifier for file in files }
+        warnings = [
+            warning for selection in selections
+            for warning in selection.warnings ]
+        warnings.extend(
+            f"Selected scribble is not in archive: {identifier}"
+            for identifier in sorted( labels.keys( ) - present ) )
+        stamps: dict[ str, _catalogs.CatalogStamp ] = { }
+        records: list[ _catalogs.ScribbleMetadata ] = [ ]
+        for file in files:
+            identifier = file.identifier
+            if identifier in hashes: content_hash = hashes[ identifier ]
+            else: content_hash = previous[ identifier ].content_hash
+            stamp = _catalogs.CatalogStamp(
+                size = file.size,
+                mtime_ns = file.mtime_ns,
+                content_hash = content_hash )
+            if identifier not in hashes and identifier not in labels:
+                continue
+            stamps[ identifier ] = stamp
+            records.append( _produce_record(
+                file, content_hash, labels.get( identifier ) ) )
+        discards = tuple( previous.keys( ) - present )
+        if self.incremental: catalog.update( records, stamps, discards )
+        else: catalog.replace( records, stamps )
+        return RebuildResult(
+            scribbles = len( files ),
+            selected = len( labels.keys( ) & present ),
+            hashed = len( hashes ),
+            discarded = len( discards ),
+            incremental = self.incremental,
+            warnings = tuple( warnings ) )
+
+
+def parse_selections(
+    directory: __.Path, base: __.Path, project: str
+) -> ProjectSelections:
+    ''' Parses selections of project from links and selections file.
+
+        Names in selections file are resolved through links of same name
+        in selections directory of project, if any, else are taken as
+        paths relative to project directory of archive. Problems are
+        reported as warnings rather than raised.
+    '''
+    warnings: list[ str ] = [ ]
+    links = _survey_links( directory / project, base / project, warnings )
+    labels = dict.fromkeys( links.values( ), frozenset[ str ]( ) )
+    file = directory / f"{project}.toml"
+    if file.is_file( ):
+        for filename, labels_ in _parse_selections_file( file, warnings ):
+            path = links.get( filename, filename )
+            labels[ path ] = labels.get( path, frozenset( ) ) | labels_
+    return ProjectSelections(
+        project = project, labels = labels, warnings = tuple( warnings ) )
+
+
+def survey_archived_files(
+    base: __.Path, project: str
+) -> tuple[ ArchivedFile, ... ]:
+    ''' Surveys regular files of project directory, except manifest. '''
+    from stat import S_ISREG
+    root = base / project
+    files: list[ ArchivedFile ] = [ ]
+    for directory, subdirectories, names in __.os.walk( root ):
+        subdirectories.sort( )
+        for name in sorted( names ):
+            if name.startswith( _manifests.MANIFEST_NAME ): continue
+            location = __.Path( directory ) / name
+            try: stat = location.lstat( )
+            except FileNotFoundError: continue
+            if not S_ISREG( stat.st_mode ): continue
+            files.append( ArchivedFile(
+                project = project,
+                path = location.relative_to( root ).as_posix( ),
+                location = location,
+                size = stat.st_size,
+                mtime_ns = stat.st_mtime_ns ) )
+    return tuple( files )
+
+
+def _detect_staleness(
+    file: ArchivedFile,
+    previous: __.cabc.Mapping[ str, _catalogs.CatalogStamp ],
+) -> bool:
+    stamp = previous.get( file.identifier )
+    return (
+            stamp is None
+        or  stamp.size != file.size
+        or  stamp.mtime_ns != file.mtime_ns )
+
+
+def _parse_selections_file(
+    file: __.Path, warnings: list[ str ]
+) -> tuple[ tuple[ str, frozenset[ str ] ], ... ]:
+    ''' Parses filenames and labels of selections from TOML file.
+
+        Selections are either an array of tables, each with filename, or a
+        table of tables, by filename.
+    '''
+    if __.sys.version_info >= ( 3, 11 ): from tomllib import loads
+    else: from tomli import loads
+    try: data = loads( file.read_text( encoding = 'utf-8' ) )
+    except ( OSError, UnicodeDecodeError, ValueError ) as exc:
+        warnings.append( f"Could not parse selections file {file}: {exc}" )
+        return ( )
+    selections: __.typx.Any = data.get( 'selections', ( ) )
+    entries: tuple[ __.typx.Any, ... ]
+    if isinstance( selections, dict ):
+        tables = __.typx.cast( dict[ str, __.typx.Any ], selections )
+        entries = tuple(
+            { 'filename': name,
+              **__.typx.cast( dict[ str, __.typx.Any ], table ) }
+            for name, table in tables.items( ) if isinstance( table, dict ) )
+    else: entries = tuple( __.typx.cast( list[ __.typx.Any ], selections ) )
+    results: list[ tuple[ str, frozenset[ str ] ] ] = [ ]
+    for entry in entries:
+        table = __.typx.cast(
+            dict[ str, __.typx.Any ],
+            entry if isinstance( entry, dict ) else { } )
+        filename = table.get( 'filename' )
+        if not isinstance( filename, str ):
+            warnings.append( f"Selection without filename in {file}." )
+            continue
+        labels: __.typx.Any = table.get( 'labels', ( ) )
+        results.append( ( filename, frozenset(
+            label for label in labels if isinstance( label, str ) ) ) )
+    return tuple( results )
+
+
+def _produce_record(
+    file: ArchivedFile,
+    content_hash: str,
+    labels: frozenset[ str ] | None,
+) -> _catalogs.ScribbleMetadata:
+    ''' Produces catalog record for archived file.
+
+        Time of ingestion is taken from modification time of file.
+    '''
+    from datetime import datetime, timezone
+    status = (
+        _catalogs.ScribbleStatuses.Raw if labels is None
+        else _catalogs.ScribbleStatuses.Classified )
+    return _catalogs.ScribbleMetadata(
+        id = file.identifier,
+        project = file.project,
+        path = file.path,
+        original_path = '',
+        archived_path = str( file.location ),
+        content_hash = content_hash,
+        ingested_at = datetime.fromtimestamp(
+            file.mtime_ns / 1e9, timezone.utc ),
+        size_bytes = file.size,
+        labels = labels or frozenset( ),
+        status = status )
+
+
+def _survey_directories( directory: __.Path ) -> tuple[ str, ... ]:
+    ''' Returns names of visible subdirectories, in name order. '''
+    try: entries = tuple( __.os.scandir( directory ) )
+    except FileNotFoundError: return ( )
+    return tuple( sorted(
+        entry.name for entry in entries
+        if entry.is_dir( ) and not entry.name.startswith( '.' ) ) )
+
+
+def _survey_links(
+    directory: __.Path, project_directory: __.Path, warnings: list[ str ]
+) -> dict[ str, str ]:
+    ''' Maps names of links in directory to paths within project. '''
+    try: entries = tuple( __.os.scandir( directory ) )
+    except FileNotFoundError: return { }
+    root = project_directory.resolve( )
+    links: dict[ str, str ] = { }
+    for entry in sorted( entries, key = lambda entry: entry.name ):
+        if not entry.is_symlink( ): continue
+        target = __.Path( entry.path ).resolve( )
+        if not target.is_relative_to( root ) or not target.is_file( ):
+            warnings.append(
+                f"Selection link does not lead into archive: {entry.path}" )
+            continue
+        links[ entry.name ] = target.relative_to( root ).as_posix( )
+    return links
+
+
+def _survey_selecting( directory: __.Path ) -> tuple[ str, ... ]:
+    ''' Returns names of projects with selections files or links. '''
+    try: entries = tuple( __.os.scandir( directory ) )
+    except FileNotFoundError: return ( )
+    names = {
+        entry.name for entry in entries
+        if entry.is_dir( ) and not entry.name.startswith( '.' ) }
+    names.update(
+        entry.name.removesuffix( '.toml' ) for entry in entries
+        if entry.is_file( ) and entry.name.endswith( '.toml' ) )
+    return tuple( sorted( names ) )
@@ -0,0 +1,129 @@
+# vim: set filetype=python fileencoding=utf-8:
+# -*- coding: utf-8 -*-
+
+#============================================================================#
+#                                                                            #
+#  Licensed under the Apache License, Version 2.0 (the "License");           #
+#  you may not use this file except in compliance with the License.          #
+#  You may obtain a copy of the License at                                   #
+#                                                                            #
+#      http://www.apache.org/licenses/LICENSE-2.0                            #
+#                                                                            #
+#  Unless required by applicable law or agreed to in writing, software       #
+#  distributed under the License is distributed on an "AS IS" BASIS,         #
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.  #
+#  See the License for the specific language governing permissions and       #
+#  limitations under the License.                                            #
+#                                                                            #
+#============================================================================#
+
+
+
+''' Retention of warm resources across commands in long-lived process. '''
+
+
+from contextvars import ContextVar as _ContextVar
+
+from . import __
+from . import manifests as _manifests
+
+
+# Size and modification time of manifest file, if it exists
+_ManifestStamp: __.typx.TypeAlias = tuple[ int, int ] | None
+
+_T = __.typx.TypeVar( '_T' )
+
+
+class Retainer( __.immut.Object ):
+    ''' Resources retained across commands by long-lived process.
+
+        Scanners, indexes, and other resources are created on first use,
+        under a key which describes their configuration, and are kept
+        until the retainer exits. Manifests are kept by project directory
+        and are reloaded if their files are changed by other processes.
+        Commands use the retainer which is current in their context, if
+        any. Else, they create and release resources themselves.
+    '''
+
+    def __init__( self ) -> None:
+        self._exits = __.ctxl.AsyncExitStack( )
+        self._manifests: dict[
+            __.Path, tuple[ _ManifestStamp, _manifests.Manifest ] ] = { }
+        self._resources: dict[ __.cabc.Hashable, __.typx.Any ] = { }
+
+    async def __aenter__( self ) -> __.typx.Self:
+        return self
+
+    async def __aexit__( self, *exc_info: __.typx.Any ) -> None:
+        self._manifests.clear( )
+        self._resources.clear( )
+        await self._exits.aclose( )
+
+    def access_manifest( self, directory: __.Path ) -> _manifests.Manifest:
+        ''' Returns manifest of project directory, loading if stale.
+
+            Counts of hits and misses are reset for each access.
+        '''
+        key = directory.resolve( )
+        stamp = _stamp_manifest( directory )
+        retained = self._manifests.get( key )
+        if retained is None or retained[ 0 ] != stamp:
+            manifest = _manifests.Manifest.load( directory )
+            self._manifests[ key ] = ( stamp, manifest )
+            return manifest
+        manifest = retained[ 1 ]
+        manifest.hits = manifest.misses = 0
+        return manifest
+
+    def refresh_manifest( self, manifest: _manifests.Manifest ) -> None:
+        ''' Notes that retained manifest was saved by this process. '''
+        key = manifest.directory.resolve( )
+        if key not in self._manifests: return
+        self._manifests[ key ] = (
+            _stamp_manifest( manifest.directory ), manifest )
+
+    def retain(
+        self,
+        key: __.cabc.Hashable,
+        producer: __.cabc.Callable[
+            [ ], __.ctxl.AbstractContextManager[ _T ] ],
+    ) -> _T:
+        ''' Returns resource under key, entering new one if absent. '''
+        if key not in self._resources:
+            self._resources[ key ] = self._exits.enter_context( producer( ) )
+        return self._resources[ key ]
+
+    async def retain_async(
+        self,
+        key: __.cabc.Hashable,
+        producer: __.cabc.Callable[
+            [ ], __.ctxl.AbstractAsyncContextManager[ _T ] ],
+    ) -> _T:
+        ''' Returns resource under key, entering new one if absent. '''
+        if key not in self._resources:
+            self._resources[ key ] = (
+                await self._exits.enter_async_context( producer( ) ) )
+        return self._resources[ key ]
+
+
+_retainer: _ContextVar[ Retainer | None ] = (
+    _ContextVar( 'retainer', default = None ) )
+
+
+def access_retainer( ) -> Retainer | None:
+    ''' Returns retainer current in context, if any. '''
+    return _retainer.get( )
+
+
+@__.ctxl.contextmanager
+def retaining( retainer: Retainer ) -> __.cabc.Iterator[ Retainer ]:
+    ''' Makes retainer current in context for duration. '''
+    token = _retainer.set( retainer )
+    try: yield retainer
+    finally: _retainer.reset( token )
+
+
+def _stamp_manifest( directory: __.Path ) -> _ManifestStamp:
+    try: stat = ( directory / _manifests.MANIFEST_NAME ).stat( )
+    except FileNotFoundError: return None
+    return stat.st_size, stat.st_mtime_ns
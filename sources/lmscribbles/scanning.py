@@ -0,0 +1,488 @@
+# vim: set filetype=python fileencoding=utf-8:
+# -*- coding: utf-8 -*-
+
+#============================================================================#
+#                                                                            #
+#  Licensed under the Apache License, Version 2.0 (the "License");           #
+#  you may not use this file except in compliance with the License.          #
+#  You may obtain a copy of the License at                                   #
+#                                                                            #
+#      http://www.apache.org/licenses/LICENSE-2.0                            #
+#                                                                            #
+#  Unless required by applicable law or agreed to in writing, software       #
+#  distributed under the License is distributed on an "AS IS" BASIS,         #
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.  #
+#  See the License for the specific language governing permissions and       #
+#  limitations under the License.                                            #
+#                                                                            #
+#============================================================================#
+
+
+''' Secret scanning on pools of workers. '''
+
+
+import sqlite3 as _sqlite3
+
+from asyncio import gather as _gather
+from asyncio import get_running_loop as _get_running_loop
+from concurrent.futures import Executor as _Executor
+from contextlib import ExitStack as _ExitStack
+from io import BytesIO as _BytesIO
+from threading import Lock as _Lock
+from time import perf_counter as _perf_counter
+from time import thread_time as _thread_time
+
+from . import __
+from . import contents as _contents
+from . import exceptions as _exceptions
+
+
+# Count of secrets found, error message, if scan failed, and elapsed and CPU
+# seconds of scan
+_BatchEntry: __.typx.TypeAlias = tuple[ int, str, float, float ]
+# File name, and hash, size, and modification time of content as read, sent
+# to scan worker
+_BatchItem: __.typx.TypeAlias = tuple[ str, str, int, int | None ]
+# Content hash and variant of scan, by file name
+ScanKey: __.typx.TypeAlias = tuple[ str, str ]
+
+
+# Version of cache schema; entries are discarded on change
+_SCHEMA_VERSION = 2
+_SQLITE_VARIABLES_MAXIMUM = 900
+
+
+SCAN_BATCH_SIZE_DEFAULT = 32
+SCAN_CACHE_ENTRIES_MAXIMUM = 100_000
+SCAN_WORKERS_DEFAULT = __.os.cpu_count( ) or 1
+
+
+class ScanBackends( __.enum.Enum ):
+    ''' Execution backends for secret scanning. '''
+
+    Processes = 'processes'
+    Threads = 'threads'
+
+
+class ScanReport( __.immut.DataclassObject ):
+    ''' Report from secret scan of single file. '''
+
+    file_path: __.Path
+    secrets_count: int = 0
+    error: str = ''
+    cached: bool = False
+    elapsed: float = 0.0
+    cpu_time: float = 0.0
+
+
+class ScanCache(
+    __.immut.Object,
+    instances_mutables = ( 'hits', 'misses', '_fingerprint' ),
+):
+    ''' Persistent cache of secret scan results.
+
+        Results are keyed by SHA-256 hash of content, by variant of scan,
+        as produced by :py:func:`produce_variant`, and by fingerprint of
+        detect-secrets version and enabled plugins, so that upgrades or
+        changes in plugins invalidate prior results. The fingerprint, and
+        hence detect-secrets, is loaded on first access with content. Least
+        recently used entries are evicted once the entries maximum is
+        exceeded. Entries are of nearly constant size, so the maximum also
+        bounds size of cache. Failed scans are never cached.
+    '''
+
+    entries_maximum: int
+    file_path: __.Path
+    hits: int
+    misses: int
+
+    def __init__(
+        self,
+        file_path: __.Path,
+        entries_maximum: int = SCAN_CACHE_ENTRIES_MAXIMUM,
+    ) -> None:
+        self.entries_maximum = max( 1, entries_maximum )
+        self.file_path = file_path
+        self.hits = 0
+        self.misses = 0
+        self._fingerprint: str | None = None
+        self._connection = _connect_cache( file_path )
+        self._lock = _Lock( )
+
+    def __enter__( self ) -> __.typx.Self:
+        return self
+
+    def __exit__( self, *exc_info: __.typx.Any ) -> None:
+        with self._lock: self._connection.close( )
+
+    def access(
+        self, keys: __.cabc.Collection[ ScanKey ]
+    ) -> dict[ ScanKey, int ]:
+        ''' Retrieves counts of secrets for previously scanned content. '''
+        keys = frozenset( keys )
+        counts: dict[ ScanKey, int ] = { }
+        if not keys: return counts
+        hashes = tuple( { content_hash for content_hash, _ in keys } )
+        with self._lock, self._connection as connection:
+            fingerprint = self._access_fingerprint( )
+            for i in range( 0, len( hashes ), _SQLITE_VARIABLES_MAXIMUM ):
+                chunk = hashes[ i : i + _SQLITE_VARIABLES_MAXIMUM ]
+                marks = ', '.join( '?' * len( chunk ) )
+                counts.update(
+                    ( ( content_hash, variant ), count )
+                    for content_hash, variant, count in connection.execute(
+                        "SELECT content_hash, variant, secrets_count "  # noqa: S608
+                        "FROM scans WHERE fingerprint = ? "
+                        f"AND content_hash IN ( {marks} )",
+                        ( fingerprint, *chunk ) )
+                    if ( content_hash, variant ) in keys )
+            recency = _advance_recency( connection )
+            connection.executemany(
+                "UPDATE scans SET recency = ? WHERE fingerprint = ? "
+                "AND content_hash = ? AND variant = ?",
+                ( ( recency, fingerprint, *key ) for key in counts ) )
+            self.hits += len( counts )
+            self.misses += len( keys ) - len( counts )
+        return counts
+
+    def store( self, counts: __.cabc.Mapping[ ScanKey, int ] ) -> None:
+        ''' Records counts of secrets for scanned content. '''
+        if not counts: return
+        with self._lock, self._connection as connection:
+            fingerprint = self._access_fingerprint( )
+            recency = _advance_recency( connection )
+            connection.executemany(
+                "INSERT OR REPLACE INTO scans "
+                "( fingerprint, content_hash, variant, secrets_count, "
+                "recency ) VALUES ( ?, ?, ?, ?, ? )",
+                ( ( fingerprint, content_hash, variant, count, recency )
+                  for ( content_hash, variant ), count in counts.items( ) ) )
+            total, = connection.execute(
+                "SELECT COUNT( * ) FROM scans" ).fetchone( )
+            excess = total - self.entries_maximum
+            if excess > 0:
+                connection.execute(
+                    "DELETE FROM scans WHERE rowid IN ( "
+                    "SELECT rowid FROM scans "
+                    "ORDER BY recency, rowid LIMIT ? )", ( excess, ) )
+
+    def _access_fingerprint( self ) -> str:
+        if self._fingerprint is None:
+            self._fingerprint = produce_fingerprint( )
+        return self._fingerprint
+
+
+class SecretsScanner(
+    __.immut.Object, instances_mutables = ( '_settled', )
+):
+    ''' Scans files for secrets in batches on pool of workers.
+
+        With the processes backend, each worker process imports
+        detect-secrets and establishes its plugin settings once, at
+        startup. With the threads backend, settings are established once,
+        in the current process, at first scan, for the remaining lifetime
+        of the scanner. Hence, detect-secrets is only imported if content
+        is actually scanned.
+    '''
+
+    backend: ScanBackends
+    batch_size: int
+    cache: ScanCache | None
+    workers: int
+
+    def __init__(
+        self,
+        backend: ScanBackends = ScanBackends.Processes,
+        workers: int = SCAN_WORKERS_DEFAULT,
+        batch_size: int = SCAN_BATCH_SIZE_DEFAULT,
+        cache: ScanCache | None = None,
+    ) -> None:
+        self.backend = backend
+        self.batch_size = max( 1, batch_size )
+        self.cache = cache
+        self.workers = max( 1, workers )
+        self._executor = _produce_executor( backend, self.workers )
+        self._exits = _ExitStack( )
+        self._settled = False
+
+    async def __aenter__( self ) -> __.typx.Self:
+        self._exits.enter_context( self._executor )
+        return self
+
+    async def __aexit__( self, *exc_info: __.typx.Any ) -> None:
+        self._exits.close( )
+
+    async def scan(
+        self, subjects: __.cabc.Sequence[ _contents.FileContent ]
+    ) -> tuple[ ScanReport, ... ]:
+        ''' Scans contents for secrets. Reports are in order of subjects.
+
+            Identical content is scanned only once per call. If scanner has
+            cache, then content which has been scanned before is not
+            scanned again.
+        '''
+        if not subjects: return ( )
+        from asyncio import to_thread
+        keys = tuple(
+            ( subject.content_hash, produce_variant( subject.file_path ) )
+            for subject in subjects )
+        known: dict[ ScanKey, int ] = { }
+        if self.cache is not None:
+            known = await to_thread( self.cache.access, set( keys ) )
+        pending: dict[ ScanKey, _contents.FileContent ] = { }
+        for key, subject in zip( keys, subjects ):
+            if key in known: continue
+            pending.setdefault( key, subject )
+        entries = dict( zip(
+            pending, await self._scan_pending( tuple( pending.values( ) ) ) ) )
+        scanned = {
+            key: count
+            for key, ( count, error, _, _ ) in entries.items( )
+            if not error }
+        if self.cache is not None:
+            await to_thread( self.cache.store, scanned )
+        known.update( scanned )
+        return tuple(
+            _produce_report( subject, key, known, entries )
+            for key, subject in zip( keys, subjects ) )
+
+    async def _scan_pending(
+        self, subjects: __.cabc.Sequence[ _contents.FileContent ]
+    ) -> tuple[ _BatchEntry, ... ]:
+        if not subjects: return ( )
+        if ScanBackends.Threads is self.backend and not self._settled:
+            from detect_secrets.settings import default_settings
+            self._exits.enter_context( default_settings( ) )
+            self._settled = True
+        loop = _get_running_loop( )
+        size = self.batch_size
+        batches = tuple(
+            tuple(
+                (
+                    str( subject.file_path ), subject.content_hash,
+                    subject.size, subject.mtime_ns )
+                for subject in subjects[ i : i + size ] )
+            for i in range( 0, len( subjects ), size ) )
+        results = await _gather( *(
+            loop.run_in_executor( self._executor, _scan_batch, batch )
+            for batch in batches ) )
+        return tuple( entry for result in results for entry in result )
+
+
+def establish_settings( ) -> None:
+    ''' Establishes default detect-secrets settings for current process.
+
+        Enables all plugins and default filters. Settings are global to
+        detect-secrets and persist until changed.
+    '''
+    from detect_secrets.core.plugins.util import (
+        get_mapping_from_secret_type_to_class,
+    )
+    from detect_secrets.settings import configure_settings_from_baseline
+    configure_settings_from_baseline( {
+        'plugins_used': [
+            { 'name': plugin_type.__name__ }
+            for plugin_type
+            in get_mapping_from_secret_type_to_class( ).values( )
+        ],
+    } )
+
+
+def produce_fingerprint( ) -> str:
+    ''' Produces fingerprint of detect-secrets version and plugins. '''
+    from hashlib import sha256
+
+    from detect_secrets.__version__ import VERSION
+    from detect_secrets.core.plugins.util import (
+        get_mapping_from_secret_type_to_class,
+    )
+    plugins = sorted(
+        plugin_type.__name__
+        for plugin_type in get_mapping_from_secret_type_to_class( ).values( ) )
+    identity = '\n'.join( ( VERSION, *plugins ) )
+    return sha256( identity.encode( ) ).hexdigest( )
+
+
+def produce_variant( file_path: __.Path ) -> str:
+    ''' Produces variant of scan for name of file.
+
+        Findings of detect-secrets depend on name of scanned file as well
+        as on its content: extension selects transformers of lines and
+        filters of non-text files, and lock files and Swagger files are
+        filtered out. Files with same content and same variant have same
+        findings.
+    '''
+    from detect_secrets.filters.heuristic import (
+        is_lock_file,
+        is_swagger_file,
+    )
+    file_name = str( file_path )
+    markers = [ file_path.suffix ]
+    if is_lock_file( file_name ): markers.append( file_path.name )
+    if is_swagger_file( file_name ): markers.append( 'swagger' )
+    return '/'.join( markers )
+
+
+def _advance_recency( connection: _sqlite3.Connection ) -> int:
+    ''' Produces next value in sequence of cache uses. '''
+    recency, = connection.execute(
+        "SELECT COALESCE( MAX( recency ), 0 ) + 1 FROM scans" ).fetchone( )
+    return recency
+
+
+def _connect_cache( file_path: __.Path ) -> _sqlite3.Connection:
+    ''' Connects to cache database, creating it if necessary. '''
+    file_path.parent.mkdir( parents = True, exist_ok = True )
+    connection = _sqlite3.connect( file_path, check_same_thread = False )
+    with connection:
+        connection.execute( "PRAGMA journal_mode = WAL" )
+        version, = connection.execute( "PRAGMA user_version" ).fetchone( )
+        if version < _SCHEMA_VERSION:
+            connection.execute( "DROP TABLE IF EXISTS scans" )
+        connection.execute(
+            "CREATE TABLE IF NOT EXISTS scans ( "
+            "fingerprint TEXT NOT NULL, "
+            "content_hash TEXT NOT NULL, "
+            "variant TEXT NOT NULL, "
+            "secrets_count INTEGER NOT NULL, "
+            "recency INTEGER NOT NULL, "
+            "PRIMARY KEY ( fingerprint, content_hash, variant ) )" )
+        connection.execute(
+            "CREATE INDEX IF NOT EXISTS scans_recency "
+            "ON scans ( recency )" )
+        connection.execute( f"PRAGMA user_version = {_SCHEMA_VERSION}" )
+    return connection
+
+
+def _produce_executor( backend: ScanBackends, workers: int ) -> _Executor:
+    ''' Produces executor for backend. Workers start on demand. '''
+    match backend:
+        case ScanBackends.Processes:
+            from concurrent.futures import ProcessPoolExecutor
+            from multiprocessing import get_context
+            return ProcessPoolExecutor(
+                max_workers = workers,
+                mp_context = get_context( 'spawn' ),
+                initializer = establish_settings )
+        case ScanBackends.Threads:
+            from concurrent.futures import ThreadPoolExecutor
+            return ThreadPoolExecutor( max_workers = workers )
+
+
+def _produce_report(
+    subject: _contents.FileContent,
+    key: ScanKey,
+    known: __.cabc.Mapping[ ScanKey, int ],
+    entries: __.cabc.Mapping[ ScanKey, _BatchEntry ],
+) -> ScanReport:
+    if key not in entries:
+        return ScanReport(
+            file_path = subject.file_path,
+            secrets_count = known[ key ],
+            cached = True )
+    count, error, elapsed, cpu_time = entries[ key ]
+    return ScanReport(
+        file_path = subject.file_path,
+        secrets_count = count,
+        error = error,
+        elapsed = elapsed,
+        cpu_time = cpu_time )
+
+
+def _scan_batch(
+    items: __.cabc.Sequence[ _BatchItem ]
+) -> list[ _BatchEntry ]:
+    ''' Scans batch of files for secrets within worker.
+
+        Each scan is timed, by wall clock and by CPU time of worker thread.
+    '''
+    entries: list[ _BatchEntry ] = [ ]
+    for item in items:
+        started, cpu_started = _perf_counter( ), _thread_time( )
+        count, error = _scan_file( *item )
+        entries.append( (
+            count, error,
+            _perf_counter( ) - started, _thread_time( ) - cpu_started ) )
+    return entries
+
+
+class _NamedBuffer( _BytesIO ):
+    ''' Content of file in memory, named after file for transformers. '''
+
+    def __init__( self, name: str ) -> None:
+        super( ).__init__( )
+        self.name = name
+
+
+def _scan_file(
+    file_name: str, content_hash: str, size: int, mtime_ns: int | None
+) -> tuple[ int, str ]:
+    ''' Scans file for secrets. Captures error rather than raising.
+
+        File is read once, in chunks, which are hashed and buffered for
+        scan of its lines. Scan fails if file changed, by size or
+        modification time, or by hash of chunks, since it was read and
+        hashed, since findings would not be for that content.
+    '''
+    content = _contents.FileContent(
+        file_path = __.Path( file_name ),
+        content_hash = content_hash,
+        size = size,
+        mtime_ns = mtime_ns )
+    buffer = _NamedBuffer( file_name )
+    try:
+        with open( file_name, 'rb' ) as file:
+            stat = __.os.fstat( file.fileno( ) )
+            if stat.st_size != size or (
+                mtime_ns is not None and stat.st_mtime_ns != mtime_ns
+            ): return ( 0, "Content changed since it was hashed" )
+            _contents.stream_content( content, file, buffer )
+        return ( _scan_lines( buffer ), '' )
+    except _exceptions.ContentChangeFailure:
+        return ( 0, "Content changed since it was hashed" )
+    except Exception as exception:
+        return ( 0, repr( exception ) )
+
+
+def _scan_lines( buffer: _NamedBuffer ) -> int:
+    ''' Counts distinct secrets in lines of buffered content of file.
+
+        Follows scan of file by name in detect-secrets: files filtered by
+        name are not scanned; lines come from transformers for the file,
+        if any parse it, else from its text; eager transformers are tried
+        only if nothing is found otherwise. Undecodable content is treated
+        as binary and is not scanned.
+    '''
+    from io import TextIOWrapper
+
+    from detect_secrets.core.scan import (
+        _is_filtered_out,
+    )
+    from detect_secrets.core.scan import (
+        _process_line_based_plugins,
+    )
+    if _is_filtered_out(
+        required_filter_parameters = [ 'filename' ], filename = buffer.name
+    ): return 0
+    buffer.seek( 0 )
+    for lines in _produce_lines( TextIOWrapper( buffer ) ):
+        secrets = set( _process_line_based_plugins(
+            lines = list( enumerate( lines, start = 1 ) ),
+            filename = buffer.name ) )
+        if secrets: return len( secrets )
+    return 0
+
+
+def _produce_lines(
+    file: __.typx.TextIO
+) -> __.cabc.Iterator[ list[ str ] ]:
+    ''' Produces lines of file, as transformed, for line-based plugins. '''
+    from detect_secrets.transformers import get_transformed_file
+    from detect_secrets.types import NamedIO
+    file_ = __.typx.cast( NamedIO, file )
+    try: lines = get_transformed_file( file_ ) or file.readlines( )
+    except UnicodeDecodeError: return
+    yield lines
+    file.seek( 0 )
+    lines = get_transformed_file( file_, use_eager_transformers = True )
+    if lines: yield lines
@@ -0,0 +1,358 @@
+# vim: set filetype=python fileencoding=utf-8:
+# -*- coding: utf-8 -*-
+
+#============================================================================#
+#                                                                            #
+#  Licensed under the Apache License, Version 2.0 (the "License");           #
+#  you may not use this file except in compliance with the License.          #
+#  You may obtain a copy of the License at                                   #
+#                                                                            #
+#      http://www.apache.org/licenses/LICENSE-2.0                            #
+#                                                                            #
+#  Unless required by applicable law or agreed to in writing, software       #
+#  distributed under the License is distributed on an "AS IS" BASIS,         #
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.  #
+#  See the License for the specific language governing permissions and       #
+#  limitations under the License.                                            #
+#                                                                            #
+#============================================================================#
+
+''' Trigram queries, derived from regular expressions.
+
+    Follows the approach of Google Code Search: a regular expression is
+    analyzed into a boolean query over trigrams, which every text that it
+    matches must satisfy. The query selects candidate texts from posting
+    lists of trigrams, so that only candidates need to be matched against
+    the regular expression. Trigrams are of casefolded text, so that one
+    index serves searches with and without case sensitivity.
+'''
+
+
+from . import __
+
+
+# Maximum number of strings in sets of exact matches, prefixes, or suffixes
+_STRINGS_MAXIMUM = 16
+# Maximum number of characters which are enumerated from character class
+_CLASS_MAXIMUM = 8
+_TRIGRAM_LENGTH = 3
+
+
+class TrigramOperators( __.enum.Enum ):
+    ''' Operators of trigram queries. '''
+
+    All = 'all'
+    And = 'and'
+    Or = 'or'
+
+
+class TrigramQuery( __.immut.DataclassObject ):
+    ''' Boolean query over posting lists of trigrams.
+
+        Query of all operator selects every text. Query of and operator
+        selects texts with all of its trigrams and which satisfy all of its
+        subqueries. Query of or operator selects texts with any of its
+        trigrams or which satisfy any of its subqueries.
+    '''
+
+    operator: TrigramOperators
+    trigrams: frozenset[ str ] = frozenset( )
+    subqueries: tuple[ 'TrigramQuery', ... ] = ( )
+
+    def evaluate(
+        self, postings: __.cabc.Mapping[ str, __.cabc.Set[ int ] ]
+    ) -> frozenset[ int ] | None:
+        ''' Selects texts from posting lists, by trigram.
+
+            Returns None, if query selects every text.
+        '''
+        match self.operator:
+            case TrigramOperators.All: return None
+            case TrigramOperators.And: return self._intersect( postings )
+            case TrigramOperators.Or: return self._unite( postings )
+
+    def survey_trigrams( self ) -> frozenset[ str ]:
+        ''' Returns trigrams of query and of its subqueries. '''
+        trigrams = set( self.trigrams )
+        for subquery in self.subqueries:
+            trigrams.update( subquery.survey_trigrams( ) )
+        return frozenset( trigrams )
+
+    def _intersect(
+        self, postings: __.cabc.Mapping[ str, __.cabc.Set[ int ] ]
+    ) -> frozenset[ int ] | None:
+        selection: frozenset[ int ] | None = None
+        for trigram in sorted(
+            self.trigrams, key = lambda trigram: len(
+                postings.get( trigram, ( ) ) )
+        ):
+            posting = frozenset( postings.get( trigram, ( ) ) )
+            selection = posting if selection is None else selection & posting
+            if not selection: return frozenset( )
+        for subquery in self.subqueries:
+            subselection = subquery.evaluate( postings )
+            if subselection is None: continue
+            selection = (
+                subselection if selection is None
+                else selection & subselection )
+            if not selection: return frozenset( )
+        return selection
+
+    def _unite(
+        self, postings: __.cabc.Mapping[ str, __.cabc.Set[ int ] ]
+    ) -> frozenset[ int ] | None:
+        selection: set[ int ] = set( )
+        for trigram in self.trigrams:
+            selection.update( postings.get( trigram, ( ) ) )
+        for subquery in self.subqueries:
+            subselection = subquery.evaluate( postings )
+            if subselection is None: return None
+            selection.update( subselection )
+        return frozenset( selection )
+
+
+QUERY_ALL = TrigramQuery( operator = TrigramOperators.All )
+
+
+class _Analysis( __.immut.DataclassObject ):
+    ''' What is known of strings which regular expression matches.
+
+        If exact is not None, then it has every string which can be
+        matched. Else, prefixes and suffixes have beginnings and endings
+        of such strings, and match is query which each must satisfy.
+    '''
+
+    exact: frozenset[ str ] | None
+    prefixes: frozenset[ str ]
+    suffixes: frozenset[ str ]
+    match: TrigramQuery
+
+
+_EMPTY = frozenset( ( '', ) )
+_ANALYSIS_ANY = _Analysis(
+    exact = None, prefixes = _EMPTY, suffixes = _EMPTY, match = QUERY_ALL )
+_ANALYSIS_EMPTY = _Analysis(
+    exact = _EMPTY, prefixes = _EMPTY, suffixes = _EMPTY, match = QUERY_ALL )
+
+
+def extract_trigrams( text: str ) -> frozenset[ str ]:
+    ''' Extracts trigrams of casefolded text. '''
+    text = text.casefold( )
+    return frozenset(
+        text[ i : i + _TRIGRAM_LENGTH ]
+        for i in range( len( text ) - _TRIGRAM_LENGTH + 1 ) )
+
+
+def produce_trigram_query( pattern: str, flags: int = 0 ) -> TrigramQuery:
+    ''' Produces trigram query which texts matched by pattern satisfy.
+
+        Raises re.error, if pattern is invalid.
+    '''
+    analysis = _analyze_sequence( _parse_pattern( pattern, flags ) )
+    if analysis.exact is not None:
+        return _conjoin( analysis.match, _select_any( analysis.exact ) )
+    return _conjoin( analysis.match, _conjoin(
+        _select_any( analysis.prefixes ),
+        _select_any( analysis.suffixes ) ) )
+
+
+def _alternate( first: _Analysis, second: _Analysis ) -> _Analysis:
+    if first.exact is not None and second.exact is not None:
+        return _simplify( _Analysis(
+            exact = first.exact | second.exact,
+            prefixes = _EMPTY, suffixes = _EMPTY,
+            match = _disjoin( first.match, second.match ) ) )
+    first, second = _release_exact( first ), _release_exact( second )
+    return _simplify( _Analysis(
+        exact = None,
+        prefixes = first.prefixes | second.prefixes,
+        suffixes = first.suffixes | second.suffixes,
+        match = _disjoin( first.match, second.match ) ) )
+
+
+def _analyze( operator: __.typx.Any, argument: __.typx.Any ) -> _Analysis:
+    ''' Analyzes node of parsed regular expression. '''
+    analysis = _ANALYSIS_ANY
+    match operator.name:
+        case 'LITERAL':
+            analysis = _produce_exact( frozenset( ( chr( argument ), ) ) )
+        case 'IN':
+            characters = _enumerate_class( argument )
+            if characters is not None:
+                analysis = _produce_exact( characters )
+        case 'BRANCH':
+            analyses = [ _analyze_sequence( item ) for item in argument[ 1 ] ]
+            analysis = analyses[ 0 ]
+            for analysis_ in analyses[ 1 : ]:
+                analysis = _alternate( analysis, analysis_ )
+        case 'SUBPATTERN': analysis = _analyze_sequence( argument[ -1 ] )
+        case 'ATOMIC_GROUP': analysis = _analyze_sequence( argument )
+        case 'MAX_REPEAT' | 'MIN_REPEAT' | 'POSSESSIVE_REPEAT':
+            analysis = _repeat(
+                argument[ 0 ], _analyze_sequence( argument[ 2 ] ) )
+        case 'AT' | 'ASSERT' | 'ASSERT_NOT': analysis = _ANALYSIS_EMPTY
+        case _: pass
+    return analysis
+
+
+def _analyze_sequence( pattern: __.typx.Any ) -> _Analysis:
+    ''' Analyzes concatenation of nodes of parsed regular expression. '''
+    analysis = _ANALYSIS_EMPTY
+    for operator, argument in pattern.data:
+        analysis = _concatenate( analysis, _analyze( operator, argument ) )
+    return analysis
+
+
+def _concatenate( first: _Analysis, second: _Analysis ) -> _Analysis:
+    match = _conjoin( first.match, second.match )
+    if first.exact is not None and second.exact is not None:
+        return _simplify( _Analysis(
+            exact = _cross( first.exact, second.exact ),
+            prefixes = _EMPTY, suffixes = _EMPTY, match = match ) )
+    # Trigrams which span boundary of concatenation
+    match = _conjoin( match, _select_any( _cross(
+        first.suffixes if first.exact is None else first.exact,
+        second.prefixes if second.exact is None else second.exact ) ) )
+    prefixes = (
+        first.prefixes if first.exact is None
+        else _cross( first.exact, second.prefixes ) )
+    suffixes = (
+        second.suffixes if second.exact is None
+        else _cross( first.suffixes, second.exact ) )
+    return _simplify( _Analysis(
+        exact = None, prefixes = prefixes, suffixes = suffixes,
+        match = match ) )
+
+
+def _conjoin( first: TrigramQuery, second: TrigramQuery ) -> TrigramQuery:
+    if first.operator is TrigramOperators.All: return second
+    if second.operator is TrigramOperators.All: return first
+    trigrams: set[ str ] = set( )
+    subqueries: list[ TrigramQuery ] = [ ]
+    for query in ( first, second ):
+        if query.operator is TrigramOperators.And:
+            trigrams.update( query.trigrams )
+            subqueries.extend( query.subqueries )
+        else: subqueries.append( query )
+    return TrigramQuery(
+        operator = TrigramOperators.And,
+        trigrams = frozenset( trigrams ),
+        subqueries = _deduplicate( subqueries ) )
+
+
+def _cross(
+    first: frozenset[ str ], second: frozenset[ str ]
+) -> frozenset[ str ]:
+    return frozenset( head + tail for head in first for tail in second )
+
+
+def _deduplicate(
+    queries: __.cabc.Iterable[ TrigramQuery ]
+) -> tuple[ TrigramQuery, ... ]:
+    unique: list[ TrigramQuery ] = [ ]
+    for query in queries:
+        if query not in unique: unique.append( query )
+    return tuple( unique )
+
+
+def _disjoin( first: TrigramQuery, second: TrigramQuery ) -> TrigramQuery:
+    if first.operator is TrigramOperators.All: return first
+    if second.operator is TrigramOperators.All: return second
+    trigrams: set[ str ] = set( )
+    subqueries: list[ TrigramQuery ] = [ ]
+    for query in ( first, second ):
+        if query.operator is TrigramOperators.Or:
+            trigrams.update( query.trigrams )
+            subqueries.extend( query.subqueries )
+        elif len( query.trigrams ) == 1 and not query.subqueries:
+            trigrams.update( query.trigrams )
+        else: subqueries.append( query )
+    return TrigramQuery(
+        operator = TrigramOperators.Or,
+        trigrams = frozenset( trigrams ),
+        subqueries = _deduplicate( subqueries ) )
+
+
+def _enumerate_class(
+    items: __.cabc.Iterable[ tuple[ __.typx.Any, __.typx.Any ] ]
+) -> frozenset[ str ] | None:
+    ''' Enumerates characters of class. None, if too many or negated. '''
+    characters: set[ str ] = set( )
+    for operator, argument in items:
+        match operator.name:
+            case 'LITERAL': characters.add( chr( argument ) )
+            case 'RANGE':
+                low, high = argument
+                if high - low >= _CLASS_MAXIMUM: return None
+                characters.update( map( chr, range( low, high + 1 ) ) )
+            case _: return None
+        if len( characters ) > _CLASS_MAXIMUM: return None
+    return frozenset( characters )
+
+
+def _parse_pattern( pattern: str, flags: int ) -> __.typx.Any:
+    ''' Parses regular expression with parser of standard library. '''
+    from importlib import import_module
+    name = 're._parser' if __.sys.version_info >= ( 3, 11 ) else 'sre_parse'
+    parser: __.typx.Any = import_module( name )
+    return parser.parse( pattern, flags )
+
+
+def _produce_exact( strings: frozenset[ str ] ) -> _Analysis:
+    return _Analysis(
+        exact = frozenset( string.casefold( ) for string in strings ),
+        prefixes = _EMPTY, suffixes = _EMPTY, match = QUERY_ALL )
+
+
+def _release_exact( analysis: _Analysis ) -> _Analysis:
+    ''' Moves exact strings of analysis into its query and affixes. '''
+    if analysis.exact is None: return analysis
+    return _Analysis(
+        exact = None,
+        prefixes = analysis.exact,
+        suffixes = analysis.exact,
+        match = _conjoin( analysis.match, _select_any( analysis.exact ) ) )
+
+
+def _repeat( minimum: int, analysis: _Analysis ) -> _Analysis:
+    if minimum == 0: return _ANALYSIS_ANY
+    analysis = _release_exact( analysis )
+    return _simplify( _Analysis(
+        exact = None,
+        prefixes = analysis.prefixes,
+        suffixes = analysis.suffixes,
+        match = analysis.match ) )
+
+
+def _select_any( strings: frozenset[ str ] ) -> TrigramQuery:
+    ''' Produces query which texts with any of strings satisfy. '''
+    if not strings or any(
+        len( string ) < _TRIGRAM_LENGTH for string in strings
+    ): return QUERY_ALL
+    query: TrigramQuery | None = None
+    for string in sorted( strings ):
+        query_ = TrigramQuery(
+            operator = TrigramOperators.And,
+            trigrams = extract_trigrams( string ) )
+        query = query_ if query is None else _disjoin( query, query_ )
+    return query or QUERY_ALL
+
+
+def _simplify( analysis: _Analysis ) -> _Analysis:
+    ''' Bounds sizes of sets of strings, moving information into query.
+
+        Affixes are trimmed to two characters, which suffices for trigrams
+        which span boundaries of concatenations.
+    '''
+    if analysis.exact is not None:
+        if len( analysis.exact ) <= _STRINGS_MAXIMUM: return analysis
+        analysis = _release_exact( analysis )
+    match = _conjoin( analysis.match, _conjoin(
+        _select_any( analysis.prefixes ), _select_any( analysis.suffixes ) ) )
+    prefixes = frozenset( prefix[ : 2 ] for prefix in analysis.prefixes )
+    suffixes = frozenset( suffix[ -2 : ] for suffix in analysis.suffixes )
+    if len( prefixes ) > _STRINGS_MAXIMUM: prefixes = _EMPTY
+    if len( suffixes ) > _STRINGS_MAXIMUM: suffixes = _EMPTY
+    return _Analysis(
+        exact = None, prefixes = prefixes, suffixes = suffixes,
+        match = match )
@@ -0,0 +1,212 @@
+# vim: set filetype=python fileencoding=utf-8:
+# -*- coding: utf-8 -*-
+
+#============================================================================#
+#                                                                            #
+#  Licensed under the Apache License, Version 2.0 (the "License");           #
+#  you may not use this file except in compliance with the License.          #
+#  You may obtain a copy of the License at                                   #
+#                                                                            #
+#      http://www.apache.org/licenses/LICENSE-2.0                            #
+#                                                                            #
+#  Unless required by applicable law or agreed to in writing, software       #
+#  distributed under the License is distributed on an "AS IS" BASIS,         #
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.  #
+#  See the License for the specific language governing permissions and       #
+#  limitations under the License.                                            #
+#                                                                            #
+#============================================================================#
+
+
+
+''' Assert correct function of ingestion engine. '''
+
+
+import asyncio
+
+from . import __
+
+
+def _populate_sources( root ):
+    ''' Creates source trees with colliding relative paths. '''
+    first = root / 'first'
+    second = root / 'second'
+    for base in ( first, second ):
+        ( base / 'nested' ).mkdir( parents = True )
+    for index in range( 20 ):
+        ( first / f"script_{index}.py" ).write_text( f"print( {index} )\n" )
+        ( second / f"script_{index}.py" ).write_text(
+            f"print( {index % 2} )\n" )
+    ( first / 'nested' / 'notes.md' ).write_text( '# Notes\n' )
+    ( second / 'nested' / 'notes.md' ).write_text( '# Notes\n' )
+    ( first / '.gitignore' ).write_text( '*\n' )
+    return ( first, second )
+
+
+def _ingest( root, sources, target, workers ):
+    discovery = __.cache_import_module( f"{__.PACKAGE_NAME}.discovery" )
+    ingestion = __.cache_import_module( f"{__.PACKAGE_NAME}.ingestion" )
+    files = tuple( discovery.discover_source_files( sources ) )
+    files = tuple( sorted( files, key = lambda pair: str( pair[ 1 ] ) ) )
+    context = ingestion.IngestContext(
+        target_dir = root / target, workers = workers )
+    outcomes = asyncio.run( ingestion.ingest_files( files, context ) )
+    return tuple(
+        (   outcome.source, outcome.disposition,
+            outcome.destination and outcome.destination.relative_to(
+                root / target ) )
+        for outcome in outcomes )
+
+
+def test_100_concurrent_matches_serial( tmp_path ):
+    ''' Concurrent ingestion produces same outcomes as serial ingestion. '''
+    sources = _populate_sources( tmp_path )
+    serial = _ingest( tmp_path, sources, 'serial', workers = 1 )
+    concurrent = _ingest( tmp_path, sources, 'concurrent', workers = 8 )
+    assert serial == concurrent
+    assert len( serial ) == 42
+    dispositions = [ disposition.value for _, disposition, _ in serial ]
+    assert dispositions.count( 'copied' ) == 21
+    assert dispositions.count( 'skipped' ) == 3
+    assert dispositions.count( 'renamed' ) == 18
+
+
+def test_110_outcomes_in_discovery_order( tmp_path ):
+    ''' Outcomes are reported in discovery order. '''
+    sources = _populate_sources( tmp_path )
+    outcomes = _ingest( tmp_path, sources, 'archive', workers = 8 )
+    names = [ str( source ) for source, _, _ in outcomes ]
+    assert names == sorted( names )
+
+
+def test_200_manifest_spares_rehashing( tmp_path ):
+    ''' Targets recorded in manifest are not rehashed when unchanged. '''
+    discovery = __.cache_import_module( f"{__.PACKAGE_NAME}.discovery" )
+    ingestion = __.cache_import_module( f"{__.PACKAGE_NAME}.ingestion" )
+    manifests = __.cache_import_module( f"{__.PACKAGE_NAME}.manifests" )
+    first, _ = _populate_sources( tmp_path )
+    target = tmp_path / 'archive'
+    files = tuple( discovery.discover_source_files( ( first, ) ) )
+
+    def ingest( ):
+        manifest = manifests.Manifest.load( target )
+        context = ingestion.IngestContext(
+            target_dir = target, manifest = manifest )
+        outcomes = asyncio.run( ingestion.ingest_files( files, context ) )
+        manifest.save( )
+        return { outcome.disposition.value for outcome in outcomes }
+
+    assert ingest( ) == { 'copied' }
+    manifest_path = target / manifests.MANIFEST_NAME
+    text = manifest_path.read_text( )
+    assert ingest( ) == { 'skipped' }
+    assert manifest_path.read_text( ) == text
+    # Recorded hash is trusted while size and mtime are unchanged.
+    script = target / 'script_0.py'
+    stat = script.stat( )
+    forged = manifests.Manifest( target, { 'script_0.py': (
+        manifests.ManifestEntry(
+            content_hash = 'f' * 64,
+            size = stat.st_size,
+            mtime_ns = stat.st_mtime_ns ) ) } )
+    assert forged.access_hash( script ) == 'f' * 64
+    script.write_text( 'print( "altered" )\n' )
+    assert forged.access_hash( script ) != 'f' * 64
+
+
+def test_300_journal_skips_unchanged_sources( tmp_path ):
+    ''' Sources unchanged since last ingest are skipped without reading. '''
+    discovery = __.cache_import_module( f"{__.PACKAGE_NAME}.discovery" )
+    ingestion = __.cache_import_module( f"{__.PACKAGE_NAME}.ingestion" )
+    journals = __.cache_import_module( f"{__.PACKAGE_NAME}.journals" )
+    first, _ = _populate_sources( tmp_path )
+    target = tmp_path / 'archive'
+    files = tuple( discovery.discover_source_files( ( first, ) ) )
+
+    def ingest( ):
+        journal = journals.Journal( tmp_path / 'journals', target )
+        context = ingestion.IngestContext(
+            target_dir = target, journal = journal )
+        outcomes = asyncio.run( ingestion.ingest_files( files, context ) )
+        journal.save( )
+        return { outcome.source.name: outcome for outcome in outcomes }
+
+    outcomes = ingest( )
+    assert { outcome.novelty.value for outcome in outcomes.values( ) } == {
+        'new' }
+    outcomes = ingest( )
+    assert { outcome.reason for outcome in outcomes.values( ) } == {
+        'Unchanged since last ingest' }
+    ( first / 'script_0.py' ).write_text( 'print( "altered" )\n' )
+    ( target / 'script_1.py' ).unlink( )
+    outcomes = ingest( )
+    assert outcomes[ 'script_0.py' ].novelty.value == 'changed'
+    assert outcomes[ 'script_0.py' ].disposition.value == 'renamed'
+    assert outcomes[ 'script_1.py' ].novelty.value == 'new'
+    assert outcomes[ 'script_1.py' ].disposition.value == 'copied'
+    assert outcomes[ 'script_2.py' ].novelty.value == 'unchanged'
+
+
+def test_400_object_store_shares_content( tmp_path ):
+    ''' Entries with same content across projects share one object. '''
+    discovery = __.cache_import_module( f"{__.PACKAGE_NAME}.discovery" )
+    ingestion = __.cache_import_module( f"{__.PACKAGE_NAME}.ingestion" )
+    objects = __.cache_import_module( f"{__.PACKAGE_NAME}.objects" )
+    first, _ = _populate_sources( tmp_path )
+    files = tuple( discovery.discover_source_files( ( first, ) ) )
+    store = objects.ObjectStore( tmp_path / 'objects' )
+    for project in ( 'alpha', 'beta' ):
+        context = ingestion.IngestContext(
+            target_dir = tmp_path / project, objects = store )
+        outcomes = asyncio.run( ingestion.ingest_files( files, context ) )
+        assert { outcome.copy_strategy.value for outcome in outcomes } == {
+            'hardlink' }
+    alpha = tmp_path / 'alpha' / 'nested' / 'notes.md'
+    beta = tmp_path / 'beta' / 'nested' / 'notes.md'
+    assert alpha.read_text( ) == '# Notes\n'
+    assert alpha.stat( ).st_ino == beta.stat( ).st_ino
+    location = store.locate( outcomes[ 0 ].content_hash )
+    assert store.contains( outcomes[ 0 ].content_hash )
+    assert not location.stat( ).st_mode & 0o222
+    store = objects.ObjectStore( tmp_path / 'objects', hardlinks = False )
+    context = ingestion.IngestContext(
+        target_dir = tmp_path / 'gamma', objects = store )
+    outcomes = asyncio.run( ingestion.ingest_files( files, context ) )
+    assert 'hardlink' not in {
+        outcome.copy_strategy.value for outcome in outcomes }
+    gamma = tmp_path / 'gamma' / 'nested' / 'notes.md'
+    assert gamma.read_text( ) == '# Notes\n'
+    assert gamma.stat( ).st_ino != alpha.stat( ).st_ino
+
+
+def test_500_only_copies_are_scanned( tmp_path ):
+    ''' Files skipped by classification are never scanned. '''
+    discovery = __.cache_import_module( f"{__.PACKAGE_NAME}.discovery" )
+    ingestion = __.cache_import_module( f"{__.PACKAGE_NAME}.ingestion" )
+    scanning = __.cache_import_module( f"{__.PACKAGE_NAME}.scanning" )
+    sources = _populate_sources( tmp_path )
+    files = tuple( discovery.discover_source_files( sources ) )
+    files = tuple( sorted( files, key = lambda pair: str( pair[ 1 ] ) ) )
+
+    async def ingest( ):
+        async with scanning.SecretsScanner(
+            backend = scanning.ScanBackends.Threads, workers = 2
+        ) as scanner:
+            context = ingestion.IngestContext(
+                target_dir = tmp_path / 'archive', scanner = scanner )
+            return await ingestion.ingest_files( files, context )
+
+    def count( outcomes, stage ):
+        return sum( stage in outcome.stages for outcome in outcomes )
+
+    outcomes = asyncio.run( ingest( ) )
+    assert count( outcomes, ingestion.Stages.Classify ) == 42
+    assert count( outcomes, ingestion.Stages.Scan ) == 39
+    assert count( outcomes, ingestion.Stages.Copy ) == 39
+    outcomes = asyncio.run( ingest( ) )
+    assert count( outcomes, ingestion.Stages.Classify ) == 42
+    assert count( outcomes, ingestion.Stages.Scan ) == 0
+    assert count( outcomes, ingestion.Stages.Copy ) == 0
+    assert { outcome.disposition.value for outcome in outcomes } == {
+        'skipped' }
+    assert not any( outcome.copy_strategy for outcome in outcomes )
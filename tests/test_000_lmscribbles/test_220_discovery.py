@@ -0,0 +1,120 @@
+# vim: set filetype=python fileencoding=utf-8:
+# -*- coding: utf-8 -*-
+
+#============================================================================#
+#                                                                            #
+#  Licensed under the Apache License, Version 2.0 (the "License");           #
+#  you may not use this file except in compliance with the License.          #
+#  You may obtain a copy of the License at                                   #
+#                                                                            #
+#      http://www.apache.org/licenses/LICENSE-2.0                            #
+#                                                                            #
+#  Unless required by applicable law or agreed to in writing, software       #
+#  distributed under the License is distributed on an "AS IS" BASIS,         #
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.  #
+#  See the License for the specific language governing permissions and       #
+#  limitations under the License.                                            #
+#                                                                            #
+#============================================================================#
+
+
+
+''' Assert correct function of source discovery. '''
+
+
+import pytest
+
+from . import __
+
+
+def _populate_tree( root ):
+    for relative in (
+        'notes.md', 'script.py', '.gitignore',
+        'docs/guide.md', 'docs/draft/plan.md',
+        '__pycache__/script.cpython-310.pyc',
+        '.venv/lib/site.py', 'node_modules/pkg/index.js',
+    ):
+        path = root / relative
+        path.parent.mkdir( parents = True, exist_ok = True )
+        path.write_text( relative )
+    return root
+
+
+def _discover( root, **criteria ):
+    discovery = __.cache_import_module( f"{__.PACKAGE_NAME}.discovery" )
+    return sorted(
+        path.relative_to( root ).as_posix( )
+        for _, path in discovery.discover_source_files(
+            ( root, ), discovery.DiscoveryFilter( **criteria ) ) )
+
+
+@pytest.mark.parametrize( 'pattern, path, is_directory, expectation', (
+    ( '*.md', 'docs/guide.md', False, True ),
+    ( '/*.md', 'docs/guide.md', False, None ),
+    ( 'docs/*.md', 'docs/guide.md', False, True ),
+    ( 'docs/*.md', 'docs/draft/plan.md', False, None ),
+    ( 'docs/**/*.md', 'docs/draft/plan.md', False, True ),
+    ( '**/draft', 'docs/draft', True, True ),
+    ( 'build/', 'build', False, None ),
+    ( 'build/', 'src/build', True, True ),
+    ( 'script.[!c]y', 'script.py', False, True ),
+    ( '# comment', '# comment', False, None ),
+) )
+def test_100_matcher_follows_gitignore_semantics(
+    pattern, path, is_directory, expectation
+):
+    ''' Patterns follow '.gitignore' semantics. '''
+    discovery = __.cache_import_module( f"{__.PACKAGE_NAME}.discovery" )
+    matcher = discovery.PathMatcher( ( pattern, ) )
+    assert matcher.match( path, is_directory ) is expectation
+
+
+def test_110_last_matching_pattern_decides( ):
+    ''' Negated patterns override earlier patterns. '''
+    discovery = __.cache_import_module( f"{__.PACKAGE_NAME}.discovery" )
+    matcher = discovery.PathMatcher( ( '*.md', '!keep.md', 'drop/' ) )
+    assert matcher.match( 'notes.md', False ) is True
+    assert matcher.match( 'keep.md', False ) is False
+    assert matcher.match( 'drop', True ) is True
+
+
+def test_200_default_excludes_prune_directories( tmp_path ):
+    ''' Default exclusions prune caches and environments. '''
+    root = _populate_tree( tmp_path )
+    assert _discover( root ) == [
+        'docs/draft/plan.md', 'docs/guide.md', 'notes.md', 'script.py' ]
+
+
+def test_210_includes_and_excludes_combine( tmp_path ):
+    ''' Inclusions select files; exclusions prune directories. '''
+    root = _populate_tree( tmp_path )
+    assert _discover( root, includes = ( '*.md', ) ) == [
+        'docs/draft/plan.md', 'docs/guide.md', 'notes.md' ]
+    assert _discover(
+        root, includes = ( '*.md', ), excludes = ( 'draft/', ) ) == [
+        'docs/guide.md', 'notes.md' ]
+
+
+def test_215_excludes_add_to_defaults( tmp_path ):
+    ''' Exclusions keep default exclusions, unless these are disabled. '''
+    root = _populate_tree( tmp_path )
+    assert _discover( root, excludes = ( 'draft/', ) ) == [
+        'docs/guide.md', 'notes.md', 'script.py' ]
+    assert _discover( root, excludes = ( '!.gitignore', ) ) == [
+        '.gitignore', 'docs/draft/plan.md', 'docs/guide.md',
+        'notes.md', 'script.py' ]
+    assert _discover(
+        root, excludes = ( '.venv/', ), default_excludes = False ) == [
+        '.gitignore', '__pycache__/script.cpython-310.pyc',
+        'docs/draft/plan.md', 'docs/guide.md', 'node_modules/pkg/index.js',
+        'notes.md', 'script.py' ]
+
+
+def test_220_ignore_files_honored_when_requested( tmp_path ):
+    ''' Ignore files apply relative to their directories, on request. '''
+    root = _populate_tree( tmp_path )
+    ( root / '.gitignore' ).write_text( '*.py\n' )
+    ( root / 'docs' / '.gitignore' ).write_text( '/draft/\n' )
+    assert _discover( root, honor_ignores = True ) == [
+        'docs/guide.md', 'notes.md' ]
+    assert 'script.py' in _discover( root )
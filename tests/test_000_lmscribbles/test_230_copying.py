@@ -0,0 +1,73 @@
+# vim: set filetype=python fileencoding=utf-8:
+# -*- coding: utf-8 -*-
+
+#============================================================================#
+#                                                                            #
+#  Licensed under the Apache License, Version 2.0 (the "License");           #
+#  you may not use this file except in compliance with the License.          #
+#  You may obtain a copy of the License at                                   #
+#                                                                            #
+#      http://www.apache.org/licenses/LICENSE-2.0                            #
+#                                                                            #
+#  Unless required by applicable law or agreed to in writing, software       #
+#  distributed under the License is distributed on an "AS IS" BASIS,         #
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.  #
+#  See the License for the specific language governing permissions and       #
+#  limitations under the License.                                            #
+#                                                                            #
+#============================================================================#
+
+
+
+''' Assert correct function of content copying. '''
+
+
+import os
+
+import pytest
+
+from . import __
+
+
+def test_100_copy_preserves_content( tmp_path ):
+    ''' Copy holds source content, whichever strategy succeeds. '''
+    contents = __.cache_import_module( f"{__.PACKAGE_NAME}.contents" )
+    copying = __.cache_import_module( f"{__.PACKAGE_NAME}.copying" )
+    source = tmp_path / 'source.json'
+    source.write_bytes( os.urandom( 3 << 20 ) )
+    destination = tmp_path / 'destination.json'
+    strategy = copying.copy_content(
+        contents.read_content( source ), destination )
+    assert destination.read_bytes( ) == source.read_bytes( )
+    if os.name == 'posix' and hasattr( os, 'copy_file_range' ):
+        assert strategy is not copying.CopyStrategies.Buffered
+
+
+def test_110_copy_of_touched_source_is_streamed( tmp_path ):
+    ''' Source touched since reading is streamed and verified by hash. '''
+    contents = __.cache_import_module( f"{__.PACKAGE_NAME}.contents" )
+    copying = __.cache_import_module( f"{__.PACKAGE_NAME}.copying" )
+    source = tmp_path / 'source.md'
+    source.write_text( '# Original\n' )
+    content = contents.read_content( source )
+    os.utime( source, ns = ( 0, content.mtime_ns + 1 ) )
+    destination = tmp_path / 'destination.md'
+    strategy = copying.copy_content( content, destination )
+    assert strategy is copying.CopyStrategies.Buffered
+    assert destination.read_text( ) == '# Original\n'
+
+
+def test_120_copy_of_altered_source_fails( tmp_path ):
+    ''' Source altered since reading is not copied. '''
+    contents = __.cache_import_module( f"{__.PACKAGE_NAME}.contents" )
+    copying = __.cache_import_module( f"{__.PACKAGE_NAME}.copying" )
+    exceptions = __.cache_import_module( f"{__.PACKAGE_NAME}.exceptions" )
+    source = tmp_path / 'source.md'
+    source.write_text( '# Original\n' )
+    content = contents.read_content( source )
+    source.write_text( '# Altered!\n' )
+    os.utime( source, ns = ( 0, content.mtime_ns + 1 ) )
+    destination = tmp_path / 'destination.md'
+    with pytest.raises( exceptions.ContentChangeFailure ):
+        copying.copy_content( content, destination )
+    assert not destination.exists( )
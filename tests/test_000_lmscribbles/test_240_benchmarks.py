@@ -0,0 +1,71 @@
+# vim: set filetype=python fileencoding=utf-8:
+# -*- coding: utf-8 -*-
+
+#============================================================================#
+#                                                                            #
+#  Licensed under the Apache License, Version 2.0 (the "License");           #
+#  you may not use this file except in compliance with the License.          #
+#  You may obtain a copy of the License at                                   #
+#                                                                            #
+#      http://www.apache.org/licenses/LICENSE-2.0                            #
+#                                                                            #
+#  Unless required by applicable law or agreed to in writing, software       #
+#  distributed under the License is distributed on an "AS IS" BASIS,         #
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.  #
+#  See the License for the specific language governing permissions and       #
+#  limitations under the License.                                            #
+#                                                                            #
+#============================================================================#
+
+
+
+
+''' Assert correct function of corpus generation and benchmarks. '''
+
+
+import asyncio
+import json
+
+from . import __
+
+
+def test_100_corpus_is_deterministic( tmp_path ):
+    ''' Same seed generates same corpus, with mix of kinds. '''
+    corpora = __.cache_import_module( f"{__.PACKAGE_NAME}.corpora" )
+    first = corpora.generate_corpus( tmp_path / 'first', 300, seed = 7 )
+    second = corpora.generate_corpus( tmp_path / 'second', 300, seed = 7 )
+    assert first == second
+    assert first.files == 300
+    assert first.kinds[ 'test' ] > first.kinds[ 'sample' ] > 0
+    paths = sorted(
+        path.relative_to( tmp_path / 'first' )
+        for path in ( tmp_path / 'first' ).rglob( '*' ) if path.is_file( ) )
+    assert len( paths ) == 300
+    for path in paths[ :20 ]:
+        assert ( tmp_path / 'first' / path ).read_bytes( ) == (
+            tmp_path / 'second' / path ).read_bytes( )
+    samples = tuple( ( tmp_path / 'first' ).glob( '*/*.html' ) )
+    assert all( 30_000 <= path.stat( ).st_size <= 71_000 for path in samples )
+
+
+def test_200_benchmark_stores_and_compares_runs( tmp_path ):
+    ''' Trials are measured by phase and compared with stored runs. '''
+    benchmarks = __.cache_import_module( f"{__.PACKAGE_NAME}.benchmarks" )
+    results_file = tmp_path / 'results.jsonl'
+    command = benchmarks.BenchmarkCommand(
+        sizes = ( 40, ), workspace = tmp_path / 'workspace',
+        results_file = results_file, check_secrets = False )
+    result = asyncio.run( command( ) )
+    first, reingest = result.runs
+    assert first.trial is benchmarks.Trials.First
+    assert first.outcomes[ 'copied' ] + first.outcomes[ 'skipped' ] == 40
+    assert reingest.outcomes[ 'skipped' ] == 40
+    assert 'read' in first.metrics.phases
+    assert first.previous_wall_time is None
+    lines = results_file.read_text( ).splitlines( )
+    records = [ json.loads( line ) for line in lines ]
+    assert [ record[ 'trial' ] for record in records ] == [
+        'first', 'reingest' ]
+    result = asyncio.run( command( ) )
+    assert result.runs[ 0 ].previous_wall_time == records[ 0 ][ 'wall_time' ]
+    assert 'previous' in result.render_as_text( )
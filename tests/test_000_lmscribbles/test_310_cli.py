@@ -0,0 +1,169 @@
+# vim: set filetype=python fileencoding=utf-8:
+# -*- coding: utf-8 -*-
+
+#============================================================================#
+#                                                                            #
+#  Licensed under the Apache License, Version 2.0 (the "License");           #
+#  you may not use this file except in compliance with the License.          #
+#  You may obtain a copy of the License at                                   #
+#                                                                            #
+#      http://www.apache.org/licenses/LICENSE-2.0                            #
+#                                                                            #
+#  Unless required by applicable law or agreed to in writing, software       #
+#  distributed under the License is distributed on an "AS IS" BASIS,         #
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.  #
+#  See the License for the specific language governing permissions and       #
+#  limitations under the License.                                            #
+#                                                                            #
+#============================================================================#
+
+
+
+''' Assert correct function of command-line interface. '''
+
+
+import asyncio
+import json
+import subprocess
+import sys
+
+from . import __
+
+
+_HELP_PROBE = '''
+import sys
+from lmscribbles.cli import execute
+sys.argv = [ 'lmscribbles', *sys.argv[ 1 : ] ]
+try: execute( )
+except SystemExit: pass
+print( __import__( 'json' ).dumps( sorted( sys.modules ) ) )
+'''
+
+
+def _probe_modules( *arguments ):
+    process = subprocess.run(  # noqa: S603
+        ( sys.executable, '-c', _HELP_PROBE, *arguments ),
+        capture_output = True, check = True, text = True )
+    *output, modules = process.stdout.splitlines( )
+    return '\n'.join( output ), set( json.loads( modules ) )
+
+
+def test_100_help_imports_no_scanner( ):
+    ''' Help lists subcommands without importing detect-secrets. '''
+    output, modules = _probe_modules( '--help' )
+    for name in ( 'ingest-batch', 'search', 'catalog', 'benchmark-startup' ):
+        assert name in output
+    assert 'detect_secrets' not in modules
+
+
+def test_110_subcommand_help_imports_no_scanner( ):
+    ''' Help of subcommand is rendered without importing detect-secrets. '''
+    output, modules = _probe_modules( 'search', '--help' )
+    assert 'lmscribbles search' in output
+    assert 'detect_secrets' not in modules
+
+
+def test_120_nested_subcommands_are_selected( ):
+    ''' Nested subcommands are parsed with global options. '''
+    cli = __.cache_import_module( f"{__.PACKAGE_NAME}.cli" )
+    rebuilds = __.cache_import_module( f"{__.PACKAGE_NAME}.rebuilds" )
+    parse = cli.parse_cli(
+        [ '--no-daemon', 'catalog', 'rebuild', '--incremental' ] )
+    assert parse.no_daemon
+    assert isinstance( parse.command.command, rebuilds.CatalogRebuildCommand )
+    assert parse.command.command.incremental
+
+
+def test_200_forwardable_commands( ):
+    ''' Only commands which daemon executes are forwarded. '''
+    cli = __.cache_import_module( f"{__.PACKAGE_NAME}.cli" )
+    assert cli.is_forwardable( cli.parse_cli( [ 'search' ] ).command )
+    assert not cli.is_forwardable( cli.parse_cli( [ 'serve' ] ).command )
+    parse = cli.parse_cli( [ '--daemon-socket', 'absent.socket', 'search' ] )
+    assert parse.forward( [ 'search' ] ) is None
+
+
+def test_300_startup_benchmark_stores_runs( tmp_path ):
+    ''' Invocations are measured and compared with stored runs. '''
+    benchmarks = __.cache_import_module( f"{__.PACKAGE_NAME}.benchmarks" )
+    results_file = tmp_path / 'results.jsonl'
+    command = benchmarks.StartupBenchmarkCommand(
+        invocations = ( '--help', ), repetitions = 2,
+        results_file = results_file )
+    run, = asyncio.run( command( ) ).runs
+    assert len( run.wall_times ) == 2
+    assert run.minimum <= run.median
+    assert run.previous_median is None
+    result = asyncio.run( command( ) )
+    record = json.loads( results_file.read_text( ).splitlines( )[ 0 ] )
+    assert result.runs[ 0 ].previous_median == record[ 'median' ]
+
+
+def test_400_daemon_serves_forwarded_commands(
+    tmp_path, monkeypatch, capsys
+):
+    ''' Forwarded commands run in daemon with retained resources. '''
+    cli = __.cache_import_module( f"{__.PACKAGE_NAME}.cli" )
+    daemon = __.cache_import_module( f"{__.PACKAGE_NAME}.daemon" )
+    monkeypatch.chdir( tmp_path )
+    ( tmp_path / 'source' ).mkdir( )
+    ( tmp_path / 'source' / 'notes.md' ).write_text( 'notes\n' )
+    socket_path = 'daemon.socket'
+
+    def forward( *arguments ):
+        arguments_ = [
+            '--daemon-socket', socket_path, '--display-format', 'ndjson',
+            *arguments ]
+        return cli.parse_cli( arguments_ ).forward( arguments_ )
+
+    async def exercise( ):
+        stopped = asyncio.Event( )
+        command = daemon.ServeCommand( socket_path = socket_path )
+        serving = asyncio.create_task( command.serve( stopped ) )
+        while not ( tmp_path / socket_path ).exists( ):
+            await asyncio.sleep( 0.01 )
+        arguments = (
+            'ingest', '--project-name', 'notes', '--source-paths', 'source',
+            '--scan-backend', 'threads' )
+        statuses = [
+            await asyncio.to_thread( forward, *arguments ),
+            await asyncio.to_thread( forward, *arguments ),
+            await asyncio.to_thread( forward, 'serve' ),
+            await asyncio.to_thread(
+                forward, 'ingest', '--apply', 'plan.json',
+                '--plan-out', 'plan.json' ),
+        ]
+        stopped.set( )
+        return statuses, await serving
+
+    statuses, result = asyncio.run( exercise( ) )
+    assert statuses == [ 0, 0, None, 1 ]
+    assert result.requests == 3
+    assert not ( tmp_path / socket_path ).exists( )
+    captured = capsys.readouterr( )
+    assert captured.err.splitlines( ) == [
+        'Missing or conflicting options: --apply, --plan-out' ]
+    events = [ json.loads( line ) for line in captured.out.splitlines( ) ]
+    assert [ event[ 'event' ] for event in events ] == [
+        'copied', 'summary', 'skipped', 'summary' ]
+    assert ( tmp_path / 'ingests' / 'notes' / 'notes.md' ).exists( )
+    assert forward( 'ingest' ) is None
+
+
+def test_410_retainer_reloads_changed_manifests( tmp_path ):
+    ''' Retained manifests are reused until changed by others. '''
+    manifests = __.cache_import_module( f"{__.PACKAGE_NAME}.manifests" )
+    retention = __.cache_import_module( f"{__.PACKAGE_NAME}.retention" )
+    ( tmp_path / 'notes.md' ).write_text( 'notes\n' )
+    retainer = retention.Retainer( )
+    manifest = retainer.access_manifest( tmp_path )
+    manifest.access_hash( tmp_path / 'notes.md' )
+    manifest.save( )
+    retainer.refresh_manifest( manifest )
+    assert retainer.access_manifest( tmp_path ) is manifest
+    assert manifest.misses == 0
+    other = manifests.Manifest.load( tmp_path )
+    ( tmp_path / 'more.md' ).write_text( 'more\n' )
+    other.access_hash( tmp_path / 'more.md' )
+    other.save( )
+    assert retainer.access_manifest( tmp_path ) is not manifest
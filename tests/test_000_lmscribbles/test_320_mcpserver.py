@@ -0,0 +1,132 @@
+# vim: set filetype=python fileencoding=utf-8:
+# -*- coding: utf-8 -*-
+
+#============================================================================#
+#                                                                            #
+#  Licensed under the Apache License, Version 2.0 (the "License");           #
+#  you may not use this file except in compliance with the License.          #
+#  You may obtain a copy of the License at                                   #
+#                                                                            #
+#      http://www.apache.org/licenses/LICENSE-2.0                            #
+#                                                                            #
+#  Unless required by applicable law or agreed to in writing, software       #
+#  distributed under the License is distributed on an "AS IS" BASIS,         #
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.  #
+#  See the License for the specific language governing permissions and       #
+#  limitations under the License.                                            #
+#                                                                            #
+#============================================================================#
+
+
+
+''' Assert correct function of MCP server. '''
+
+
+import asyncio
+import json
+
+from . import __
+
+
+def _produce_session( tmp_path ):
+    mcpserver = __.cache_import_module( f"{__.PACKAGE_NAME}.mcpserver" )
+    retention = __.cache_import_module( f"{__.PACKAGE_NAME}.retention" )
+    options = mcpserver.McpServeCommand(
+        target_base = tmp_path / 'ingests',
+        cache_directory = tmp_path / 'caches' )
+    return mcpserver._McpSession( options, retention.Retainer( ) )
+
+
+def _call( session, identifier, method, params = None ):
+    message = { 'jsonrpc': '2.0', 'id': identifier, 'method': method }
+    if params is not None: message[ 'params' ] = params
+    return asyncio.run( session.respond( json.dumps( message ) ) )
+
+
+def _call_tool( session, name, **arguments ):
+    response = _call(
+        session, name, 'tools/call',
+        { 'name': name, 'arguments': arguments } )
+    return response[ 'result' ]
+
+
+def test_100_protocol_handshake_and_errors( tmp_path ):
+    ''' Handshake lists tools; malformed messages produce errors. '''
+    session = _produce_session( tmp_path )
+    response = _call(
+        session, 1, 'initialize', { 'protocolVersion': '2024-11-05' } )
+    assert response[ 'result' ][ 'protocolVersion' ] == '2024-11-05'
+    tools = _call( session, 2, 'tools/list' )[ 'result' ][ 'tools' ]
+    assert { tool[ 'name' ] for tool in tools } == {
+        'ingest', 'search', 'file_metadata', 'update_manifest' }
+    notification = json.dumps(
+        { 'jsonrpc': '2.0', 'method': 'notifications/initialized' } )
+    assert asyncio.run( session.respond( notification ) ) is None
+    assert asyncio.run( session.respond( 'junk' ) )[ 'error' ][
+        'code' ] == -32700
+    assert _call( session, 3, 'absent' )[ 'error' ][ 'code' ] == -32601
+    response = _call(
+        session, 4, 'tools/call', { 'name': 'absent', 'arguments': { } } )
+    assert response[ 'error' ][ 'code' ] == -32602
+
+
+def test_200_tools_page_within_budgets( tmp_path ):
+    ''' Tools ingest, search, describe, and reconcile within budgets. '''
+    session = _produce_session( tmp_path )
+    source = tmp_path / 'source'
+    source.mkdir( )
+    for i in range( 12 ):
+        ( source / f"note{i:02}.md" ).write_text(
+            f"# Note {i}\n\nneedle {i}\n" + 'filler\n' * 50 )
+    result = _call_tool(
+        session, 'ingest', project_name = 'notes',
+        source_paths = [ str( source ) ], check_secrets = False )
+    assert not result[ 'isError' ]
+    data = result[ 'structuredContent' ]
+    assert data[ 'summary' ][ 'copied' ] == 12
+    assert ( len( data[ 'items' ] ), data[ 'omitted' ] ) == ( 12, 0 )
+    paths = [ ]
+    cursor = '0'
+    while cursor is not None:
+        data = _call_tool(
+            session, 'search', text = 'NEEDLE', cursor = cursor,
+            token_budget = 150 )[ 'structuredContent' ]
+        assert data[ 'items' ]
+        assert len( data[ 'items' ] ) == 1 or data[ 'tokens' ] <= 150
+        paths.extend( item[ 'path' ] for item in data[ 'items' ] )
+        cursor = data[ 'next_cursor' ]
+    assert paths == [ f"note{i:02}.md" for i in range( 12 ) ]
+    data = _call_tool(
+        session, 'file_metadata', project = 'notes', path = 'note03.md',
+        include_content = True, start_line = 3, line_count = 2
+    )[ 'structuredContent' ]
+    assert data[ 'content' ][ 'lines' ] == [ 'needle 3\n', 'filler\n' ]
+    assert data[ 'content' ][ 'next_line' ] == 5
+    ( tmp_path / 'ingests' / 'notes' / 'note00.md' ).unlink( )
+    ( tmp_path / 'ingests' / 'notes' / 'extra.md' ).write_text( 'extra\n' )
+    data = _call_tool(
+        session, 'update_manifest', project = 'notes' )[ 'structuredContent' ]
+    assert ( data[ 'files' ], data[ 'rehashed' ], data[ 'removed' ] ) == (
+        12, 1, 1 )
+    result = _call_tool( session, 'file_metadata', project = 'notes' )
+    assert result[ 'isError' ]
+
+
+def test_210_ingest_pages_notable_events( tmp_path ):
+    ''' Ingest returns one page of notable events and counts the rest. '''
+    session = _produce_session( tmp_path )
+    source = tmp_path / 'source'
+    source.mkdir( )
+    for i in range( 3 ):
+        ( source / f"note{i}.md" ).write_text( f"# Note {i}\n" )
+    arguments = dict(
+        project_name = 'notes', source_paths = [ str( source ) ],
+        check_secrets = False, limit = 1 )
+    data = _call_tool( session, 'ingest', **arguments )[ 'structuredContent' ]
+    assert data[ 'summary' ][ 'copied' ] == 3
+    assert [ item[ 'event' ] for item in data[ 'items' ] ] == [ 'copied' ]
+    assert data[ 'omitted' ] == 2
+    assert 'next_cursor' not in data
+    data = _call_tool( session, 'ingest', **arguments )[ 'structuredContent' ]
+    assert data[ 'summary' ][ 'skipped' ] == 3
+    assert ( data[ 'items' ], data[ 'omitted' ] ) == ( [ ], 0 )
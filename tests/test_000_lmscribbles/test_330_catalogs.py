@@ -0,0 +1,405 @@
+# vim: set filetype=python fileencoding=utf-8:
+# -*- coding: utf-8 -*-
+
+#============================================================================#
+#                                                                            #
+#  Licensed under the Apache License, Version 2.0 (the "License");           #
+#  you may not use this file except in compliance with the License.          #
+#  You may obtain a copy of the License at                                   #
+#                                                                            #
+#      http://www.apache.org/licenses/LICENSE-2.0                            #
+#                                                                            #
+#  Unless required by applicable law or agreed to in writing, software       #
+#  distributed under the License is distributed on an "AS IS" BASIS,         #
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.  #
+#  See the License for the specific language governing permissions and       #
+#  limitations under the License.                                            #
+#                                                                            #
+#============================================================================#
+
+
+
+''' Assert correct function of catalog, classification, and search. '''
+
+
+import asyncio
+import datetime
+
+import pytest
+
+from . import __
+
+
+def _produce_record( catalogs, project, path, hash_, minute ):
+    return catalogs.ScribbleMetadata(
+        id = catalogs.produce_identifier( project, path ),
+        project = project,
+        path = path,
+        original_path = f"/sources/{project}/{path}",
+        archived_path = f"/ingests/{project}/{path}",
+        content_hash = hash_,
+        ingested_at = datetime.datetime(
+            2026, 1, 1, 0, minute, tzinfo = datetime.timezone.utc ),
+        size_bytes = 10 )
+
+
+def test_100_catalog_upserts_and_queries( tmp_path ):
+    ''' Upserts keep classification; queries filter by criteria. '''
+    catalogs = __.cache_import_module( f"{__.PACKAGE_NAME}.catalogs" )
+    with catalogs.Catalog( tmp_path / 'catalog.sqlite3' ) as catalog:
+        catalog.upsert( (
+            _produce_record( catalogs, 'alpha', 'a.md', 'h1', 1 ),
+            _produce_record( catalogs, 'alpha', 'notes/b.md', 'h2', 2 ),
+            _produce_record( catalogs, 'beta', 'c.md', 'h1', 3 ),
+        ) )
+        assert 2 == catalog.classify(
+            ( 'alpha/a.md', 'beta/c.md', 'gamma/absent.md' ),
+            labels_added = ( 'tech:python', 'design' ),
+            status = catalogs.ScribbleStatuses.Classified )
+        catalog.upsert( (
+            _produce_record( catalogs, 'alpha', 'a.md', 'h3', 4 ), ) )
+        record, = catalog.query( catalogs.CatalogQuery(
+            project = 'alpha', path_pattern = 'a.*' ) )
+        assert record.content_hash == 'h3'
+        assert record.labels == { 'tech:python', 'design' }
+        assert record.status is catalogs.ScribbleStatuses.Classified
+        records = catalog.query( catalogs.CatalogQuery( labels = (
+            'design', ) ) )
+        assert [ r.id for r in records ] == [ 'alpha/a.md', 'beta/c.md' ]
+        assert catalog.count( catalogs.CatalogQuery(
+            status = catalogs.ScribbleStatuses.Raw ) ) == 1
+        assert [ r.id for r in catalog.query( catalogs.CatalogQuery(
+            content_hash = 'h1' ) ) ] == [ 'beta/c.md' ]
+        page = catalog.query( catalogs.CatalogQuery( limit = 1, offset = 1 ) )
+        assert [ r.id for r in page ] == [ 'beta/c.md' ]
+        catalog.classify( ( 'beta/c.md', ), labels_removed = ( 'design', ) )
+        assert catalog.count(
+            catalogs.CatalogQuery( labels = ( 'design', ) ) ) == 1
+
+
+def test_110_catalog_evaluates_label_expressions( tmp_path ):
+    ''' Label expressions select records, with wildcards and negation. '''
+    catalogs = __.cache_import_module( f"{__.PACKAGE_NAME}.catalogs" )
+    labelqueries = __.cache_import_module(
+        f"{__.PACKAGE_NAME}.labelqueries" )
+    with catalogs.Catalog( tmp_path / 'catalog.sqlite3' ) as catalog:
+        catalog.upsert( tuple(
+            _produce_record( catalogs, 'alpha', f"{name}.md", name, minute )
+            for minute, name in enumerate( 'abcd' ) ) )
+        for name, labels in (
+            ( 'a', ( 'quality:gem', 'purpose:analysis' ) ),
+            ( 'b', ( 'quality:gem', 'purpose:debug', 'tech:web-scraping' ) ),
+            ( 'c', ( 'quality:gem', 'tech:python' ) ),
+        ):
+            catalog.classify( ( f"alpha/{name}.md", ), labels_added = labels )
+
+        def select( text ):
+            query = catalogs.CatalogQuery(
+                label_expression = labelqueries.parse_label_query( text ) )
+            assert catalog.count( query ) == len( catalog.query( query ) )
+            return sorted( r.path for r in catalog.query( query ) )
+
+        assert select(
+            'quality:gem AND (purpose:analysis OR purpose:debug) '
+            'AND NOT tech:web-scraping' ) == [ 'a.md' ]
+        assert select( 'tech:*' ) == [ 'b.md', 'c.md' ]
+        assert select( 'NOT tech:*' ) == [ 'a.md', 'd.md' ]
+        assert select( 'purpose:x OR NOT quality:gem' ) == [ 'd.md' ]
+
+
+def test_200_ingestion_populates_catalog( tmp_path ):
+    ''' Ingestion records scribbles, which are classified and searched. '''
+    commands = __.cache_import_module( f"{__.PACKAGE_NAME}.commands" )
+    queries = __.cache_import_module( f"{__.PACKAGE_NAME}.queries" )
+    catalogs = __.cache_import_module( f"{__.PACKAGE_NAME}.catalogs" )
+    sources = tmp_path / 'sources'
+    sources.mkdir( )
+    for name in ( 'one.md', 'two.md' ):
+        ( sources / name ).write_text( f"# {name}\n" )
+    options = dict(
+        target_base = tmp_path / 'ingests',
+        cache_directory = tmp_path / 'caches' )
+    asyncio.run( commands.IngestCommand(
+        project_name = 'alpha', source_paths = [ sources ],
+        check_secrets = False, **options )( ) )
+    result = asyncio.run( queries.SearchCommand( **options )( ) )
+    assert result.total == 2
+    assert { r.path for r in result.records } == { 'one.md', 'two.md' }
+    assert all( r.content_hash for r in result.records )
+    review = asyncio.run( queries.ClassifyCommand( **options )( ) )
+    assert review.total == 2
+    result = asyncio.run( queries.ClassifyCommand(
+        project = 'alpha', paths = [ 'one.md' ],
+        add_labels = [ 'idea' ],
+        status = catalogs.ScribbleStatuses.Classified, **options )( ) )
+    assert result.classified == 1
+    result = asyncio.run(
+        queries.SearchCommand( labels = [ 'idea' ], **options )( ) )
+    assert [ r.path for r in result.records ] == [ 'one.md' ]
+    assert '[classified] (idea)' in result.render_as_text( )
+    review = asyncio.run( queries.ClassifyCommand( **options )( ) )
+    assert [ r.path for r in review.records ] == [ 'two.md' ]
+
+
+def test_300_rebuild_reconstructs_catalog( tmp_path ):
+    ''' Rebuild loads archive and selections, fully or incrementally. '''
+    rebuilds = __.cache_import_module( f"{__.PACKAGE_NAME}.rebuilds" )
+    queries = __.cache_import_module( f"{__.PACKAGE_NAME}.queries" )
+    ingests = tmp_path / 'ingests'
+    selections = tmp_path / 'selections'
+    ( ingests / 'alpha' / 'deep' ).mkdir( parents = True )
+    ( ingests / 'alpha' / 'one.md' ).write_text( 'one\n' )
+    ( ingests / 'alpha' / 'deep' / 'two.py' ).write_text( 'two\n' )
+    ( ingests / 'alpha' / '.manifest.tsv' ).write_text( '' )
+    ( selections / 'alpha' ).mkdir( parents = True )
+    ( selections / 'alpha' / 'two.py' ).symlink_to(
+        '../../ingests/alpha/deep/two.py' )
+    ( selections / 'alpha.toml' ).write_text(
+        '[[selections]]\nfilename = "two.py"\nlabels = [ "quality:gem" ]\n'
+        '[[selections]]\nfilename = "gone.md"\nlabels = [ "purpose:x" ]\n' )
+    options = dict(
+        target_base = ingests, cache_directory = tmp_path / 'caches' )
+    result = asyncio.run( rebuilds.CatalogRebuildCommand(
+        selections_directory = selections, **options )( ) )
+    assert ( result.scribbles, result.selected, result.hashed ) == (
+        2, 1, 2 )
+    assert result.warnings == (
+        "Selected scribble is not in archive: alpha/gone.md", )
+    found = asyncio.run(
+        queries.SearchCommand( labels = [ 'quality:gem' ], **options )( ) )
+    record, = found.records
+    assert record.path == 'deep/two.py'
+    assert record.status.value == 'classified'
+    ( ingests / 'alpha' / 'one.md' ).unlink( )
+    ( ingests / 'alpha' / 'three.md' ).write_text( 'three\n' )
+    result = asyncio.run( rebuilds.CatalogRebuildCommand(
+        selections_directory = selections, incremental = True,
+        **options )( ) )
+    assert ( result.scribbles, result.hashed, result.discarded ) == (
+        2, 1, 1 )
+    found = asyncio.run( queries.SearchCommand( **options )( ) )
+    assert { r.path for r in found.records } == { 'deep/two.py', 'three.md' }
+    indexes = __.cache_import_module( f"{__.PACKAGE_NAME}.indexes" )
+    contents = __.cache_import_module( f"{__.PACKAGE_NAME}.contents" )
+    with indexes.ContentIndex( indexes.produce_index_location(
+        tmp_path / 'caches', ingests
+    ) ) as index:
+        assert index.locate( contents.compute_hash(
+            ingests / 'alpha' / 'three.md' ) ) == ( ( 'alpha', 'three.md' ), )
+        assert not index.survey( ingests )
+
+
+def test_310_rebuild_keeps_classification( tmp_path ):
+    ''' Full rebuild keeps labels, notes, and status from classify. '''
+    catalogs = __.cache_import_module( f"{__.PACKAGE_NAME}.catalogs" )
+    rebuilds = __.cache_import_module( f"{__.PACKAGE_NAME}.rebuilds" )
+    queries = __.cache_import_module( f"{__.PACKAGE_NAME}.queries" )
+    ingests = tmp_path / 'ingests'
+    ( ingests / 'alpha' ).mkdir( parents = True )
+    ( ingests / 'alpha' / 'one.md' ).write_text( 'one\n' )
+    ( ingests / 'alpha' / 'two.md' ).write_text( 'two\n' )
+    options = dict(
+        target_base = ingests, cache_directory = tmp_path / 'caches' )
+    rebuild = rebuilds.CatalogRebuildCommand(
+        selections_directory = tmp_path / 'selections', **options )
+    asyncio.run( rebuild( ) )
+    asyncio.run( queries.ClassifyCommand(
+        project = 'alpha', paths = [ 'one.md' ], add_labels = [ 'idea' ],
+        status = catalogs.ScribbleStatuses.Refined, notes = 'Keep.',
+        **options )( ) )
+    ( ingests / 'alpha' / 'two.md' ).unlink( )
+    asyncio.run( rebuild( ) )
+    found = asyncio.run(
+        queries.SearchCommand( labels = [ 'idea' ], **options )( ) )
+    record, = found.records
+    assert record.path == 'one.md'
+    assert record.status is catalogs.ScribbleStatuses.Refined
+    assert record.notes == 'Keep.'
+    found = asyncio.run( queries.SearchCommand( **options )( ) )
+    assert found.total == 1
+
+
+def test_320_rebuild_indexes_texts_in_batches( tmp_path, monkeypatch ):
+    ''' Texts are read and indexed in batches, each of them once. '''
+    rebuilds = __.cache_import_module( f"{__.PACKAGE_NAME}.rebuilds" )
+    queries = __.cache_import_module( f"{__.PACKAGE_NAME}.queries" )
+    catalogs = __.cache_import_module( f"{__.PACKAGE_NAME}.catalogs" )
+    monkeypatch.setattr( catalogs, 'TEXTS_BATCH_SIZE', 2 )
+    ingests = tmp_path / 'ingests'
+    ( ingests / 'alpha' ).mkdir( parents = True )
+    for index in range( 5 ):
+        ( ingests / 'alpha' / f"note{index}.md" ).write_text(
+            f"needle {index}\n" )
+    options = dict(
+        target_base = ingests, cache_directory = tmp_path / 'caches' )
+    result = asyncio.run( rebuilds.CatalogRebuildCommand(
+        selections_directory = tmp_path / 'selections', **options )( ) )
+    assert result.indexed == 5
+    found = asyncio.run(
+        queries.SearchCommand( text = 'needle', **options )( ) )
+    assert found.total == 5
+
+
+def test_400_text_queries_quote_terms( ):
+    ''' Words and phrases become quoted terms, without query syntax. '''
+    catalogs = __.cache_import_module( f"{__.PACKAGE_NAME}.catalogs" )
+    assert catalogs.produce_text_query(
+        'alpha "beta gamma" pre* f(x)' ) == (
+        '"alpha" "beta gamma" "pre"* "f(x)"' )
+    assert catalogs.produce_text_query( 'a "b' ) == '"a" """b"'
+    assert catalogs.produce_text_query( '' ) == '""'
+
+
+def test_410_ingestion_indexes_texts( tmp_path ):
+    ''' Ingested contents are indexed once and searched by relevance. '''
+    commands = __.cache_import_module( f"{__.PACKAGE_NAME}.commands" )
+    queries = __.cache_import_module( f"{__.PACKAGE_NAME}.queries" )
+    sources = tmp_path / 'sources'
+    sources.mkdir( )
+    ( sources / 'scanner.md' ).write_text(
+        'The secrets scanner scans secrets.\n' )
+    ( sources / 'copy.md' ).write_text(
+        'The secrets scanner scans secrets.\n' )
+    ( sources / 'other.md' ).write_text(
+        'Notes about scanning, and one secret.\n' )
+    ( sources / 'blob.bin' ).write_bytes( b'secrets\0\1\2' )
+    options = dict(
+        target_base = tmp_path / 'ingests',
+        cache_directory = tmp_path / 'caches' )
+    asyncio.run( commands.IngestCommand(
+        project_name = 'alpha', source_paths = [ sources ],
+        check_secrets = False, **options )( ) )
+    result = asyncio.run(
+        queries.SearchCommand( text = 'secrets', **options )( ) )
+    assert result.total == 3
+    assert [ r.path for r in result.records ][ -1 ] == 'other.md'
+    snippet = result.snippets[ 'alpha/scanner.md' ]
+    assert '«secrets»' in snippet
+    assert '«secrets»' in result.render_as_text( )
+    result = asyncio.run( queries.SearchCommand(
+        text = '"scanner scans"', pattern = 'c*', **options )( ) )
+    assert [ r.path for r in result.records ] == [ 'copy.md' ]
+    catalogs = __.cache_import_module( f"{__.PACKAGE_NAME}.catalogs" )
+    location = catalogs.produce_catalog_location(
+        tmp_path / 'caches', tmp_path / 'ingests' )
+    with catalogs.Catalog( location ) as catalog:
+        assert not catalog.survey_unindexed( )
+        documents, = catalog._connection.execute(
+            "SELECT COUNT( * ) FROM documents" ).fetchone( )
+    assert documents == 3
+
+
+def test_420_regex_search_reads_candidates( tmp_path ):
+    ''' Regular expressions search only candidates from trigram index. '''
+    commands = __.cache_import_module( f"{__.PACKAGE_NAME}.commands" )
+    queries = __.cache_import_module( f"{__.PACKAGE_NAME}.queries" )
+    exceptions = __.cache_import_module( f"{__.PACKAGE_NAME}.exceptions" )
+    sources = tmp_path / 'sources'
+    sources.mkdir( )
+    ( sources / 'scan.py' ).write_text(
+        'import detect_secrets\n'
+        'with default_settings ( ):\n    scan( )\n' )
+    ( sources / 'other.py' ).write_text( 'settings = default\n' )
+    options = dict(
+        target_base = tmp_path / 'ingests',
+        cache_directory = tmp_path / 'caches' )
+    asyncio.run( commands.IngestCommand(
+        project_name = 'alpha', source_paths = [ sources ],
+        check_secrets = False, **options )( ) )
+    result = asyncio.run( queries.SearchCommand(
+        regex = r'default_settings\s*\(', **options )( ) )
+    assert [ r.path for r in result.records ] == [ 'scan.py' ]
+    assert result.snippets[ 'alpha/scan.py' ] == (
+        '2: with default_settings ( ):' )
+    result = asyncio.run( queries.SearchCommand(
+        regex = r'DEFAULT', ignore_case = True, **options )( ) )
+    assert [ r.path for r in result.records ] == [ 'other.py', 'scan.py' ]
+    result = asyncio.run( queries.SearchCommand(
+        regex = r'DEFAULT', **options )( ) )
+    assert not result.records
+    with pytest.raises( exceptions.PatternInvalidity ):
+        asyncio.run( queries.SearchCommand( regex = '(', **options )( ) )
+
+
+def test_430_regex_search_covers_large_files( tmp_path ):
+    ''' Files too large for full-text index are still searched by regex. '''
+    catalogs = __.cache_import_module( f"{__.PACKAGE_NAME}.catalogs" )
+    commands = __.cache_import_module( f"{__.PACKAGE_NAME}.commands" )
+    queries = __.cache_import_module( f"{__.PACKAGE_NAME}.queries" )
+    sources = tmp_path / 'sources'
+    sources.mkdir( )
+    # First needle spans boundary of first chunk of trigram extraction.
+    filler = 'x' * ( catalogs.TEXT_SIZE_MAXIMUM - 3 ) + '\n'
+    ( sources / 'large.txt' ).write_text(
+        f"{filler}needle_one\n{filler}needle_two = 2\n" )
+    options = dict(
+        target_base = tmp_path / 'ingests',
+        cache_directory = tmp_path / 'caches' )
+    asyncio.run( commands.IngestCommand(
+        project_name = 'alpha', source_paths = [ sources ],
+        check_secrets = False, **options )( ) )
+    result = asyncio.run( queries.SearchCommand(
+        regex = r'needle_one', **options )( ) )
+    assert [ r.path for r in result.records ] == [ 'large.txt' ]
+    result = asyncio.run( queries.SearchCommand(
+        regex = r'NEEDLE_TWO\s*=', ignore_case = True, **options )( ) )
+    assert result.snippets[ 'alpha/large.txt' ] == '4: needle_two = 2'
+    result = asyncio.run( queries.SearchCommand(
+        regex = r'needle_three', **options )( ) )
+    assert not result.records
+
+
+def test_440_regex_search_stops_after_page( tmp_path ):
+    ''' Regex search reads candidates only until page is filled. '''
+    commands = __.cache_import_module( f"{__.PACKAGE_NAME}.commands" )
+    queries = __.cache_import_module( f"{__.PACKAGE_NAME}.queries" )
+    sources = tmp_path / 'sources'
+    sources.mkdir( )
+    for index in range( 5 ):
+        ( sources / f"note{index}.md" ).write_text( f"needle {index}\n" )
+    options = dict(
+        target_base = tmp_path / 'ingests',
+        cache_directory = tmp_path / 'caches' )
+    asyncio.run( commands.IngestCommand(
+        project_name = 'alpha', source_paths = [ sources ],
+        check_secrets = False, **options )( ) )
+    result = asyncio.run( queries.SearchCommand(
+        regex = r'needle \d', limit = 2, **options )( ) )
+    assert [ r.path for r in result.records ] == [ 'note0.md', 'note1.md' ]
+    assert ( result.total, result.total_exact, result.candidates ) == (
+        3, False, 5 )
+    assert 'of at least 3 (of 5 candidates)' in result.render_as_text( )
+    result = asyncio.run( queries.SearchCommand(
+        regex = r'needle \d', limit = 2, offset = 3, **options )( ) )
+    assert [ r.path for r in result.records ] == [ 'note3.md', 'note4.md' ]
+    assert ( result.total, result.total_exact ) == ( 5, True )
+
+
+def test_450_searches_index_pending_texts( tmp_path ):
+    ''' Searches of contents first index contents which await indexing. '''
+    catalogs = __.cache_import_module( f"{__.PACKAGE_NAME}.catalogs" )
+    commands = __.cache_import_module( f"{__.PACKAGE_NAME}.commands" )
+    queries = __.cache_import_module( f"{__.PACKAGE_NAME}.queries" )
+    sources = tmp_path / 'sources'
+    sources.mkdir( )
+    ( sources / 'note.md' ).write_text( 'needle in haystack\n' )
+    options = dict(
+        target_base = tmp_path / 'ingests',
+        cache_directory = tmp_path / 'caches' )
+    asyncio.run( commands.IngestCommand(
+        project_name = 'alpha', source_paths = [ sources ],
+        check_secrets = False, **options )( ) )
+    location = catalogs.produce_catalog_location(
+        tmp_path / 'caches', tmp_path / 'ingests' )
+    with catalogs.Catalog( location ) as catalog, catalog._connection as (
+        connection
+    ):
+        # Emulates loss of indexes of contents on upgrade of schema.
+        for table in ( 'trigrams', 'texts', 'documents' ):
+            connection.execute( f"DELETE FROM {table}" )  # noqa: S608
+    result = asyncio.run(
+        queries.SearchCommand( text = 'needle', **options )( ) )
+    assert [ r.path for r in result.records ] == [ 'note.md' ]
+    result = asyncio.run(
+        queries.SearchCommand( regex = r'needle\s+in', **options )( ) )
+    assert [ r.path for r in result.records ] == [ 'note.md' ]
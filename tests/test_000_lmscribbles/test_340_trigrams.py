@@ -0,0 +1,80 @@
+# vim: set filetype=python fileencoding=utf-8:
+# -*- coding: utf-8 -*-
+
+#============================================================================#
+#                                                                            #
+#  Licensed under the Apache License, Version 2.0 (the "License");           #
+#  you may not use this file except in compliance with the License.          #
+#  You may obtain a copy of the License at                                   #
+#                                                                            #
+#      http://www.apache.org/licenses/LICENSE-2.0                            #
+#                                                                            #
+#  Unless required by applicable law or agreed to in writing, software       #
+#  distributed under the License is distributed on an "AS IS" BASIS,         #
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.  #
+#  See the License for the specific language governing permissions and       #
+#  limitations under the License.                                            #
+#                                                                            #
+#============================================================================#
+
+
+
+''' Assert correct function of trigram queries. '''
+
+
+import re
+
+import pytest
+
+from . import __
+
+
+_TEXTS = (
+    'secrets = SecretsCollection( root )\n',
+    'with default_settings ( ):\n    scan( )\n',
+    'import os\nimport sys\n',
+    'nothing of interest here\n',
+    'SECRETSCOLLECTION(\n',
+)
+
+
+@pytest.mark.parametrize( 'pattern, flags', (
+    ( r'SecretsCollection\(', 0 ),
+    ( r'secretscollection\(', re.IGNORECASE ),
+    ( r'default_settings\s*\(', 0 ),
+    ( r'^import (os|sys)$', re.MULTILINE ),
+    ( r'(abc|scan)\( \)', 0 ),
+    ( r'of.*here', 0 ),
+    ( r'[Ss]ecrets = ', 0 ),
+    ( r'x*yz+', 0 ),
+) )
+def test_100_queries_select_all_matches( pattern, flags ):
+    ''' Texts which pattern matches are among texts which query selects. '''
+    trigrams = __.cache_import_module( f"{__.PACKAGE_NAME}.trigrams" )
+    query = trigrams.produce_trigram_query( pattern, flags )
+    postings = { }
+    for document, text in enumerate( _TEXTS ):
+        for trigram in trigrams.extract_trigrams( text ):
+            postings.setdefault( trigram, set( ) ).add( document )
+    selection = query.evaluate( postings )
+    if selection is None: selection = frozenset( range( len( _TEXTS ) ) )
+    matches = {
+        document for document, text in enumerate( _TEXTS )
+        if re.search( pattern, text, flags ) }
+    assert matches <= selection
+
+
+def test_110_queries_narrow_candidates( ):
+    ''' Literal trigrams of patterns narrow candidates. '''
+    trigrams = __.cache_import_module( f"{__.PACKAGE_NAME}.trigrams" )
+    query = trigrams.produce_trigram_query( r'default_settings\s*\(' )
+    assert query.operator is trigrams.TrigramOperators.And
+    assert { 'def', 'ngs' } <= query.trigrams
+    query = trigrams.produce_trigram_query( r'foo|bar' )
+    assert query.operator is trigrams.TrigramOperators.Or
+    assert query.trigrams == { 'foo', 'bar' }
+    query = trigrams.produce_trigram_query( r'a.*b' )
+    assert query.operator is trigrams.TrigramOperators.All
+    query = trigrams.produce_trigram_query( r'Tyro\.CLI' )
+    assert query.survey_trigrams( ) == {
+        'tyr', 'yro', 'ro.', 'o.c', '.cl', 'cli' }
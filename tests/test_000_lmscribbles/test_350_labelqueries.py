@@ -0,0 +1,92 @@
+# vim: set filetype=python fileencoding=utf-8:
+# -*- coding: utf-8 -*-
+
+#============================================================================#
+#                                                                            #
+#  Licensed under the Apache License, Version 2.0 (the "License");           #
+#  you may not use this file except in compliance with the License.          #
+#  You may obtain a copy of the License at                                   #
+#                                                                            #
+#      http://www.apache.org/licenses/LICENSE-2.0                            #
+#                                                                            #
+#  Unless required by applicable law or agreed to in writing, software       #
+#  distributed under the License is distributed on an "AS IS" BASIS,         #
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.  #
+#  See the License for the specific language governing permissions and       #
+#  limitations under the License.                                            #
+#                                                                            #
+#============================================================================#
+
+
+''' Assert correct function of label queries. '''
+
+
+import pytest
+
+from . import __
+
+
+_POSTINGS = {
+    'quality:gem': { 'a', 'b', 'c' },
+    'purpose:analysis': { 'a', 'd' },
+    'purpose:debug': { 'b' },
+    'tech:web-scraping': { 'b', 'e' },
+    'tech:python': { 'c' },
+}
+_UNIVERSE = frozenset( ( 'a', 'b', 'c', 'd', 'e', 'f' ) )
+
+
+def _resolve( term ):
+    from fnmatch import fnmatchcase
+    return frozenset( ).union( *(
+        identifiers for label, identifiers in _POSTINGS.items( )
+        if fnmatchcase( label, term.pattern ) ) )
+
+
+@pytest.mark.parametrize( 'text, identifiers', (
+    ( 'quality:gem', 'abc' ),
+    ( 'quality:gem purpose:analysis', 'a' ),
+    ( 'quality:gem AND (purpose:analysis OR purpose:debug) '
+      'AND NOT tech:web-scraping', 'a' ),
+    ( 'purpose:analysis or purpose:debug', 'abd' ),
+    ( 'NOT tech:*', 'adf' ),
+    ( 'tech:* and not quality:gem', 'e' ),
+    ( 'not (quality:gem or tech:web-scraping)', 'df' ),
+    ( 'purpose:debug AND NOT NOT quality:gem', 'b' ),
+    ( 'absent', '' ),
+) )
+def test_100_queries_evaluate_over_postings( text, identifiers ):
+    ''' Expressions select records with labels which satisfy them. '''
+    labelqueries = __.cache_import_module(
+        f"{__.PACKAGE_NAME}.labelqueries" )
+    expression = labelqueries.parse_label_query( text )
+    selection = labelqueries.evaluate_label_expression(
+        expression, _resolve, lambda: _UNIVERSE )
+    assert selection == frozenset( identifiers )
+
+
+def test_110_conjunctions_subtract_negations( ):
+    ''' Universe is not surveyed when negation can be subtracted. '''
+    labelqueries = __.cache_import_module(
+        f"{__.PACKAGE_NAME}.labelqueries" )
+    expression = labelqueries.parse_label_query(
+        'quality:gem AND NOT tech:web-scraping' )
+
+    def survey_universe( ):
+        raise AssertionError
+
+    assert labelqueries.evaluate_label_expression(
+        expression, _resolve, survey_universe ) == { 'a', 'c' }
+
+
+@pytest.mark.parametrize( 'text', (
+    '', 'AND', 'quality:gem AND', '(quality:gem', 'quality:gem)',
+    'NOT', 'a OR OR b', '()',
+) )
+def test_200_malformed_queries_are_invalid( text ):
+    ''' Malformed queries raise invalidity. '''
+    exceptions = __.cache_import_module( f"{__.PACKAGE_NAME}.exceptions" )
+    labelqueries = __.cache_import_module(
+        f"{__.PACKAGE_NAME}.labelqueries" )
+    with pytest.raises( exceptions.LabelQueryInvalidity ):
+        labelqueries.parse_label_query( text )